@@ -2,12 +2,15 @@ import numpy as np
 import pandas as pd
 from datetime import datetime as dt, timedelta
 from datetime import date
-from dataclasses import dataclass
-from dateutil.relativedelta import relativedelta
-from typing import List, Dict, Any, Optional, Iterator, Tuple
+from dataclasses import dataclass, replace
+from typing import List, Dict, Any, Callable, Optional, Iterator, Tuple
 from FrequencyClass import Frequency
 from CurvesClass import Curves
 from SettingsClasses import Settings
+from CacheClass import LRUCache
+from SectorSpreadClass import SectorSpreadIndex
+from JitKernels import kernels
+from RootFinding import bisection_root
 import logging
 
 logger=logging.getLogger(__name__)
@@ -20,6 +23,201 @@ file_handler.setFormatter(formatter)
 
 logger.addHandler(file_handler)
 
+schedule_cache = LRUCache(max_size=4096) # Coupon schedules keyed by (issue_date, maturity_date, frequency, modelling_date)
+
+
+def coupon_schedule(issue_date: date, maturity_date: date, frequency: Frequency, modelling_date: date) -> np.ndarray:
+    """
+    Coupon payment dates on or after the modelling date and not after the maturity date, as a read-only datetime64[D] array.
+    The dates are the same as the ones from stepping relativedelta(months=12 // frequency) one coupon at a time from the issue
+    date, including the clipping of the day of month (a date stepped to the 28th of February stays on the 28th afterwards).
+    Schedules are memoized in schedule_cache, so bonds with the same issue date, maturity date and frequency share one schedule.
+
+    Parameters
+    ----------
+    :type issue_date: date
+        Issue date of the bond
+    :type maturity_date: date
+        Maturity date of the bond
+    :type frequency: Frequency
+        Number of coupons per year
+    :type modelling_date: date
+        The earliest date considered
+
+    Returns
+    -------
+    :rtype np.ndarray
+        Sorted array of coupon dates
+    """
+    key = (issue_date, maturity_date, int(frequency), modelling_date)
+    schedule = schedule_cache.get(key)
+    if schedule is not None:
+        return schedule
+
+    step = 12 // int(frequency)
+    first_month = (issue_date.year - 1970) * 12 + issue_date.month - 1 - step # Months since 1970-01, the datetime64[M] epoch. Stepping starts one period before the issue date
+    last_month = (maturity_date.year - 1970) * 12 + maturity_date.month - 1
+    months = np.arange(first_month, last_month + step + 1, step).astype("datetime64[M]")
+    days_in_month = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(int)
+    day = np.minimum.accumulate(np.minimum(days_in_month, issue_date.day)) # relativedelta clips to the month end and the clipped day is carried forward
+    dates = (months.astype("datetime64[D]") + (day - 1))[1:]
+
+    schedule = dates[(dates >= np.datetime64(modelling_date)) & (dates <= np.datetime64(maturity_date))]
+    schedule.flags.writeable = False
+    schedule_cache.put(key, schedule)
+    return schedule
+
+
+def coupon_schedules(issue_dates: np.ndarray, maturity_dates: np.ndarray, frequencies: np.ndarray, modelling_date: date) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coupon schedules of many bonds at once, with the same dates as coupon_schedule. The running minimum of the day of
+    month is taken per bond by offsetting the days of each bond, so that no bond sees the days of the bonds before it.
+
+    Parameters
+    ----------
+    :type issue_dates: np.ndarray
+        datetime64[D] array of issue dates
+    :type maturity_dates: np.ndarray
+        datetime64[D] array of maturity dates
+    :type frequencies: np.ndarray
+        Integer array with the number of coupons per year
+    :type modelling_date: date
+        The earliest date considered
+
+    Returns
+    -------
+    :rtype tuple
+        Concatenated coupon dates of all bonds as a datetime64[D] array and the number of coupon dates of each bond
+    """
+    issue_dates = np.asarray(issue_dates, dtype="datetime64[D]")
+    maturity_dates = np.asarray(maturity_dates, dtype="datetime64[D]")
+    step = 12 // np.asarray(frequencies, dtype=int)
+    n_bonds = issue_dates.size
+
+    issue_months = issue_dates.astype("datetime64[M]")
+    issue_day = (issue_dates - issue_months.astype("datetime64[D]")).astype(int) + 1
+    first_month = issue_months.astype(np.int64) - step # Stepping starts one period before the issue date
+    n_months = (maturity_dates.astype("datetime64[M]").astype(np.int64) - first_month) // step + 2
+
+    bond = np.repeat(np.arange(n_bonds), n_months)
+    position = np.arange(bond.size) - np.repeat(np.cumsum(n_months) - n_months, n_months)
+    months = first_month[bond] + position * step[bond]
+    if months.size == 0:
+        return np.zeros(0, dtype="datetime64[D]"), np.zeros(n_bonds, dtype=int)
+
+    # First day of each month in the range, so that the calendar is evaluated once per month and not once per coupon
+    first_of_month = np.arange(months.min(), months.max() + 2).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    month_start = first_of_month[months - months.min()]
+    days_in_month = first_of_month[months - months.min() + 1] - month_start
+    offset = (n_bonds - 1 - bond) * 64 # Days are below 64, so earlier bonds never lower the minimum of later ones
+    day = np.minimum.accumulate(np.minimum(days_in_month, issue_day[bond]) + offset) - offset
+    dates = (month_start + (day - 1)).astype("datetime64[D]")
+
+    keep = (position > 0) & (dates >= np.datetime64(modelling_date)) & (dates <= maturity_dates[bond])
+    return dates[keep], np.bincount(bond[keep], minlength=n_bonds)
+
+
+def yield_analytics(amounts: np.ndarray, times: np.ndarray, offsets: np.ndarray, prices: np.ndarray, precision: float = 1e-10, max_iter: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Yield to maturity, Macaulay duration, modified duration and convexity of many bonds at once, from cash flows in the
+    compressed sparse row layout of FlatCashFlows. The yield y solves sum(amounts * (1 + y) ** -times) = price with annual
+    compounding. Newton's method is run on the bonds that have not converged yet in one vectorized step per iteration, so a
+    few slowly converging bonds do not cost the iterations of the whole book. It starts from the yield of a zero
+    coupon bond paying all flows at their weighted average time. The price is decreasing and convex in the yield, so once an
+    iterate is below the root the iteration approaches it monotonically. Steps below -1 are cut to half the distance to -1.
+
+    Parameters
+    ----------
+    :type amounts: np.ndarray
+        Cash flow amounts of all bonds
+    :type times: np.ndarray
+        Time of each cash flow in years from the valuation date. All times must be positive
+    :type offsets: np.ndarray
+        The flows of bond i are at positions offsets[i] to offsets[i+1]
+    :type prices: np.ndarray
+        Dirty price of each bond
+    :type precision: float
+        Precision of the yield
+    :type max_iter: int
+        Maximum number of iterations
+
+    Returns
+    -------
+    :rtype dict
+        Arrays "ytm", "macaulay_duration", "modified_duration" and "convexity". Bonds without flows, with a non positive
+        price or for which the iteration did not converge are NaN
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    times = np.asarray(times, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    counts = np.diff(offsets)
+    n_bonds = counts.size
+    has_flows = counts > 0
+
+    def bond_sum(values: np.ndarray) -> np.ndarray: # Sum of the values of each bond, 0 for bonds without flows
+        total = np.zeros(n_bonds)
+        if values.size > 0:
+            total[has_flows] = np.add.reduceat(values, offsets[:-1][has_flows])
+        return total
+
+    active = has_flows & (prices > 0)
+    total = bond_sum(amounts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = np.where(active, (total / prices) ** (total / bond_sum(times * amounts)) - 1, 0.)
+    y[~np.isfinite(y) | (y <= -1)] = 0.
+    converged = np.zeros(n_bonds, dtype=bool)
+    i_iter = 0
+    while i_iter < max_iter and np.any(active):
+        bonds = np.flatnonzero(active)
+        flow_mask = np.repeat(active, counts)
+        active_times = times[flow_mask]
+        discounted = amounts[flow_mask] * (1 + np.repeat(y[bonds], counts[bonds])) ** (-active_times)
+        starts = np.cumsum(counts[bonds]) - counts[bonds]
+        gap = np.add.reduceat(discounted, starts) - prices[bonds]
+        slope = -np.add.reduceat(active_times * discounted, starts) / (1 + y[bonds])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = gap / slope
+        valid = np.isfinite(step)
+        active[bonds[~valid]] = False
+        bonds, step = bonds[valid], step[valid]
+        y[bonds] = np.maximum(y[bonds] - step, (y[bonds] - 1) / 2)
+        done = bonds[np.abs(step) < precision]
+        converged[done] = True
+        active[done] = False
+        i_iter += 1
+
+    growth = 1 + np.repeat(y, counts)
+    discounted = amounts * growth ** (-times)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = bond_sum(discounted)
+        macaulay = bond_sum(times * discounted) / value
+        convexity = bond_sum(times * (times + 1) * discounted) / value / (1 + y) ** 2
+    nan = np.full(n_bonds, np.nan)
+    return {"ytm": np.where(converged, y, nan),
+            "macaulay_duration": np.where(converged, macaulay, nan),
+            "modified_duration": np.where(converged, macaulay / (1 + y), nan),
+            "convexity": np.where(converged, convexity, nan)}
+
+
+@dataclass(frozen=True)
+class SpreadSolution:
+    """
+    Result of CorpBond.newton_spread.
+
+    spread: calibrated spread. NaN if the bisection fallback ran out of iterations
+    converged: True if the spread reproduces the market price. False if there is no root in the allowed interval,
+        in which case the bisection fallback returns the end point it reached, as CorpBond.bisection_spread does
+    iterations: number of Newton or Halley iterations
+    method: "newton" or "halley" if the derivative based iteration converged, "bisection" if the fallback was used
+    price_error: model price minus market price at the returned spread
+    """
+    spread: float
+    converged: bool
+    iterations: int
+    method: str
+    price_error: float
+
+
 @dataclass(frozen=True)
 class CorpBond:
     asset_id: int
@@ -103,14 +301,14 @@ class CorpBond:
 
         end_date = min(end_date, self.maturity_date)
 
-        delta = relativedelta(months=(12 // self.frequency))
-        this_date = self.issue_date - delta
-        while this_date < self.maturity_date:  # Coupon payment dates
-            this_date = this_date + delta
-            if this_date < modelling_date: #Not interested in past payments
-                continue
-            if this_date <= self.maturity_date:
-                yield this_date
+        for coupon_date in self.coupon_schedule(modelling_date).tolist():
+            yield coupon_date
+
+    def coupon_schedule(self, modelling_date: date) -> np.ndarray:
+        """
+        Coupon payment dates on or after the modelling date as a read-only datetime64[D] array. See coupon_schedule.
+        """
+        return coupon_schedule(self.issue_date, self.maturity_date, self.frequency, modelling_date)
 
 
     def create_single_cash_flows(self, modelling_date: date, end_date: date) -> Dict[date, float]:
@@ -133,15 +331,8 @@ class CorpBond:
             Dictionary of dictionaries containing the cash flow date and the size.        
         """
 
-        coupon_size = 0
-        coupons: Dict[date, float] = {}
-        for coupon_date in self.generate_coupon_dates(modelling_date, end_date):
-            if coupon_date in coupons:  # If two cash flows on same date
-                pass
-                # dividends[dividend_date] = dividend_amount + dividends[dividend_date]
-            else:  # New cash flow date
-                coupon_size = self.coupon_amount()
-                coupons.update({coupon_date: coupon_size})
+        coupon_size = self.coupon_amount()
+        coupons: Dict[date, float] = dict.fromkeys(self.generate_coupon_dates(modelling_date, end_date), coupon_size) # Coupon dates are unique
         return coupons
     
 
@@ -188,8 +379,36 @@ class CorpBond:
         delta: timedelta = self.maturity_date - modelling_date
         return delta.days
 
-    def gross_redemption_yield(self):
-        pass
+    def gross_redemption_yield(self, valuation_date: date, price: Optional[float] = None, end_date: Optional[date] = None) -> float:
+        """
+        Gross redemption yield of the bond: the annually compounded yield at which the remaining coupons after the
+        valuation date and the notional discount to the price. See yield_analytics. The notional is paid at maturity or,
+        if end_date is given, at the earlier of maturity and end_date as in create_single_maturity, which matches the
+        cash flows used by CorpBondPortfolio.bond_analytics.
+
+        Parameters
+        ----------
+        :type valuation_date: date
+            Date at which the yield is calculated. Flows on the valuation date are considered paid
+        :type price: float
+            Dirty price of the bond. If None, the market price is used
+        :type end_date: date
+            End of the modelling window. If None, the notional is paid at maturity
+
+        Returns
+        -------
+        :rtype float
+            Gross redemption yield, NaN if the bond has no flows after the valuation date or the price is not positive
+        """
+        coupon_dates = self.coupon_schedule(valuation_date)
+        notional_date = self.maturity_date if end_date is None else min(end_date, self.maturity_date)
+        payment_dates = np.append(coupon_dates, np.datetime64(notional_date, "D"))
+        amounts = np.append(np.full(coupon_dates.size, self.coupon_amount()), self.notional_amount)
+        remaining = payment_dates > np.datetime64(valuation_date) # Flows on the valuation date are paid
+        payment_dates, amounts = payment_dates[remaining], amounts[remaining]
+        times = (payment_dates - np.datetime64(valuation_date, "D")).astype(int) / 365.25
+        analytics = yield_analytics(amounts, times, np.array([0, amounts.size]), np.array([self.market_price if price is None else price]))
+        return float(analytics["ytm"][0])
 
     def price_bond(self, coupons: Dict[date, float], notional: Dict[date, float], modelling_date: date, proj_period: int, curves: Curves, spread: float) -> float:
         """
@@ -263,6 +482,15 @@ class CorpBond:
         Implemented by Gregor Fabjan from Qnity Consultants on 09/02/2024.
         """
 
+        if kernels.enabled: # The cash flows and the risk free yields do not depend on the spread, only the compiled loop runs per iteration
+            coupons = self.create_single_cash_flows(modelling_date, end_date)
+            notional = self.create_single_maturity(end_date)
+            date_frac = np.array([(key-modelling_date).days/365.25 for key in list(coupons) + list(notional)])
+            cash_flow = np.array(list(coupons.values()) + list(notional.values()), dtype=float)
+            spread, converged = kernels.bisection_spread(cash_flow, date_frac, np.asarray(curves.RiskFreeYields(proj_period, date_frac)),
+                                                         self.market_price, x_start, x_end, precision, max_iter)
+            return spread if converged else "Did not converge"
+
         dividends = self.create_single_cash_flows(modelling_date, end_date)
         terminal = self.create_single_maturity(end_date)
         y_start = self.price_bond(dividends, terminal, modelling_date, proj_period, curves, x_start) - self.market_price
@@ -293,6 +521,166 @@ class CorpBond:
                     x_end = x_mid
         return "Did not converge"
 
+    def newton_spread(self, modelling_date: date, end_date: date, proj_period: int, curves: Curves, x_start: float = -0.2, x_end: float = 0.2, precision: float = 1e-8, max_iter: int = 50, halley: bool = False, fallback_max_iter: int = 100000) -> SpreadSolution:
+        """
+        Newton (or Halley) root finding algorithm for the spread that when discounting with the risk free curve returns the
+        market price. The price P(s) = sum(cf * (1 + r + s) ** -t) has the analytic derivatives
+        P'(s) = -sum(t * cf * (1 + r + s) ** (-t - 1)) and P''(s) = sum(t * (t + 1) * cf * (1 + r + s) ** (-t - 2)),
+        so each iteration costs one evaluation of the discounted cash flows. If the iteration leaves [x_start, x_end],
+        breaks down or does not converge in max_iter iterations, the spread is found by bisection on [x_start, x_end],
+        with the compiled kernel if the kernels are enabled.
+
+        Parameters
+        ----------
+        :type modelling_date: date
+            Date at which the entire run starts
+        :type end_date: date
+            Date at which the modelling window closes
+        :type proj_period: int
+            Projection step of the curve
+        :type curves: Curves
+            Instance of the Curves class with calibrated term structure
+        :type x_start: float
+            Minimum allowed value of the spread. Ex. -0.2
+        :type x_end: float
+            Maximum allowed value of the spread. Ex. 0.2
+        :type precision: float
+            Precision of the spread
+        :type max_iter: int
+            Maximum number of Newton or Halley iterations
+        :type halley: bool
+            If True, Halley's method with the second derivative is used instead of Newton's method
+        :type fallback_max_iter: int
+            Maximum number of iterations of the bisection fallback
+
+        Returns
+        -------
+        :rtype SpreadSolution
+            Spread and convergence diagnostics
+        """
+        coupons = self.create_single_cash_flows(modelling_date, end_date)
+        notional = self.create_single_maturity(end_date)
+        date_frac = np.array([(key-modelling_date).days/365.25 for key in list(coupons) + list(notional)])
+        cash_flow = np.array(list(coupons.values()) + list(notional.values()), dtype=float)
+        yields = np.asarray(curves.RiskFreeYields(proj_period, date_frac)) # Does not depend on the spread
+        method = "halley" if halley else "newton"
+
+        def price_gap(spread: float) -> float:
+            return float(np.sum(cash_flow * (1 + (yields + spread)) ** (-date_frac)) - self.market_price)
+
+        x = (x_start + x_end) / 2
+        for i_iter in range(1, max_iter + 1):
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                discounted = cash_flow * (1 + (yields + x)) ** (-date_frac)
+                gap = np.sum(discounted) - self.market_price
+                slope = -np.sum(date_frac * discounted / (1 + (yields + x)))
+                if halley:
+                    curvature = np.sum(date_frac * (date_frac + 1) * discounted / (1 + (yields + x)) ** 2)
+                    step = 2 * gap * slope / (2 * slope ** 2 - gap * curvature)
+                else:
+                    step = gap / slope
+            if not np.isfinite(step):
+                break
+            x -= step
+            if x < x_start or x > x_end:
+                break
+            if abs(step) < precision:
+                return SpreadSolution(spread=float(x), converged=True, iterations=i_iter, method=method, price_error=price_gap(x))
+        else:
+            i_iter = max_iter
+
+        # Fallback to bisection on the same cash flows and yields
+        if kernels.enabled:
+            x, converged = kernels.bisection_spread(cash_flow, date_frac, yields, self.market_price, x_start, x_end, precision, fallback_max_iter)
+        else:
+            x, _ = bisection_root(price_gap, x_start, x_end, precision, fallback_max_iter)
+            converged = x is not None
+        if not converged:
+            return SpreadSolution(spread=np.nan, converged=False, iterations=i_iter, method="bisection", price_error=np.nan)
+        y_start = price_gap(x_start)
+        y_end = price_gap(x_end)
+        bracketed = min(abs(y_start), abs(y_end)) < precision or np.sign(y_start) != np.sign(y_end)
+        return SpreadSolution(spread=float(x), converged=bool(bracketed), iterations=i_iter, method="bisection", price_error=price_gap(x))
+
+
+@dataclass(frozen=True)
+class FlatCashFlows:
+    """
+    Remaining cash flows of a bond portfolio in a compressed sparse row layout. The flows of the bond
+    asset_ids[i] are stored at positions offsets[i] to offsets[i+1] of date_frac, amounts and dates.
+    """
+    asset_ids: np.ndarray
+    offsets: np.ndarray
+    date_frac: np.ndarray
+    amounts: np.ndarray
+    dates: Optional[np.ndarray] = None # Payment dates as datetime64[D]
+
+
+@dataclass(frozen=True)
+class InstrumentIndex:
+    """
+    Grouping of bond positions into economically identical instruments, created by CorpBondPortfolio.instrument_index.
+    The position asset_ids[i] holds the instrument represented by the position instrument_ids[position_instrument[i]].
+    """
+    asset_ids: np.ndarray
+    instrument_ids: np.ndarray
+    position_instrument: np.ndarray
+
+    def broadcast(self, instrument_values: np.ndarray) -> np.ndarray:
+        """
+        Expand values calculated once per instrument, in the order of instrument_ids, to all positions.
+        """
+        return np.asarray(instrument_values)[self.position_instrument]
+
+
+class IncrementalBondPricer:
+    def __init__(self, flat_cash_flows: FlatCashFlows) -> None:
+        """
+        Keeps track of the remaining cash flows of a bond portfolio between projection periods. Expired flows are
+        removed once per period and bonds without remaining flows leave the active set, so the cost of repricing
+        scales with the live positions instead of the original book. The year fractions of the flows are measured
+        from the modelling date, which is also the origin of the projected curves, so they are reused as they are.
+
+        Parameters
+        ----------
+        :type flat_cash_flows: FlatCashFlows
+            Cash flows of the whole book at the modelling date, with dates. Created by CorpBondPortfolio.flatten_cash_flows
+        """
+        if flat_cash_flows.dates is None:
+            raise ValueError("The incremental pricer needs the payment dates of the cash flows")
+        self.asset_ids = flat_cash_flows.asset_ids
+        live = np.diff(flat_cash_flows.offsets) > 0
+        self.active_flows = FlatCashFlows(asset_ids=flat_cash_flows.asset_ids[live], offsets=np.append(0, flat_cash_flows.offsets[1:][live]),
+                                          date_frac=flat_cash_flows.date_frac, amounts=flat_cash_flows.amounts, dates=flat_cash_flows.dates)
+
+    def expire(self, expiration_date: date) -> int:
+        """
+        Remove the flows paid on or before expiration_date, as process_expired_cf does with the cash flow DataFrames,
+        and drop the bonds that have no remaining flows.
+
+        Parameters
+        ----------
+        :type expiration_date: date
+            Period-end date
+
+        Returns
+        -------
+        :rtype int
+            Number of bonds dropped from the active set
+        """
+        flows = self.active_flows
+        keep = flows.dates > np.datetime64(expiration_date)
+        if np.all(keep):
+            return 0
+        counts = np.diff(flows.offsets)
+        remaining = np.bincount(np.repeat(np.arange(counts.size), counts)[keep], minlength=counts.size)
+        live = remaining > 0
+        offsets = np.zeros(np.count_nonzero(live) + 1, dtype=int)
+        np.cumsum(remaining[live], out=offsets[1:])
+        self.active_flows = FlatCashFlows(asset_ids=flows.asset_ids[live], offsets=offsets, date_frac=flows.date_frac[keep],
+                                          amounts=flows.amounts[keep], dates=flows.dates[keep])
+        return int(counts.size - np.count_nonzero(live))
+
 
 class CorpBondPortfolio():
     def __init__(self, corporate_bonds: Optional[Dict[int, CorpBond]] = None):
@@ -356,6 +744,60 @@ class CorpBondPortfolio():
                     coupons.update({coupon_date:corp_bond.coupon_amount()})
         return coupons
 
+    def coupon_schedules(self, modelling_date: date) -> Dict[int, np.ndarray]:
+        """
+        Coupon payment dates of all bonds in the portfolio on or after the modelling date as datetime64[D] arrays. Bonds
+        with the same issue date, maturity date and frequency share one memoized schedule.
+
+        Parameters
+        ----------
+        :type modelling_date: datetime.date
+            The earliest date considered
+
+        Returns
+        -------
+        :rtype dict
+            Read-only array of coupon dates for each asset ID
+        """
+        return {asset_id: corp_bond.coupon_schedule(modelling_date) for asset_id, corp_bond in self.corporate_bonds.items()}
+
+    def instrument_index(self, asset_ids: Optional[List[int]] = None) -> InstrumentIndex:
+        """
+        Group the positions of the portfolio by the fields that determine their cash flows, calibrated z-spread and
+        credit adjusted price: issue date, maturity date, frequency, coupon rate, notional amount, market price, recovery
+        rate and default probability. Positions that differ only in asset ID, units or unused fields share one
+        instrument. The first position of each instrument represents it.
+
+        The zspread field is not part of the key, because the spread used for pricing is the one calibrated to the
+        market price, which is a key field. Prices of a deduplicated portfolio are therefore only correct if the spreads
+        passed to price_bond_portfolio come from calibrate_bond_portfolio, as in main.py, and not from the input zspread.
+
+        Parameters
+        ----------
+        :type asset_ids: list of int
+            Positions to group. If None, all positions of the portfolio
+
+        Returns
+        -------
+        :rtype InstrumentIndex
+            Instrument of each position, in the order of asset_ids or of self.corporate_bonds
+        """
+        if asset_ids is None:
+            asset_ids = list(self.corporate_bonds)
+        instruments: Dict[Tuple, int] = {}
+        instrument_ids: List[int] = []
+        position_instrument: List[int] = []
+        for asset_id in asset_ids:
+            corp_bond = self.corporate_bonds[asset_id]
+            key = (corp_bond.issue_date, corp_bond.maturity_date, int(corp_bond.frequency), corp_bond.coupon_rate,
+                   corp_bond.notional_amount, corp_bond.market_price, corp_bond.recovery_rate, corp_bond.default_probability)
+            if key not in instruments:
+                instruments[key] = len(instrument_ids)
+                instrument_ids.append(asset_id)
+            position_instrument.append(instruments[key])
+        return InstrumentIndex(asset_ids=np.array(asset_ids, dtype=int), instrument_ids=np.array(instrument_ids, dtype=int),
+                               position_instrument=np.array(position_instrument, dtype=int))
+
     def create_coupon_flows(self, modelling_date: date, end_date: date) -> Dict[int, Dict[date, float]]:
         """
         Create the list of dictionaries containing dates at which the coupons are paid out and the total amounts for
@@ -499,7 +941,7 @@ class CorpBondPortfolio():
                 maturities.update({corp_bond.maturity_date:corp_bond.notional_amount})
         return maturities
     
-    def price_bond_portfolio(self, coupon_df: pd.DataFrame, notional_df: pd.DataFrame, settings: Settings, proj_period: int, curves: Curves, bond_zspread_df: pd.DataFrame, bond_price_df: pd.DataFrame, date_of_interest: date) -> pd.DataFrame:
+    def price_bond_portfolio(self, coupon_df: pd.DataFrame, notional_df: pd.DataFrame, settings: Settings, proj_period: int, curves: Curves, bond_zspread_df: pd.DataFrame, bond_price_df: pd.DataFrame, date_of_interest: date, pricer: Optional[IncrementalBondPricer] = None, instruments: Optional[InstrumentIndex] = None, credit_adjusted: bool = False) -> pd.DataFrame:
         """
         Prices a portfolio of bonds based on provided data and settings.
 
@@ -521,6 +963,14 @@ class CorpBondPortfolio():
             DataFrame to store bond prices.
         :type date_of_interest: 
             Date of interest for pricing.
+        :type pricer: IncrementalBondPricer
+            Optional incremental pricer holding the remaining cash flows
+        :type instruments: InstrumentIndex
+            Optional grouping of the positions into instruments created by instrument_index
+        :type credit_adjusted: bool
+            If True, the bonds are priced with their default probability and recovery rate by price_flat_cash_flows_credit.
+            bond_zspread_df must then hold residual spreads from calibrate_bond_portfolio(credit_adjusted=True). A spread
+            calibrated without credit adjustment already contains the default risk, which would be counted twice
 
         Returns
         -------
@@ -528,17 +978,497 @@ class CorpBondPortfolio():
             DataFrame containing bond prices updated for the given date_of_interest.
 
         Note: Assumes self.corporate_bonds is a dictionary with keys as asset IDs and values as CorpBond objects.
-        To Do
+        All bonds are priced at once by price_flat_cash_flows. If an IncrementalBondPricer is passed, the flows
+        paid on or before date_of_interest are expired in the pricer, only its active bonds are repriced and the
+        expired bonds get price 0. coupon_df and notional_df are then not used.
+        If instruments is passed, only the representative position of each instrument is priced, with its z-spread,
+        and the price is copied to the other positions. A pricer must then hold the representative positions only.
+        The instrument key does not contain the z-spread, so bond_zspread_df must come from calibrate_bond_portfolio,
+        which gives all positions of an instrument the same spread.
         """
-        for asset_id in coupon_df.index:
-            price = self.corporate_bonds[asset_id].price_bond(coupon_df.loc[asset_id],
-            notional_df.loc[asset_id],settings.modelling_date, proj_period,curves,bond_zspread_df.loc[asset_id].iloc[0])
-            bond_price_df.loc[asset_id, date_of_interest] = price
+        if pricer is not None:
+            pricer.expire(date_of_interest)
+            flat_cash_flows = pricer.active_flows
+            priced_ids = pricer.asset_ids
+        else:
+            if instruments is not None:
+                coupon_df = coupon_df.loc[instruments.instrument_ids]
+                notional_df = notional_df.loc[instruments.instrument_ids]
+            flat_cash_flows = self.flatten_cash_flows(coupon_df, notional_df, settings.modelling_date)
+            priced_ids = flat_cash_flows.asset_ids
+        spreads = bond_zspread_df.loc[flat_cash_flows.asset_ids].iloc[:, 0].to_numpy(dtype=float)
+        prices = pd.Series(data=0., index=priced_ids) # Bonds without remaining flows have price 0
+        if credit_adjusted:
+            bonds = [self.corporate_bonds[asset_id] for asset_id in flat_cash_flows.asset_ids]
+            prices.loc[flat_cash_flows.asset_ids] = self.price_flat_cash_flows_credit(
+                flat_cash_flows, spreads, proj_period, curves, np.array([bond.default_probability for bond in bonds]),
+                np.array([bond.recovery_rate for bond in bonds]), np.array([bond.notional_amount for bond in bonds]),
+                (date_of_interest - settings.modelling_date).days/365.25)
+        else:
+            prices.loc[flat_cash_flows.asset_ids] = self.price_flat_cash_flows(flat_cash_flows, spreads, proj_period, curves)
+
+        if instruments is not None:
+            bond_price_df.loc[instruments.asset_ids, date_of_interest] = instruments.broadcast(prices.loc[instruments.instrument_ids].to_numpy())
+        else:
+            bond_price_df.loc[prices.index, date_of_interest] = prices.to_numpy()
         return bond_price_df
-    
-    def calibrate_bond_portfolio(self, zspread_df: pd.DataFrame, settings: Settings, proj_period: int, curves: Curves) -> pd.DataFrame:
+
+    def flatten_cash_flows(self, coupon_df: pd.DataFrame, notional_df: pd.DataFrame, modelling_date: date) -> FlatCashFlows:
         """
-        Calibrate z-spreads for all corporate bonds in the portfolio using bisection.
+        Flatten the coupon and notional cash flow matrices into a compressed sparse row layout. Only non zero
+        flows are kept. The flows of each bond are its coupons followed by its notional repayments, in date order.
+
+        Parameters
+        ----------
+        :type coupon_df (DataFrame):
+            DataFrame containing the coupon cash flows of each bond. Columns are cash flow dates
+        :type notional_df (DataFrame):
+            DataFrame containing the notional repayments of each bond. Columns are cash flow dates
+        :type modelling_date: date
+            Date from which the year fractions of the cash flows are measured
+
+        Returns
+        -------
+        :rtype FlatCashFlows
+            Asset ids (the index of coupon_df), offsets, year fractions and amounts of the remaining cash flows
+        """
+        asset_ids = coupon_df.index.to_numpy()
+        cash_flows = np.hstack([coupon_df.to_numpy(dtype=float), notional_df.reindex(coupon_df.index).fillna(0.).to_numpy(dtype=float)])
+        date_frac = np.array([(cash_flow_date-modelling_date).days/365.25 for cash_flow_date in list(coupon_df.columns) + list(notional_df.columns)])
+
+        dates = np.array(list(coupon_df.columns) + list(notional_df.columns), dtype="datetime64[D]")
+
+        rows, columns = np.nonzero(cash_flows) # Row major order, so the flows of each bond are contiguous
+        offsets = np.zeros(asset_ids.size + 1, dtype=int)
+        np.cumsum(np.bincount(rows, minlength=asset_ids.size), out=offsets[1:])
+        return FlatCashFlows(asset_ids=asset_ids, offsets=offsets, date_frac=date_frac[columns], amounts=cash_flows[rows, columns], dates=dates[columns])
+
+    @staticmethod
+    def price_flat_cash_flows(flat_cash_flows: FlatCashFlows, spreads: np.ndarray, proj_period: int, curves: Curves) -> np.ndarray:
+        """
+        Price all bonds of a flattened cash flow layout. The risk free curve is evaluated once on the unique
+        cash flow times, each flow is discounted with the spread of its bond and the discounted flows are summed
+        per bond with np.add.reduceat.
+
+        Parameters
+        ----------
+        :type flat_cash_flows: FlatCashFlows
+            Remaining cash flows created by flatten_cash_flows
+        :type spreads: np.ndarray
+            Spread over the risk free curve of each bond, in the order of flat_cash_flows.asset_ids
+        :type proj_period (int):
+            Projection period for pricing.
+        :type curves:
+            Curves data required for pricing.
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Price of each bond. Bonds without remaining cash flows have price 0
+        """
+        prices = np.zeros(flat_cash_flows.asset_ids.size)
+        if flat_cash_flows.amounts.size == 0:
+            return prices
+
+        unique_frac, position = np.unique(flat_cash_flows.date_frac, return_inverse=True)
+        yields = curves.RiskFreeYields(proj_period, unique_frac)[position]
+        counts = np.diff(flat_cash_flows.offsets)
+        discount = (1 + (yields + np.repeat(spreads, counts))) ** (-flat_cash_flows.date_frac)
+
+        has_flows = counts > 0 # np.add.reduceat does not return 0 for empty segments
+        prices[has_flows] = np.add.reduceat(flat_cash_flows.amounts * discount, flat_cash_flows.offsets[:-1][has_flows])
+        return prices
+
+    @staticmethod
+    def price_flat_cash_flows_credit(flat_cash_flows: FlatCashFlows, spreads: np.ndarray, proj_period: int, curves: Curves, default_probability: np.ndarray, recovery_rate: np.ndarray, notional: np.ndarray, valuation_frac: float = 0.) -> np.ndarray:
+        """
+        Credit adjusted price of all bonds of a flattened cash flow layout. Each bond defaults with the constant hazard
+        rate lambda = -ln(1 - default_probability), so the probability to survive from the valuation time to time t is
+        S(t) = exp(-lambda * (t - valuation_frac)) = (1 - default_probability) ** (t - valuation_frac). The price is the
+        sum of two legs:
+            - the promised cash flows weighted by the survival probability at their payment time
+            - the recovery recovery_rate * notional, paid at the end of the period between two cash flows in which the bond defaults
+        Both legs are discounted with the risk free curve plus the spread of the bond, with the same single curve call as
+        price_flat_cash_flows. Use a spread of 0 to price with the default risk only.
+
+        Parameters
+        ----------
+        :type flat_cash_flows: FlatCashFlows
+            Remaining cash flows created by flatten_cash_flows
+        :type spreads: np.ndarray
+            Spread over the risk free curve of each bond, in the order of flat_cash_flows.asset_ids
+        :type proj_period (int):
+            Projection period for pricing.
+        :type curves:
+            Curves data required for pricing.
+        :type default_probability: np.ndarray
+            One year probability of default of each bond
+        :type recovery_rate: np.ndarray
+            Share of the notional recovered at default of each bond
+        :type notional: np.ndarray
+            Notional amount of each bond
+        :type valuation_frac: float
+            Time of the valuation in years from the modelling date. Default probabilities are conditional on survival until then
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Credit adjusted price of each bond. Bonds without remaining cash flows have price 0
+        """
+        prices = np.zeros(flat_cash_flows.asset_ids.size)
+        if flat_cash_flows.amounts.size == 0:
+            return prices
+
+        unique_frac, position = np.unique(flat_cash_flows.date_frac, return_inverse=True)
+        yields = curves.RiskFreeYields(proj_period, unique_frac)[position]
+        counts = np.diff(flat_cash_flows.offsets)
+        has_flows = counts > 0
+        first_flow = flat_cash_flows.offsets[:-1][has_flows]
+
+        # The flatteners store the coupons of a bond before its notional, which is paid earlier than the last coupons if
+        # the bond matures after the end date. The default periods need the flows of each bond in date order
+        order = np.lexsort((flat_cash_flows.date_frac, np.repeat(np.arange(counts.size), counts)))
+        date_frac = flat_cash_flows.date_frac[order]
+        amounts = flat_cash_flows.amounts[order]
+        discount = (1 + (yields[order] + np.repeat(spreads, counts))) ** (-date_frac)
+
+        # Start of the default period of each flow is the previous flow of the same bond, or the valuation time for the first flow
+        period_start = np.empty_like(date_frac)
+        period_start[1:] = date_frac[:-1]
+        period_start[first_flow] = valuation_frac
+        survival_rate = 1 - np.repeat(np.asarray(default_probability, dtype=float), counts)
+        survival_end = survival_rate ** np.maximum(date_frac - valuation_frac, 0.)
+        survival_start = survival_rate ** np.maximum(period_start - valuation_frac, 0.)
+
+        promised_leg = amounts * survival_end
+        recovery_leg = np.repeat(np.asarray(recovery_rate, dtype=float) * np.asarray(notional, dtype=float), counts) * (survival_start - survival_end)
+        prices[has_flows] = np.add.reduceat((promised_leg + recovery_leg) * discount, first_flow)
+        return prices
+
+    def flatten_flow_profiles(self, coupon_flows: Dict[int, Dict[date, float]], notional_flows: Dict[int, Dict[date, float]], modelling_date: date) -> FlatCashFlows:
+        """
+        Flatten the coupon and notional flows created by create_coupon_flows and create_maturity_flows into a
+        compressed sparse row layout, without building the cash flow DataFrames. The bonds are in the order of coupon_flows.
+
+        Parameters
+        ----------
+        :type coupon_flows: dict
+            Dictionary of dictionaries with the coupon dates and amounts of each bond
+        :type notional_flows: dict
+            Dictionary of dictionaries with the notional repayment dates and amounts of each bond
+        :type modelling_date: date
+            Date from which the year fractions of the cash flows are measured
+
+        Returns
+        -------
+        :rtype FlatCashFlows
+            Asset ids, offsets, year fractions and amounts of the cash flows
+        """
+        asset_ids = np.array(list(coupon_flows))
+        dates: List[date] = []
+        amounts: List[float] = []
+        offsets = np.zeros(asset_ids.size + 1, dtype=int)
+        for i, asset_id in enumerate(asset_ids):
+            for flows in (coupon_flows[asset_id], notional_flows.get(asset_id, {})):
+                dates.extend(flows.keys())
+                amounts.extend(flows.values())
+            offsets[i+1] = len(amounts)
+        date_frac = np.array([(cash_flow_date-modelling_date).days/365.25 for cash_flow_date in dates], dtype=float)
+        return FlatCashFlows(asset_ids=asset_ids, offsets=offsets, date_frac=date_frac, amounts=np.array(amounts, dtype=float),
+                             dates=np.array(dates, dtype="datetime64[D]"))
+
+    @staticmethod
+    def solve_spreads(flat_cash_flows: FlatCashFlows, market_prices: np.ndarray, proj_period: int, curves: Curves, method: str = "bisection", x_start: float = -0.2, x_end: float = 0.2, precision: float = 1e-8, max_iter: int = 100000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the spreads over the risk free curve that reproduce the market prices of all bonds at once. The
+        risk free yields are evaluated once and every iteration reprices all bonds that have not converged yet in one
+        vectorized step.
+
+        Parameters
+        ----------
+        :type flat_cash_flows: FlatCashFlows
+            Cash flows of the bonds created by flatten_cash_flows or flatten_flow_profiles
+        :type market_prices: np.ndarray
+            Market price of each bond, in the order of flat_cash_flows.asset_ids
+        :type proj_period: int
+            Projection period of the curve
+        :type curves: Curves
+            Instance of the Curves class with calibrated term structure
+        :type method: str
+            "bisection" applies the algorithm of CorpBond.bisection_spread on [x_start, x_end] to every bond.
+            "newton" and "halley" start in the middle of [x_start, x_end] and use the analytic derivatives of the price
+            with respect to the spread, see CorpBond.newton_spread. Bonds for which they fail are solved by bisection
+        :type x_start: float
+            Minimum allowed value of the spread
+        :type x_end: float
+            Maximum allowed value of the spread
+        :type precision: float
+            Precision of the spread (both methods) and of the price (bisection end points)
+        :type max_iter: int
+            Maximum number of iterations
+
+        Returns
+        -------
+        :rtype tuple
+            Array of spreads and boolean array that is True for the bonds that converged. Spreads of the bonds
+            that did not converge are NaN, except for bisection on a bond without a root in [x_start, x_end], which
+            returns the end point reached, as CorpBond.bisection_spread does
+        """
+        if method not in ("bisection", "newton", "halley"):
+            raise ValueError("method must be either bisection, newton or halley")
+
+        market_prices = np.asarray(market_prices, dtype=float)
+        n_bonds = flat_cash_flows.asset_ids.size
+        spreads = np.full(n_bonds, np.nan)
+        converged = np.zeros(n_bonds, dtype=bool)
+        if n_bonds == 0:
+            return spreads, converged
+
+        # The spread does not change the risk free yields, so they are retrieved only once
+        if flat_cash_flows.amounts.size > 0:
+            unique_frac, position = np.unique(flat_cash_flows.date_frac, return_inverse=True)
+            yields = curves.RiskFreeYields(proj_period, unique_frac)[position]
+        else:
+            yields = np.zeros(0)
+        counts = np.diff(flat_cash_flows.offsets)
+        has_flows = counts > 0
+
+        def bond_sum(values: np.ndarray) -> np.ndarray: # Sum of the values of each bond, 0 for bonds without flows
+            total = np.zeros(n_bonds)
+            if values.size > 0:
+                total[has_flows] = np.add.reduceat(values, flat_cash_flows.offsets[:-1][has_flows])
+            return total
+
+        def price_gap(x: np.ndarray) -> np.ndarray:
+            discount = (1 + (yields + np.repeat(x, counts))) ** (-flat_cash_flows.date_frac)
+            return bond_sum(flat_cash_flows.amounts * discount) - market_prices
+
+        if method == "bisection":
+            spreads, converged = CorpBondPortfolio._bisect_spreads(price_gap, n_bonds, x_start, x_end, precision, max_iter)
+        else:
+            x = np.full(n_bonds, (x_start + x_end) / 2)
+            active = np.ones(n_bonds, dtype=bool)
+            i_iter = 0
+            while i_iter < max_iter and np.any(active):
+                with np.errstate(divide="ignore", invalid="ignore", over="ignore"): # Diverging bonds are removed below
+                    base = 1 + (yields + np.repeat(x, counts))
+                    gap = bond_sum(flat_cash_flows.amounts * base ** (-flat_cash_flows.date_frac)) - market_prices
+                    slope = bond_sum(-flat_cash_flows.date_frac * flat_cash_flows.amounts * base ** (-flat_cash_flows.date_frac - 1))
+                    if method == "halley":
+                        curvature = bond_sum(flat_cash_flows.date_frac * (flat_cash_flows.date_frac + 1) * flat_cash_flows.amounts * base ** (-flat_cash_flows.date_frac - 2))
+                        step = np.where(active, 2 * gap * slope / (2 * slope ** 2 - gap * curvature), 0.)
+                    else:
+                        step = np.where(active, gap / slope, 0.)
+                invalid = active & ~np.isfinite(step)
+                active &= ~invalid
+                x = np.where(active, x - step, x)
+                done = active & (np.abs(step) < precision)
+                converged |= done
+                active &= ~done
+                i_iter += 1
+            converged &= (x >= x_start) & (x <= x_end)
+            spreads[converged] = x[converged]
+
+            failed = ~converged
+            if np.any(failed): # Bisection fallback on the bonds for which the iteration failed
+                flow_mask = np.repeat(failed, counts)
+                failed_offsets = np.zeros(np.count_nonzero(failed) + 1, dtype=int)
+                np.cumsum(counts[failed], out=failed_offsets[1:])
+                failed_flows = FlatCashFlows(asset_ids=flat_cash_flows.asset_ids[failed], offsets=failed_offsets,
+                                             date_frac=flat_cash_flows.date_frac[flow_mask], amounts=flat_cash_flows.amounts[flow_mask])
+                spreads[failed], converged[failed] = CorpBondPortfolio.solve_spreads(failed_flows, market_prices[failed], proj_period, curves, "bisection",
+                                                                                     x_start, x_end, precision, max_iter)
+        return spreads, converged
+
+    @staticmethod
+    def _bisect_spreads(price_gap: Callable[[np.ndarray], np.ndarray], n_bonds: int, x_start: float, x_end: float, precision: float, max_iter: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Algorithm of CorpBond.bisection_spread applied to all bonds at once. price_gap maps the spreads of all bonds to
+        # their model minus market prices
+        spreads = np.full(n_bonds, np.nan)
+        x_low = np.full(n_bonds, float(x_start))
+        x_high = np.full(n_bonds, float(x_end))
+        y_start = price_gap(x_low)
+        y_end = price_gap(x_high)
+
+        at_end = np.abs(y_end) < precision
+        spreads[at_end] = x_end
+        at_start = np.abs(y_start) < precision
+        spreads[at_start] = x_start # The start point has priority, as in CorpBond.bisection_spread
+        converged = at_start | at_end
+        # Bonds whose price gap has the same sign at both end points have no root in [x_start, x_end]. As in
+        # CorpBond.bisection_spread they are bisected towards an end point, but they are not marked as converged
+        bracketed = np.sign(y_start) != np.sign(y_end)
+
+        active = ~converged
+        i_iter = 0
+        while i_iter <= max_iter and np.any(active):
+            x_mid = (x_high + x_low) / 2
+            y_mid = price_gap(x_mid)
+            done = active & ((y_mid == 0) | ((x_high - x_low) / 2 < precision))
+            spreads[done] = x_mid[done]
+            converged |= done & bracketed
+            active &= ~done
+            i_iter += 1
+            same_sign = np.sign(y_mid) == np.sign(y_start)
+            x_low = np.where(active & same_sign, x_mid, x_low)
+            x_high = np.where(active & ~same_sign, x_mid, x_high)
+        return spreads, converged
+
+    @staticmethod
+    def solve_credit_spreads(flat_cash_flows: FlatCashFlows, market_prices: np.ndarray, proj_period: int, curves: Curves, default_probability: np.ndarray, recovery_rate: np.ndarray, notional: np.ndarray, x_start: float = -0.2, x_end: float = 0.2, precision: float = 1e-8, max_iter: int = 100000) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the residual spreads that reproduce the market prices of all bonds with the credit adjusted prices of
+        price_flat_cash_flows_credit. The default risk is priced by the hazard rate, so the spread only covers the part
+        of the market price that the default probability and recovery rate do not explain. All bonds are bisected at once
+        as in solve_spreads.
+
+        Parameters
+        ----------
+        :type flat_cash_flows: FlatCashFlows
+            Cash flows of the bonds created by flatten_cash_flows or flatten_flow_profiles
+        :type market_prices: np.ndarray
+            Market price of each bond, in the order of flat_cash_flows.asset_ids
+        :type proj_period: int
+            Projection period of the curve
+        :type curves: Curves
+            Instance of the Curves class with calibrated term structure
+        :type default_probability: np.ndarray
+            One year probability of default of each bond
+        :type recovery_rate: np.ndarray
+            Share of the notional recovered at default of each bond
+        :type notional: np.ndarray
+            Notional amount of each bond
+        :type x_start: float
+            Minimum allowed value of the spread
+        :type x_end: float
+            Maximum allowed value of the spread
+        :type precision: float
+            Precision of the spread and of the price at the end points
+        :type max_iter: int
+            Maximum number of iterations
+
+        Returns
+        -------
+        :rtype tuple
+            Array of spreads and boolean array that is True for the bonds that converged, as in solve_spreads
+        """
+        market_prices = np.asarray(market_prices, dtype=float)
+
+        def price_gap(x: np.ndarray) -> np.ndarray:
+            return CorpBondPortfolio.price_flat_cash_flows_credit(flat_cash_flows, x, proj_period, curves, default_probability, recovery_rate, notional) - market_prices
+
+        return CorpBondPortfolio._bisect_spreads(price_gap, flat_cash_flows.asset_ids.size, x_start, x_end, precision, max_iter)
+
+    def key_rate_sensitivities(self, coupon_df: pd.DataFrame, notional_df: pd.DataFrame, settings: Settings, proj_period: int, curves: Curves, bond_zspread_df: pd.DataFrame, bump: float = 0.0001) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Key rate PV01 and key rate durations of all bonds in the portfolio with respect to the liquid yields of a
+        projection year. All bonds and key rates are evaluated in one batch by Curves.KeyRateSensitivities.
+
+        Parameters
+        ----------
+        :type coupon_df (DataFrame):
+            DataFrame containing the coupon cash flows of each bond. Columns are cash flow dates
+        :type notional_df (DataFrame):
+            DataFrame containing the notional repayments of each bond. Columns are cash flow dates
+        :type settings:
+            Settings object containing modeling date.
+        :type proj_period (int):
+            Projection period of the curve.
+        :type curves:
+            Curves data required for pricing.
+        :type bond_zspread_df (DataFrame):
+            DataFrame containing bond z-spreads for each bond.
+        :type bump: float
+            Size of the bump of the liquid yields. Ex. 0.0001 (1 basis point)
+
+        Returns
+        -------
+        :rtype tuple
+            Two DataFrames with bonds as rows and the liquid maturities of the projection year as columns. The first
+            contains the change of the bond price for an increase of the key rate by bump, the second the key rate durations
+        """
+        cash_flows = pd.concat([coupon_df, notional_df], axis=1).fillna(0.)
+        date_frac = np.array([(cash_flow_date - settings.modelling_date).days/365.25 for cash_flow_date in cash_flows.columns])
+        spreads = bond_zspread_df.loc[cash_flows.index].iloc[:, 0].to_numpy(dtype=float)
+        pv01, krd = curves.KeyRateSensitivities(proj_period, date_frac, cash_flows.to_numpy(dtype=float), spreads, bump)
+
+        key_rates = curves.m_obs_array[proj_period, :curves.n_liquid[proj_period]]
+        return pd.DataFrame(data=pv01, index=cash_flows.index, columns=key_rates), pd.DataFrame(data=krd, index=cash_flows.index, columns=key_rates)
+
+    def bond_analytics(self, flat_cash_flows: FlatCashFlows, bond_price_df: pd.DataFrame, precision: float = 1e-10, max_iter: int = 100) -> Dict[str, pd.DataFrame]:
+        """
+        Yield to maturity, Macaulay duration, modified duration, convexity and accrued interest of all bonds at each
+        projection date. For each date the flows paid after it are selected from the flattened cash flows and all bonds
+        are solved together by yield_analytics. The accrued interest is the coupon times the elapsed part of the
+        current coupon period, found by a search over the concatenated coupon schedules of all bonds.
+
+        Parameters
+        ----------
+        :type flat_cash_flows: FlatCashFlows
+            Cash flows of the bonds at the modelling date, with dates. Created by flatten_cash_flows
+        :type bond_price_df (DataFrame):
+            DataFrame of bond prices with asset IDs as rows and projection dates as columns. Ex. the bond price
+            DataFrame of the main loop. The prices are treated as dirty prices
+        :type precision: float
+            Precision of the yields
+        :type max_iter: int
+            Maximum number of Newton iterations per projection date
+
+        Returns
+        -------
+        :rtype dict
+            DataFrames "ytm", "macaulay_duration", "modified_duration", "convexity" and "accrued_interest", each with
+            the asset IDs of flat_cash_flows as rows and the columns of bond_price_df as columns
+        """
+        if flat_cash_flows.dates is None:
+            raise ValueError("The bond analytics need the payment dates of the cash flows")
+        asset_ids = flat_cash_flows.asset_ids
+        n_bonds = asset_ids.size
+        periods = list(bond_price_df.columns)
+        results = {name: np.full((n_bonds, len(periods)), np.nan) for name in ("ytm", "macaulay_duration", "modified_duration", "convexity", "accrued_interest")}
+
+        bonds = [self.corporate_bonds[asset_id] for asset_id in asset_ids]
+        issue_dates = np.array([corp_bond.issue_date for corp_bond in bonds], dtype="datetime64[D]")
+        maturity_dates = np.array([corp_bond.maturity_date for corp_bond in bonds], dtype="datetime64[D]")
+        coupons = np.array([corp_bond.coupon_amount() for corp_bond in bonds], dtype=float)
+        if n_bonds > 0:
+            schedule, schedule_counts = coupon_schedules(issue_dates, maturity_dates, np.array([int(corp_bond.frequency) for corp_bond in bonds]), issue_dates.min().item())
+        else:
+            schedule, schedule_counts = np.zeros(0, dtype="datetime64[D]"), np.zeros(0, dtype=int)
+        schedule_start = np.cumsum(schedule_counts) - schedule_counts
+        schedule_days = schedule.astype(np.int64)
+        span = int(schedule_days.max() - schedule_days.min()) + 2 if schedule.size > 0 else 1
+        base = schedule_days.min() if schedule.size > 0 else 0
+        # Days shifted by bond, so that one search over the concatenated schedules stays within the schedule of each bond
+        schedule_keys = np.repeat(np.arange(n_bonds), schedule_counts) * span + (schedule_days - base)
+
+        flow_bond = np.repeat(np.arange(n_bonds), np.diff(flat_cash_flows.offsets))
+        for period, valuation_date in enumerate(periods):
+            valuation_day = np.datetime64(valuation_date, "D")
+            keep = flat_cash_flows.dates > valuation_day
+            counts = np.bincount(flow_bond[keep], minlength=n_bonds)
+            offsets = np.zeros(n_bonds + 1, dtype=int)
+            np.cumsum(counts, out=offsets[1:])
+            times = (flat_cash_flows.dates[keep] - valuation_day).astype(int) / 365.25
+            prices = bond_price_df[valuation_date].reindex(asset_ids).to_numpy(dtype=float)
+            for name, values in yield_analytics(flat_cash_flows.amounts[keep], times, offsets, prices, precision, max_iter).items():
+                results[name][:, period] = values
+
+            # Position of the first coupon date after the valuation date in the schedule of each bond
+            day = np.clip(valuation_day.astype(np.int64) - base, -1, span - 1)
+            next_coupon = np.searchsorted(schedule_keys, np.arange(n_bonds) * span + day, side="right")
+            in_period = (next_coupon > schedule_start) & (next_coupon < schedule_start + schedule_counts)
+            previous_day = schedule_days[np.where(in_period, next_coupon - 1, 0)] if schedule.size > 0 else np.zeros(n_bonds)
+            next_day = schedule_days[np.where(in_period, next_coupon, 0)] if schedule.size > 0 else np.ones(n_bonds)
+            elapsed = (valuation_day.astype(np.int64) - previous_day) / np.maximum(next_day - previous_day, 1)
+            results["accrued_interest"][:, period] = np.where(in_period, coupons * elapsed, 0.)
+
+        return {name: pd.DataFrame(data=values, index=asset_ids, columns=periods) for name, values in results.items()}
+
+    def calibrate_bond_portfolio(self, zspread_df: pd.DataFrame, settings: Settings, proj_period: int, curves: Curves, method: str = "bisection", credit_adjusted: bool = False, sector_spreads: Optional[SectorSpreadIndex] = None) -> pd.DataFrame:
+        """
+        Calibrate z-spreads for all corporate bonds in the portfolio. All bonds are calibrated at once by solve_spreads.
+        Each instrument of instrument_index is calibrated once and its spread is assigned to all of its positions.
 
         Parameters
         ----------
@@ -547,22 +1477,293 @@ class CorpBondPortfolio():
         settings: Settings object with modelling dates and end date
         proj_period: projection period index for curve retrieval
         curves: Curves object with calibrated term structure
+        method: "bisection" or "newton", see solve_spreads
+        credit_adjusted: if True, the residual spreads over the credit adjusted prices are solved by solve_credit_spreads.
+            Spreads for price_bond_portfolio(credit_adjusted=True) must be calibrated this way, otherwise the default
+            risk is counted twice. Only bisection is available for the credit adjusted spreads
+        sector_spreads: optional index of the sector spreads. Bonds whose spread did not converge, ex. because the market
+            price cannot be reached with a spread in [-0.2, 0.2], get the sector spread of their NACE code instead of the
+            end point of the search. Bonds without a sector spread on any level of their NACE code keep the solver result
 
         Returns
         -------
         pd.DataFrame
-            Updated z-spread DataFrame with calibrated spreads
-        """
-        for asset_id in zspread_df.index:
-            calibrated_spread = self.corporate_bonds[asset_id].bisection_spread(
-                x_start=-0.2,
-                x_end=0.2,
-                modelling_date=settings.modelling_date,
-                end_date=settings.end_date,
-                proj_period=proj_period,
-                curves=curves,
-                precision=1e-8,
-                max_iter=100000,
-            )
-            zspread_df.loc[asset_id, settings.modelling_date] = calibrated_spread
+            Updated z-spread DataFrame with calibrated spreads. Bonds that did not converge get NaN
+        """
+        if credit_adjusted and method != "bisection":
+            raise ValueError("Credit adjusted spreads are only solved by bisection")
+        instruments = self.instrument_index(list(zspread_df.index))
+        coupon_flows = {asset_id: self.corporate_bonds[asset_id].create_single_cash_flows(settings.modelling_date, settings.end_date) for asset_id in instruments.instrument_ids}
+        notional_flows = {asset_id: self.corporate_bonds[asset_id].create_single_maturity(settings.end_date) for asset_id in instruments.instrument_ids}
+        flat_cash_flows = self.flatten_flow_profiles(coupon_flows, notional_flows, settings.modelling_date)
+        market_prices = np.array([self.corporate_bonds[asset_id].market_price for asset_id in instruments.instrument_ids], dtype=float)
+
+        if credit_adjusted:
+            bonds = [self.corporate_bonds[asset_id] for asset_id in instruments.instrument_ids]
+            spreads, converged = self.solve_credit_spreads(flat_cash_flows, market_prices, proj_period, curves, np.array([bond.default_probability for bond in bonds]),
+                                                           np.array([bond.recovery_rate for bond in bonds]), np.array([bond.notional_amount for bond in bonds]))
+        else:
+            spreads, converged = self.solve_spreads(flat_cash_flows, market_prices, proj_period, curves, method=method,
+                                                    x_start=-0.2, x_end=0.2, precision=1e-8, max_iter=100000)
+        if sector_spreads is not None and not np.all(converged):
+            fallback = sector_spreads.lookup([self.corporate_bonds[asset_id].nace for asset_id in instruments.instrument_ids])
+            spreads = np.where(~converged & ~np.isnan(fallback), fallback, spreads)
+        zspread_df.loc[instruments.asset_ids, settings.modelling_date] = instruments.broadcast(spreads)
         return zspread_df
+
+
+@dataclass(frozen=True)
+class BondBook:
+    """
+    Struct of arrays representation of a corporate bond portfolio. Each field is a NumPy array with one element per
+    position, so that portfolios of hundreds of thousands of bonds can be validated, flattened into cash flows,
+    calibrated and priced without creating a CorpBond object per position. Dates are datetime64[D] arrays and
+    frequency holds the number of coupons per year. The checks of CorpBond.__post_init__ are applied to all positions
+    at once when the book is created.
+    """
+    asset_id: np.ndarray
+    nace: np.ndarray
+    issue_date: np.ndarray
+    maturity_date: np.ndarray
+    coupon_rate: np.ndarray
+    notional_amount: np.ndarray
+    spread_country: np.ndarray
+    spread_sector: np.ndarray
+    zspread: np.ndarray
+    spread_stress: np.ndarray
+    frequency: np.ndarray
+    recovery_rate: np.ndarray
+    default_probability: np.ndarray
+    units: np.ndarray
+    market_price: np.ndarray
+
+    def __post_init__(self) -> None:
+        n_bonds = self.asset_id.size
+        for name in self.__dataclass_fields__:
+            if getattr(self, name).shape != (n_bonds,):
+                raise ValueError("All columns of the bond book must be vectors of the same length")
+
+        def check(invalid: np.ndarray, message: str) -> None:
+            if np.any(invalid):
+                raise ValueError(message + " (Asset_ID: " + ", ".join(str(asset_id) for asset_id in self.asset_id[invalid][:10]) + ")")
+
+        check(self.asset_id <= 0, "Asset ID must be greater than 0")
+        if np.unique(self.asset_id).size != n_bonds:
+            raise ValueError("Asset IDs must be unique")
+        check(self.coupon_rate < 0, "Coupon rate cannot be negative")
+        check(self.coupon_rate > 1, "Coupon rate cannot be greater than 1")
+        check(self.recovery_rate < 0, "Recovery rate cannot be negative")
+        check(self.recovery_rate > 1, "Recovery rate cannot be greater than 1")
+        check(self.default_probability < 0, "Default probability cannot be negative")
+        check(self.default_probability > 1, "Default probability cannot be greater than 1")
+        check(self.market_price < 0, "Market price cannot be negative")
+        check(~np.isin(self.frequency, [int(frequency) for frequency in Frequency]), "Frequency must be either Monthly, Quarterly,Triannual, SemiAnnual or Annual")
+        check(self.notional_amount <= 0, "Notional amount must be greater than 0")
+        check(self.maturity_date <= self.issue_date, "Maturity date cannot be before issue date")
+
+    def __len__(self) -> int:
+        return self.asset_id.size
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "BondBook":
+        """
+        Create a bond book from a dictionary of columns, converting each column to the dtype of the book.
+
+        Parameters
+        ----------
+        :type columns: dict
+            Sequence of values for each field of BondBook. Dates can be date objects, strings in ISO format or datetime64
+
+        Returns
+        -------
+        :rtype BondBook
+        """
+        dtypes = {"asset_id": int, "nace": object, "issue_date": "datetime64[D]", "maturity_date": "datetime64[D]", "frequency": int}
+        return cls(**{name: np.asarray(columns[name], dtype=dtypes.get(name, float)) for name in cls.__dataclass_fields__})
+
+    @classmethod
+    def from_portfolio(cls, portfolio: CorpBondPortfolio) -> "BondBook":
+        """
+        Create a bond book with the positions of a CorpBondPortfolio, in the order of portfolio.corporate_bonds.
+        """
+        bonds = list(portfolio.corporate_bonds.values())
+        return cls.from_columns({name: [getattr(bond, name) for bond in bonds] for name in cls.__dataclass_fields__})
+
+    def to_portfolio(self) -> CorpBondPortfolio:
+        """
+        Create a CorpBondPortfolio with one CorpBond per position of the book. The issuer is not stored in the book and is set to None.
+        """
+        portfolio = CorpBondPortfolio()
+        for i in range(len(self)):
+            portfolio.add(CorpBond(asset_id=int(self.asset_id[i]), nace=self.nace[i], issuer=None, issue_date=self.issue_date[i].item(),
+                                   maturity_date=self.maturity_date[i].item(), coupon_rate=float(self.coupon_rate[i]),
+                                   notional_amount=float(self.notional_amount[i]), spread_country=float(self.spread_country[i]),
+                                   spread_sector=float(self.spread_sector[i]), zspread=float(self.zspread[i]),
+                                   spread_stress=float(self.spread_stress[i]), frequency=Frequency(int(self.frequency[i])),
+                                   recovery_rate=float(self.recovery_rate[i]), default_probability=float(self.default_probability[i]),
+                                   units=float(self.units[i]), market_price=float(self.market_price[i])))
+        return portfolio
+
+    def to_dataframes(self, modelling_date: date) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Market price, z-spread and units of each position as DataFrames with the modelling date as the only column,
+        as created by CorpBondPortfolio.init_bond_portfolio_to_dataframe.
+        """
+        return tuple(pd.DataFrame(data=values, index=self.asset_id, columns=[modelling_date]) for values in (self.market_price, self.zspread, self.units))
+
+    def instrument_index(self) -> InstrumentIndex:
+        """
+        Group the positions into economically identical instruments with the fields of CorpBondPortfolio.instrument_index.
+        The first position of each instrument represents it.
+        """
+        def float_key(values: np.ndarray) -> np.ndarray: # Bit pattern of the floats. Adding 0. turns -0. into 0., which compare equal
+            return (values + 0.).view(np.int64)
+
+        keys = np.column_stack([self.issue_date.astype(np.int64), self.maturity_date.astype(np.int64), self.frequency,
+                                float_key(self.coupon_rate), float_key(self.notional_amount), float_key(self.market_price),
+                                float_key(self.recovery_rate), float_key(self.default_probability)])
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first) # Number the instruments in the order of their first position
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size)
+        return InstrumentIndex(asset_ids=self.asset_id, instrument_ids=self.asset_id[first[order]], position_instrument=rank[inverse.ravel()])
+
+    def flatten_cash_flows(self, modelling_date: date, end_date: date) -> FlatCashFlows:
+        """
+        Coupon and notional flows of all positions in a compressed sparse row layout, the same flows as created by
+        CorpBondPortfolio.create_coupon_flows and create_maturity_flows. The coupon schedules are computed once per
+        combination of issue date, maturity date and frequency by coupon_schedules.
+
+        Parameters
+        ----------
+        :type modelling_date: date
+            The date from which the coupon dates start and from which the year fractions are measured
+        :type end_date: date
+            The last date that the model considers. Notionals of bonds maturing later are repaid at this date
+
+        Returns
+        -------
+        :rtype FlatCashFlows
+            The flows of each position are its coupons followed by its notional repayment
+        """
+        n_bonds = len(self)
+        keys = np.column_stack([self.issue_date.astype(np.int64), self.maturity_date.astype(np.int64), self.frequency])
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        all_dates, lengths = coupon_schedules(unique_keys[:, 0].astype("datetime64[D]"), unique_keys[:, 1].astype("datetime64[D]"), unique_keys[:, 2], modelling_date)
+        starts = np.cumsum(lengths) - lengths
+
+        # Gather the schedule of each position
+        coupon_counts = lengths[inverse]
+        coupon_bond = np.repeat(np.arange(n_bonds), coupon_counts)
+        position_in_bond = np.arange(coupon_bond.size) - np.repeat(np.cumsum(coupon_counts) - coupon_counts, coupon_counts)
+        coupon_dates = all_dates[starts[inverse][coupon_bond] + position_in_bond]
+        coupon_amounts = (self.coupon_rate * self.notional_amount)[coupon_bond]
+
+        # Each bond has its coupons followed by one notional repayment
+        offsets = np.zeros(n_bonds + 1, dtype=int)
+        np.cumsum(coupon_counts + 1, out=offsets[1:])
+        coupon_slots = offsets[:-1][coupon_bond] + position_in_bond
+        dates = np.empty(offsets[-1], dtype="datetime64[D]")
+        amounts = np.empty(offsets[-1])
+        dates[coupon_slots] = coupon_dates
+        amounts[coupon_slots] = coupon_amounts
+        dates[offsets[1:] - 1] = np.minimum(self.maturity_date, np.datetime64(end_date))
+        amounts[offsets[1:] - 1] = self.notional_amount
+        date_frac = (dates - np.datetime64(modelling_date)).astype(float) / 365.25
+        return FlatCashFlows(asset_ids=self.asset_id, offsets=offsets, date_frac=date_frac, amounts=amounts, dates=dates)
+
+    def calibrate_spreads(self, settings: Settings, proj_period: int, curves: Curves, method: str = "bisection", credit_adjusted: bool = False, sector_fallback: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calibrate the z-spreads of all positions with CorpBondPortfolio.solve_spreads, once per instrument. With
+        credit_adjusted, the residual spreads for price(credit_adjusted=True) are solved by solve_credit_spreads.
+
+        Parameters
+        ----------
+        :type settings: Settings
+            Settings object with the modelling date and end date
+        :type proj_period: int
+            Projection period of the curve
+        :type curves: Curves
+            Instance of the Curves class with calibrated term structure
+        :type method: str
+            "bisection", "newton" or "halley", see CorpBondPortfolio.solve_spreads
+        :type credit_adjusted: bool
+            If True, the default probability and recovery rate of the positions are used. Only bisection is available
+        :type sector_fallback: bool
+            If True, positions whose spread did not converge get their spread_sector, ex. as filled by with_sector_spreads,
+            as in CorpBondPortfolio.calibrate_bond_portfolio with sector spreads. Their convergence flag stays False
+
+        Returns
+        -------
+        :rtype tuple
+            Spread and convergence flag of each position
+        """
+        if credit_adjusted and method != "bisection":
+            raise ValueError("Credit adjusted spreads are only solved by bisection")
+        instruments = self.instrument_index()
+        representative = pd.Index(self.asset_id).get_indexer(instruments.instrument_ids) # Positions of the representatives
+        flat_cash_flows = self.subset(representative).flatten_cash_flows(settings.modelling_date, settings.end_date)
+        if credit_adjusted:
+            spreads, converged = CorpBondPortfolio.solve_credit_spreads(flat_cash_flows, self.market_price[representative], proj_period, curves,
+                                                                        self.default_probability[representative], self.recovery_rate[representative],
+                                                                        self.notional_amount[representative])
+        else:
+            spreads, converged = CorpBondPortfolio.solve_spreads(flat_cash_flows, self.market_price[representative], proj_period, curves, method=method,
+                                                                 x_start=-0.2, x_end=0.2, precision=1e-8, max_iter=100000)
+        spreads, converged = instruments.broadcast(spreads), instruments.broadcast(converged)
+        if sector_fallback:
+            spreads = np.where(converged, spreads, self.spread_sector)
+        return spreads, converged
+
+    def price(self, settings: Settings, proj_period: int, curves: Curves, spreads: np.ndarray, credit_adjusted: bool = False) -> np.ndarray:
+        """
+        Price all positions with CorpBondPortfolio.price_flat_cash_flows, or with price_flat_cash_flows_credit if
+        credit_adjusted is True.
+
+        Parameters
+        ----------
+        :type settings: Settings
+            Settings object with the modelling date and end date
+        :type proj_period: int
+            Projection period of the curve
+        :type curves: Curves
+            Instance of the Curves class with calibrated term structure
+        :type spreads: np.ndarray
+            Spread over the risk free curve of each position
+        :type credit_adjusted: bool
+            If True, the default probability and recovery rate of the positions are used
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Price of each position
+        """
+        flat_cash_flows = self.flatten_cash_flows(settings.modelling_date, settings.end_date)
+        if credit_adjusted:
+            return CorpBondPortfolio.price_flat_cash_flows_credit(flat_cash_flows, np.asarray(spreads, dtype=float), proj_period, curves,
+                                                                  self.default_probability, self.recovery_rate, self.notional_amount)
+        return CorpBondPortfolio.price_flat_cash_flows(flat_cash_flows, np.asarray(spreads, dtype=float), proj_period, curves)
+
+    def with_sector_spreads(self, sector_spreads: SectorSpreadIndex) -> "BondBook":
+        """
+        Bond book with the spread_sector column resolved from the NACE codes of the positions in one bulk pass.
+        Positions whose code has no spread on any level of the hierarchy keep their spread_sector.
+
+        Parameters
+        ----------
+        :type sector_spreads: SectorSpreadIndex
+            Index of the sector spreads. Ex. from ImportData.get_sector_spreads
+
+        Returns
+        -------
+        :rtype BondBook
+        """
+        spreads = sector_spreads.lookup(self.nace)
+        return replace(self, spread_sector=np.where(np.isnan(spreads), self.spread_sector, spreads))
+
+    def subset(self, positions: np.ndarray) -> "BondBook":
+        """
+        Bond book with the positions at the given indices.
+        """
+        return BondBook(**{name: getattr(self, name)[positions] for name in self.__dataclass_fields__})
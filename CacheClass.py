@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 128) -> None:
+        """
+        Bounded least-recently-used cache. When the cache is full, adding a new entry
+        evicts the entry that was used the longest time ago.
+
+        Parameters
+        ----------
+        :type max_size: int
+            Maximum number of entries kept in the cache
+        """
+        if max_size <= 0:
+            raise ValueError("Cache size must be greater than 0")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._store: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._store
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for key and mark it as recently used, or None if the key is not cached.
+
+        Parameters
+        ----------
+        :type key: Hashable
+            Key of the cached entry
+
+        Returns
+        -------
+        :rtype Any
+            The cached value or None
+        """
+        if key in self._store:
+            self._store.move_to_end(key)
+            self.hits += 1
+            return self._store[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store value under key, evicting the least recently used entry if the cache is full.
+
+        Parameters
+        ----------
+        :type key: Hashable
+            Key of the cached entry
+        :type value: Any
+            Value to cache
+        """
+        self._store[key] = value
+        self._store.move_to_end(key)
+        if len(self._store) > self.max_size:
+            self._store.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove all entries. The hit, miss and eviction counters are kept.
+        """
+        self._store.clear()
+
+    def info(self) -> Dict[str, int]:
+        """
+        Summary of the cache usage.
+
+        Returns
+        -------
+        :rtype dict
+            Number of hits, misses, evictions, current size and maximum size
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._store), "max_size": self.max_size}
@@ -24,6 +24,9 @@ class Configuration:
     input_unit_linked_policies: str
     input_unit_linked_fund: str
     output_path: str
+    curve_cache_enabled: bool
+    curve_cache_path: str
+    numba_enabled: bool
 
     def __init__(self) -> None:
         self.base_folder: str = ""
@@ -50,3 +53,6 @@ class Configuration:
         self.input_unit_linked_policies: str = ""
         self.input_unit_linked_fund: str = ""
         self.output_path: str = ""
+        self.curve_cache_enabled: bool = False
+        self.curve_cache_path: str = ""
+        self.numba_enabled: bool = False
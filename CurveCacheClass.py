@@ -0,0 +1,149 @@
+import argparse
+import hashlib
+import os
+import numpy as np
+from typing import Any, Dict, Optional, Sequence
+
+CACHE_FORMAT_VERSION = 4  # Increase when the content of the cached calibration changes
+
+
+class CurveCache:
+    def __init__(self, cache_folder: str) -> None:
+        """
+        Persistent on-disk cache of calibrated curves. Each entry is a compressed .npz file named
+        after a hash of everything that determines the calibration (input files and run parameters).
+
+        Parameters
+        ----------
+        :type cache_folder: str
+            Folder in which the cached calibrations are stored. Created if it does not exist
+        """
+        self.cache_folder = cache_folder
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        os.makedirs(cache_folder, exist_ok=True)
+
+    def make_key(self, files: Sequence[str], **parameters: Any) -> str:
+        """
+        Hash the content of the input files and the run parameters into a cache key.
+
+        Parameters
+        ----------
+        :type files: list of str
+            Paths of the input files the calibration depends on. Ex. the EIOPA parameter and curve files
+        :type parameters: keyword arguments
+            Run parameters the calibration depends on. Ex. country, ufr, tau, precision, n_proj_years.
+            NumPy scalars are converted to the equivalent Python value, so np.float64(0.0345) and 0.0345 give the same key
+
+        Returns
+        -------
+        :rtype str
+            Hexadecimal SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        digest.update(str(CACHE_FORMAT_VERSION).encode())
+        for file_name in files:
+            with open(file_name, mode="rb") as input_file:
+                digest.update(hashlib.sha256(input_file.read()).digest())
+        for name in sorted(parameters):
+            value = parameters[name]
+            if isinstance(value, np.generic):
+                value = value.item()
+            digest.update((name + "=" + repr(value) + ";").encode())
+        return digest.hexdigest()
+
+    def _file_name(self, key: str) -> str:
+        return os.path.join(self.cache_folder, key + ".npz")
+
+    def load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Load a cached calibration.
+
+        Parameters
+        ----------
+        :type key: str
+            Cache key created by make_key
+
+        Returns
+        -------
+        :rtype dict
+            Dictionary of arrays as saved by save, or None if the key is not cached
+        """
+        file_name = self._file_name(key)
+        if not os.path.exists(file_name):
+            self.misses += 1
+            return None
+        with np.load(file_name) as cached:
+            data = {name: cached[name] for name in cached.files}
+        self.hits += 1
+        return data
+
+    def save(self, key: str, data: Dict[str, np.ndarray]) -> None:
+        """
+        Store a calibration in the cache. The file is written under a temporary name and renamed,
+        so that concurrent batch jobs never read a partially written entry.
+
+        Parameters
+        ----------
+        :type key: str
+            Cache key created by make_key
+        :type data: dict
+            Dictionary of numeric arrays. Ex. the output of Curves.ExportCalibration
+        """
+        file_name = self._file_name(key)
+        temp_name = file_name + "." + str(os.getpid()) + ".tmp"
+        with open(temp_name, mode="wb") as cache_file:
+            np.savez_compressed(cache_file, **data)
+        os.replace(temp_name, file_name)
+        self.writes += 1
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """
+        Remove one entry or, if no key is given, all entries from the cache.
+
+        Parameters
+        ----------
+        :type key: str
+            Cache key created by make_key. If None, the whole cache is cleared
+
+        Returns
+        -------
+        :rtype int
+            Number of removed entries
+        """
+        if key is not None:
+            file_names = [self._file_name(key)] if os.path.exists(self._file_name(key)) else []
+        else:
+            file_names = [os.path.join(self.cache_folder, name) for name in os.listdir(self.cache_folder) if name.endswith(".npz")]
+        for file_name in file_names:
+            os.remove(file_name)
+        return len(file_names)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Summary of the cache usage in this session and of the content of the cache folder.
+
+        Returns
+        -------
+        :rtype dict
+            Number of hits, misses and writes in this session, the number of cached entries and their total size in bytes
+        """
+        file_names = [os.path.join(self.cache_folder, name) for name in os.listdir(self.cache_folder) if name.endswith(".npz")]
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes,
+                "entries": len(file_names), "size_bytes": sum(os.path.getsize(name) for name in file_names)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the calibrated curve cache")
+    parser.add_argument("command", choices=["stats", "invalidate"])
+    parser.add_argument("--folder", default="Cache", help="Cache folder (default: Cache)")
+    parser.add_argument("--key", default=None, help="Invalidate a single entry instead of the whole cache")
+    arguments = parser.parse_args()
+
+    cache = CurveCache(arguments.folder)
+    if arguments.command == "stats":
+        for name, value in cache.stats().items():
+            print(name + ": " + str(value))
+    else:
+        print("Removed " + str(cache.invalidate(arguments.key)) + " cached calibration(s)")
@@ -1,7 +1,11 @@
 import datetime
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
-from typing import Sequence
+from typing import Dict, Sequence, Tuple
+from CacheClass import LRUCache
+from JitKernels import kernels
+from RootFinding import bisection_root, brent_root, newton_root
 
 class Curves:
     def __init__(self, ufr: float, precision: float, tau: float, initial_date: datetime.date, country: str) -> None:
@@ -12,14 +16,53 @@ class Curves:
         self.fwd_rates = pd.DataFrame(data=None)
         self.m_obs_ini = pd.DataFrame(data=None,index=None, columns=["Maturity"])
         self.r_obs_ini = pd.DataFrame(data= None, index=None, columns=["Yield"])
-        self.m_obs = pd.DataFrame(data=None,index=None, columns=["Maturities_year_0"])
-        self.r_obs = pd.DataFrame(data= None, index=None, columns=["Yield_year_0"])
         self.ufr = ufr
         self.precision = precision
         self.tau = tau
         self.alpha_ini = pd.DataFrame(data=None, columns=["Alpha_year"], dtype="float64")
-        self.alpha = pd.DataFrame(data=None, columns=["Alpha_year_0"], dtype="float64")
-        self.b = pd.DataFrame(data=None, columns=["Calibration_year_0"])
+        # Projected curves and their calibration. Row i belongs to projection year i. The curve of year i has i fewer
+        # liquid points than the initial curve, the end of its row is NaN padding (triangular layout)
+        self.m_obs_array = np.empty((0, 0))
+        self.r_obs_array = np.empty((0, 0))
+        self.n_liquid = np.empty(0, dtype=int) # Number of liquid points of each projected curve
+        self.alpha_array = np.empty(0)
+        self.alpha_iterations_array = np.empty(0, dtype=int)
+        self.b_array = np.empty((0, 0))
+        # Optional grid of log discount factors used by RetrieveRates instead of the Smith & Wilson evaluation. Row i belongs
+        # to projection year i, column j to the maturity grid_times[j]. grid_times is None while the grid mode is disabled
+        self.grid_times = None
+        self.grid_log_discount = np.empty((0, 0))
+        self.factor_cache = LRUCache(max_size=64) # Cholesky factors of the Smith & Wilson system and their inverses keyed by (maturities, ufr, alpha)
+        self.rate_cache = LRUCache(max_size=4096) # Risk free yields returned by RiskFreeYields keyed by (projection year, maturities)
+
+    @property
+    def m_obs(self) -> pd.DataFrame:
+        """Export view of the projected maturities. One column per projection year, padded with NaN"""
+        return self._ExportView(self.m_obs_array, "Maturities_year_")
+
+    @property
+    def r_obs(self) -> pd.DataFrame:
+        """Export view of the projected yields. One column per projection year, padded with NaN"""
+        return self._ExportView(self.r_obs_array, "Yield_year_")
+
+    @property
+    def alpha(self) -> pd.DataFrame:
+        """Export view of the calibrated parameters alpha. One column per projection year"""
+        return self._ExportView(self.alpha_array[:, np.newaxis], "Alpha_year_")
+
+    @property
+    def alpha_iterations(self) -> pd.DataFrame:
+        """Export view of the number of Galfa evaluations. One column per projection year"""
+        return self._ExportView(self.alpha_iterations_array[:, np.newaxis], "Iterations_year_")
+
+    @property
+    def b(self) -> pd.DataFrame:
+        """Export view of the calibration vectors. One column per projection year, padded with NaN"""
+        return self._ExportView(self.b_array, "Calibration_year_")
+
+    @staticmethod
+    def _ExportView(values: np.ndarray, prefix: str) -> pd.DataFrame:
+        return pd.DataFrame({prefix + str(i_year): values[i_year] for i_year in range(values.shape[0])})
 
     def SetObservedTermStructure(self, maturity_vec: np.ndarray, yield_vec: np.ndarray) -> None:
         """
@@ -55,18 +98,19 @@ class Curves:
         """
 
 
-        fwdata0 = 1 + self.r_obs_ini["Yield"][0] # First forward rate is equal to the first spot rate
-        fwdata = ((1 + self.r_obs_ini["Yield"]) ** self.m_obs_ini["Maturity"])/((1 + self.r_obs_ini["Yield"].shift(periods=1)) ** self.m_obs_ini["Maturity"].shift(periods=1))
-        out = np.insert(fwdata.values[1:], 0, fwdata0) # First forward in fwdata is NaN. instead fwdata0 is inserted at the start
+        capitalisation = (1 + self.r_obs_ini["Yield"].values) ** self.m_obs_ini["Maturity"].values
+        out = np.empty(capitalisation.size)
+        out[0] = 1 + self.r_obs_ini["Yield"].values[0] # First forward rate is equal to the first spot rate
+        out[1:] = capitalisation[1:] / capitalisation[:-1]
         self.fwd_rates = pd.DataFrame(data=out, index=None, columns=["Forward"])
 
 
     def ProjectForwardRate(self, n_years: int) -> str | None:
         """
-        Calculate the projected spot curve from the 1-year forward curve. Each column represents
-        the spot curve starting 1 year later than the previous column. Calling this function populates
-        the r_obs and m_obs property of the instance with the projected yields and maturities. The projection is done for
-        n_year years.
+        Calculate the projected spot curve from the 1-year forward curve. Each row represents
+        the spot curve starting 1 year later than the previous row. Calling this function populates
+        the r_obs_array, m_obs_array and n_liquid properties of the instance with the projected yields and maturities.
+        The projection is done for n_year years.
 
         Parameters
         ----------
@@ -79,29 +123,38 @@ class Curves:
         if n_years<0:
             return "N should be greater than 0"
 
-        # Calculate first spot rate and initiate the dataframe
-        spot = ((1+self.fwd_rates["Forward"]).cumprod(axis=None)**(1/self.m_obs_ini["Maturity"])-1)-1
-        self.m_obs["Maturities_year_0"] = self.m_obs_ini["Maturity"].values
-        self.r_obs["Yield_year_0"] = spot.values
+        maturities_ini = self.m_obs_ini["Maturity"].values.astype(float)
+        n_points = maturities_ini.size
+        n_rows = max(n_years, 1) # The curve of year 0 is always calculated
 
-        if n_years>=1:
-            for year in range(1, n_years):
-                maturities = self.m_obs_ini["Maturity"]-year
-                spot = ((1+self.fwd_rates["Forward"][year:]).cumprod(axis=None)**(1/maturities)-1)[year:]-1
-                self.m_obs = self.m_obs.join(pd.Series(data=maturities.values[year:], index=None, name="Maturities_year_"+str(year)))
-                self.r_obs = self.r_obs.join(pd.Series(data=spot.values, index=None, name="Yield_year_"+str(year)))
+        # Element [year, k] of the triangular layout belongs to the point year + k of the initial curve. The product of
+        # the gross forwards between year and year + k is obtained from one cumulative sum of their logarithms
+        log_forward_sum = np.concatenate(([0.], np.cumsum(np.log1p(self.fwd_rates["Forward"].values))))
+        years = np.arange(n_rows)[:, np.newaxis]
+        points = years + np.arange(n_points)[np.newaxis, :]
+        is_liquid = points < n_points
+        points = np.where(is_liquid, points, 0)
 
-    def CalibrateProjected(self, n_years: int, ini_guess: float, end: float, max_iter: int) -> None:
+        maturities = np.where(is_liquid, maturities_ini[points] - years, np.nan)
+        self.m_obs_array = maturities
+        self.r_obs_array = np.exp((log_forward_sum[points + 1] - log_forward_sum[np.minimum(years, n_points)]) / maturities) - 2
+        self.n_liquid = np.maximum(n_points - np.arange(n_rows), 0)
+
+    def CalibrateProjected(self, n_years: int, ini_guess: float, end: float, max_iter: int, method: str = "bisection", warm_start: bool = False, executor: str = "serial", n_workers: int | None = None) -> None:
         """
-        Takes the projected yield curve from the m_obs and r_obs properties and uses the bisection algorithm
+        Takes the projected yield curve from the m_obs and r_obs properties and uses a root finding algorithm
         to calibrate the alpha parameter if the Smith &Wilson algorithm. The calibration is done on the first
         n_years calibrations. The maximum number of iterations per each calibration is set by n_iter.
         
-        The optimal value of the parameter alpha is saved into the alpha property.
+        The optimal value of the parameter alpha is saved into the alpha property. The number of Galfa
+        evaluations needed for each calibration is saved into the alpha_iterations property.
 
         The optimized value of alpha together with other Smith&Wilson parameters and the projected yield curve
         are used to calculate the calibration vector b. This vector is saved into the property b.
 
+        The calibrations of different projection years are independent of each other, unless warm_start is used.
+        With executor "thread" or "process" they are run concurrently and the results are identical to the serial run.
+
         Parameters
         ----------
         self: Curves class instance
@@ -117,60 +170,247 @@ class Curves:
             Upper limit of the parameter alpha in the calibration
 
         :type max_iter: integer
-            Maximum number of iteration of the calibration (bisection) algorithm 
+            Maximum number of iteration of the calibration algorithm 
+
+        :type method: str
+            Root finding algorithm used for alpha. One of "bisection", "brent" or "newton"
+
+        :type warm_start: bool
+            If True, the search for alpha in each projection year starts from the alpha of the previous year.
+            Only used by the "brent" and "newton" methods. Requires the serial executor
+
+        :type executor: str
+            One of "serial", "thread" (thread pool) or "process" (process pool)
+
+        :type n_workers: int
+            Number of workers of the thread or process pool. If None, the default of concurrent.futures is used
 
         """
 
-        ufr = self.ufr
-        tau = self.tau
-        precision = self.precision
+        if executor not in ("serial", "thread", "process"):
+            raise ValueError("executor must be either serial, thread or process")
+        if warm_start and executor != "serial":
+            raise ValueError("warm_start couples consecutive projection years and requires the serial executor")
+
+        r_obs_years = [self.r_obs_array[i_year, :self.n_liquid[i_year]] for i_year in range(0, n_years)] # Obtain the yield curve without the NaN padding
+        m_obs_years = [self.m_obs_array[i_year, :self.n_liquid[i_year]] for i_year in range(0, n_years)]
+
+        if executor == "serial":
+            results = []
+            alpha_previous = None
+            for m_obs, r_obs in zip(m_obs_years, r_obs_years):
+                x_guess = alpha_previous if warm_start else None
+                results.append(self.CalibrateYear(m_obs, r_obs, method, ini_guess, end, max_iter, x_guess))
+                alpha_previous = results[-1][0]
+        else:
+            pool = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+            n_tasks = len(m_obs_years)
+            with pool(max_workers=n_workers) as workers:
+                results = list(workers.map(_calibrate_year, [self.ufr] * n_tasks, [self.precision] * n_tasks, [self.tau] * n_tasks,
+                                           m_obs_years, r_obs_years, [method] * n_tasks, [ini_guess] * n_tasks, [end] * n_tasks, [max_iter] * n_tasks))
+
+        # Save the calibration parameters alpha, the number of Galfa evaluations and the calibration vectors b
+        self.grid_times = None # A previously built discount grid and cached yields belong to the old calibration
+        self.rate_cache.clear()
+        self.alpha_array = np.array([alpha for alpha, _, _ in results], dtype=float)
+        self.alpha_iterations_array = np.array([n_iter for _, n_iter, _ in results], dtype=int)
+        self.b_array = np.full((n_years, self.m_obs_array.shape[1]), np.nan)
+        for i_year, (_, _, b_calibrated) in enumerate(results):
+            self.b_array[i_year, :b_calibrated.size] = b_calibrated
+
+    def CalibrateYear(self, m_obs: np.ndarray, r_obs: np.ndarray, method: str, ini_guess: float, end: float, max_iter: int, x_guess: float | None = None) -> Tuple[float | None, int, np.ndarray]:
+        """
+        Calibrate the parameter alpha and the calibration vector b of a single curve.
 
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with populated ufr, tau and precision
+        :type m_obs: np.ndarray
+            Liquid maturities of the curve
+        :type r_obs: np.ndarray
+            Yields at the liquid maturities
+        :type method: str
+            Root finding algorithm used for alpha. One of "bisection", "brent" or "newton"
+        :type ini_guess: float
+            Lower limit of the parameter alpha in the calibration
+        :type end: float
+            Upper limit of the parameter alpha in the calibration
+        :type max_iter: integer
+            Maximum number of iteration of the calibration algorithm
+        :type x_guess: float
+            Optional warm start guess for alpha
+
+        Returns
+        -------
+        :rtype tuple
+            The parameter alpha, the number of Galfa evaluations and the calibration vector b
+        """
+        alpha_optimized, n_iter = self.SolveAlpha(method, ini_guess, end, m_obs, r_obs, self.ufr, self.tau, self.precision, max_iter, x_guess)
+        b_calibrated = self.SWCalibrate(r_obs, m_obs, self.ufr, alpha_optimized)
+        return alpha_optimized, n_iter, b_calibrated
+
+    def ExportCalibration(self) -> Dict[str, np.ndarray]:
+        """
+        Export the projected curves and their calibration as a dictionary of numeric arrays, for example
+        to store them in the CurveCache.
+
+        Returns
+        -------
+        :rtype dict
+            The alpha, alpha_iterations, b, m_obs, r_obs and n_liquid arrays. Matrices have one row per projection year
+        """
+        return {"alpha": self.alpha_array,
+                "alpha_iterations": self.alpha_iterations_array,
+                "b": self.b_array,
+                "m_obs": self.m_obs_array,
+                "r_obs": self.r_obs_array,
+                "n_liquid": self.n_liquid}
+
+    def ImportCalibration(self, data: Dict[str, np.ndarray]) -> None:
+        """
+        Populate the projected curves and their calibration from arrays created by ExportCalibration.
+        After the import, the instance can be used as if ProjectForwardRate and CalibrateProjected were called.
 
-        # Time 0 calibration
-        yield_head = "Yield_year_0"
-        mat_head = "Maturities_year_0"
-        calib_head = "Calibration_year_0"
-        alpha_head = "Alpha_year_0"
+        Parameters
+        ----------
+        :type data: dict
+            Dictionary with the alpha, alpha_iterations, b, m_obs, r_obs and n_liquid arrays
+        """
+        self.grid_times = None
+        self.rate_cache.clear()
+        self.alpha_array = np.asarray(data["alpha"], dtype=float)
+        self.alpha_iterations_array = np.asarray(data["alpha_iterations"], dtype=int)
+        self.b_array = np.asarray(data["b"], dtype=float)
+        self.m_obs_array = np.asarray(data["m_obs"], dtype=float)
+        self.r_obs_array = np.asarray(data["r_obs"], dtype=float)
+        self.n_liquid = np.asarray(data["n_liquid"], dtype=int)
+
+    def SolveAlpha(self, method: str, x_start: float, x_end: float, m_obs: np.ndarray, r_obs: np.ndarray, ufr: float, tau: float, precision: float, max_iter: int, x_guess: float | None = None) -> Tuple[float | None, int]:
+        """
+        Find the parameter alpha with the selected root finding algorithm.
 
-        r_obs = np.transpose(np.array(self.r_obs[yield_head])) # Obtain the yield curve
-        m_obs = np.transpose(np.array(self.m_obs[mat_head])) # Obtain the maturities curve
+        Parameters
+        ----------
+            :type method :    str, one of "bisection", "brent" or "newton"
+            :type x_start :   1 x 1 floating number representing the minimum allowed value of the convergence speed parameter alpha. Ex. alpha = 0.05
+            :type x_end :     1 x 1 floating number representing the maximum allowed value of the convergence speed parameter alpha. Ex. alpha = 0.8
+            :type m_obs :     n x 1 ndarray of maturities of bonds, that have rates provided in input (r). Ex. u = [[1], [3]]
+            :type r_obs :     n x 1 ndarray of rates, for which you wish to calibrate the algorithm. Ex. r = [[0.0024], [0.0034]]
+            :type ufr  :      1 x 1 floating number, representing the ultimate forward rate. Ex. ufr = 0.042
+            :type tau :       1 x 1 floating number representing the allowed difference between ufr and actual curve. Ex. Tau = 0.00001
+            :type precision : 1 x 1 floating number representing the precision of the calculation
+            :type max_iter :  1 x 1 positive integer representing the maximum number of iterations allowed
+            :type x_guess :   1 x 1 floating number, optional warm start guess for alpha. Ignored by the bisection algorithm
 
-        # Calculate the calibration parameter alpha 
-        alpha_optimized = [self.BisectionAlpha(ini_guess, end, m_obs, r_obs, ufr, tau, precision, max_iter)]
+        Returns
+        -------
+            :rtype tuple of the optimal value of the parameter alpha (None if not converged) and the number of Galfa evaluations
+        """
+        galfa = AlphaObjective(m_obs, r_obs, ufr, tau)
+        if method == "bisection":
+            return bisection_root(galfa, x_start, x_end, precision, max_iter)
+        elif method == "brent":
+            return brent_root(galfa, x_start, x_end, precision, max_iter, x_guess)
+        elif method == "newton":
+            return newton_root(galfa, x_start, x_end, precision, max_iter, x_guess)
+        else:
+            raise ValueError("method must be either bisection, brent or newton")
 
-        # Save the calibration parameter alpha
-        self.alpha[alpha_head] = alpha_optimized
+    def _CalibrationSet(self, proj_step: int) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Return the liquid maturities, the calibration vector b and the parameter alpha of the curve
+        calibrated for a projection year. The projected curve of year proj_step has proj_step fewer
+        liquid points than the initial curve, the remaining entries of its row in m_obs_array and b_array are NaN padding.
 
-        b_calibrated = self.SWCalibrate(r_obs, m_obs, ufr, self.alpha[alpha_head][0])
-        self.b[calib_head] = b_calibrated
-        
-        # All other projection periods except time 0
-        for i_year in range(1, n_years):
-            yield_head = "Yield_year_" + str(i_year)
-            mat_head = "Maturities_year_" + str(i_year)
-            calib_head = "Calibration_year_" + str(i_year)
-            alpha_head = "Alpha_year_" + str(i_year)
-            
-            r_obs = np.transpose(np.array(self.r_obs[yield_head]))[:-i_year] # Obtain the yield curve
-            m_obs = np.transpose(np.array(self.m_obs[mat_head]))[:-i_year]
-
-            alpha_optimized = [self.BisectionAlpha(ini_guess, end, m_obs, r_obs, ufr, tau, precision, max_iter)]
-            self.alpha[alpha_head] = alpha_optimized
-
-            b_calibrated = self.SWCalibrate(r_obs, m_obs, ufr, self.alpha[alpha_head][0])
-            b_calibrated = np.append(b_calibrated, np.repeat(np.nan, i_year))
-            
-            self.b[calib_head] = b_calibrated
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with populated m_obs_array, b_array and alpha_array
+        :type proj_step: int
+            The projection year of interest
+
+        Returns
+        -------
+        :rtype tuple
+            Liquid maturities, calibration vector b and alpha of the selected projection year
+        """
+
+        n_valid = self.n_liquid[proj_step]
+        return self.m_obs_array[proj_step, :n_valid], self.b_array[proj_step, :n_valid], self.alpha_array[proj_step]
+
+    def RiskFreeYields(self, proj_step: int, target_mat: np.ndarray) -> np.ndarray:
+        """
+        Risk free yields of a calibrated projection year for the target maturities. The same combinations of projection
+        year and maturities are requested repeatedly by the spread and growth rate calibrations and the pricing of every
+        period, so the results are memoized in the bounded rate_cache property. The returned array is read-only.
+
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with populated m_obs_array, b_array and alpha_array
+        :type proj_step: int
+            The projection year of interest
+        :type target_mat: np.ndarray
+            Maturities of interest
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Risk free yields for the target maturities
+        """
+        key = (proj_step, np.asarray(target_mat, dtype=float).tobytes())
+        yields = self.rate_cache.get(key)
+        if yields is None:
+            if self.grid_times is not None and np.all((target_mat >= 0) & (target_mat <= self.grid_times[-1])):
+                yields = self.GridDiscount(proj_step, target_mat) ** (-1/ target_mat) -1 # Discount grid mode
+            else:
+                calib_maturities, calib_b, calib_alpha = self._CalibrationSet(proj_step)
+                yields = self.SWExtrapolate(target_mat, calib_maturities, calib_b, self.ufr, calib_alpha)
+            yields = np.asarray(yields)
+            yields.flags.writeable = False
+            self.rate_cache.put(key, yields)
+        return yields
+
+    def ApplySpreads(self, yields: np.ndarray, target_mat: np.ndarray, spreads: np.ndarray, type: str) -> np.ndarray:
+        """
+        Add many spreads to the same risk free yields at once. Together with RiskFreeYields this separates the
+        Smith & Wilson evaluation, done once per maturity grid, from the spread, which only enters the final
+        exponentiation. The results are identical to calling RetrieveRates once per spread.
+
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance
+        :type yields: np.ndarray
+            k x 1 vector of risk free yields. Ex. the output of RiskFreeYields
+        :type target_mat: np.ndarray
+            k x 1 vector of the maturities belonging to the yields
+        :type spreads: np.ndarray
+            Array of spreads of any shape s. Ex. one spread per bond, or the trial spreads of a root finding algorithm
+        :type type: str
+            One of "Yield", "Capitalisation" or "Discount"
+
+        Returns
+        -------
+        :rtype np.ndarray
+            s x k array of yields, capitalisation or discount factors. Element [..., j] belongs to the maturity target_mat[j]
+        """
+        target_mat = np.asarray(target_mat, dtype=float)
+        yield_result = np.asarray(yields, dtype=float) + np.asarray(spreads, dtype=float)[..., np.newaxis]
+
+        if type == "Yield":
+            return yield_result
+        elif type == "Capitalisation":
+            return (1 + yield_result) ** target_mat
+        elif type == "Discount":
+            return (1 + yield_result) ** (-target_mat)
+        else:
+            raise ValueError("type must be either Yield, Capitalisation or Discount")
 
     def RetrieveRates(self, proj_step: int, target_mat: np.ndarray, type: str, spread: float) -> pd.DataFrame | None:
     
-        maturity_name = "Maturities_year_" + str(proj_step)
-        calibration_name = "Calibration_year_" + str(proj_step)
-        alpha_name = "Alpha_year_" + str(proj_step)
-        calib_b = self.b[calibration_name][:-proj_step].values
-        calib_maturities = self.m_obs[maturity_name][:-proj_step].values
-        calib_alpha = self.alpha[alpha_name][0]
-        yield_result = self.SWExtrapolate(target_mat, calib_maturities, calib_b, self.ufr, calib_alpha) + spread
+        yield_result = self.RiskFreeYields(proj_step, target_mat) + spread
 
         if type == "Yield":
             return pd.DataFrame(data=yield_result,index=None, columns=["Yield"])
@@ -181,6 +421,199 @@ class Curves:
         else:
             pass
 
+    def RetrieveRatesBatch(self, proj_steps: Sequence[int], target_mat: np.ndarray, type: str, spread: float) -> np.ndarray:
+        """
+        Vectorized version of RetrieveRates. Evaluates the calibrated curves of all requested projection
+        years on a grid of target maturities with a single broadcast Smith & Wilson evaluation.
+
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with populated m_obs_array, b_array and alpha_array
+        :type proj_steps: sequence of int
+            Projection years of interest. Ex. range(0, 51)
+        :type target_mat: np.ndarray
+            Either a k x 1 vector of maturities shared by all projection years, or a
+            len(proj_steps) x k matrix with a separate row of maturities for each projection year
+        :type type: str
+            One of "Yield", "Capitalisation" or "Discount"
+        :type spread: float
+            Extra spread added to the risk free yields
+
+        Returns
+        -------
+        :rtype np.ndarray
+            len(proj_steps) x k matrix of yields, capitalisation or discount factors. Row i belongs to proj_steps[i]
+        """
+
+        proj_steps = np.asarray(list(proj_steps), dtype=int)
+        n_max = self.n_liquid[proj_steps].max()
+        m_obs = self.m_obs_array[proj_steps, :n_max]  # The stored curves are already NaN padded, one row per projection year
+        b = self.b_array[proj_steps, :n_max]
+
+        target_mat = np.broadcast_to(np.asarray(target_mat, dtype=float), (len(proj_steps), np.shape(target_mat)[-1]))
+        yield_result = self.SWExtrapolateBatch(target_mat, m_obs, b, self.ufr, self.alpha_array[proj_steps]) + spread
+
+        if type == "Yield":
+            return yield_result
+        elif type == "Capitalisation":
+            return (1 + yield_result) ** target_mat
+        elif type == "Discount":
+            return (1 + yield_result) ** (-target_mat)
+        else:
+            raise ValueError("type must be either Yield, Capitalisation or Discount")
+
+    def BuildDiscountGrid(self, step: float, horizon: float, tolerance: float) -> float:
+        """
+        Enable the discount grid mode. For every calibrated projection year, the risk free discount factors are
+        evaluated with the Smith & Wilson algorithm on the fixed grid of maturities 0, step, 2*step, ..., horizon.
+        Afterwards RetrieveRates answers requests for maturities between 0 and horizon by linear interpolation
+        of the log discount factors on the grid. Requests outside of the grid still use the exact algorithm.
+
+        The grid is verified against the exact Smith & Wilson discount factors with VerifyDiscountGrid. If the
+        error is larger than tolerance, the grid mode stays disabled and a ValueError is raised.
+
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with populated m_obs_array, b_array and alpha_array
+        :type step: float
+            Distance between two grid points in years. Ex. 1/365.25 for a daily grid
+        :type horizon: float
+            Largest maturity on the grid in years. Ex. the number of projection years
+        :type tolerance: float
+            Maximum allowed absolute difference between the interpolated and the exact discount factors
+
+        Returns
+        -------
+        :rtype float
+            The maximum absolute difference found by VerifyDiscountGrid
+        """
+        if step <= 0:
+            raise ValueError("step of the discount grid must be positive")
+
+        grid_times = np.arange(0, int(np.ceil(horizon / step)) + 1) * step
+        grid_log_discount = np.zeros((self.alpha_array.size, grid_times.size)) # The discount factor at maturity 0 is 1
+        for proj_step in range(self.alpha_array.size):
+            calib_maturities, calib_b, calib_alpha = self._CalibrationSet(proj_step)
+            rates = self.SWExtrapolate(grid_times[1:], calib_maturities, calib_b, self.ufr, calib_alpha)
+            grid_log_discount[proj_step, 1:] = -grid_times[1:] * np.log1p(rates)
+
+        self.grid_times = grid_times
+        self.grid_log_discount = grid_log_discount
+        self.rate_cache.clear()
+        error = self.VerifyDiscountGrid()
+        if error > tolerance:
+            self.grid_times = None
+            self.rate_cache.clear()
+            raise ValueError("discount grid error " + str(error) + " exceeds the tolerance " + str(tolerance) + ". Use a smaller step")
+        return error
+
+    def GridDiscount(self, proj_step: int, target_mat: np.ndarray) -> np.ndarray:
+        """
+        Risk free discount factors interpolated from the discount grid. Log discount factors are interpolated linearly,
+        which is equivalent to a piecewise constant forward rate between grid points.
+
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with a discount grid built by BuildDiscountGrid
+        :type proj_step: int
+            The projection year of interest
+        :type target_mat: np.ndarray
+            Maturities between 0 and the horizon of the grid
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Discount factors for the target maturities
+        """
+        return np.exp(np.interp(np.asarray(target_mat, dtype=float), self.grid_times, self.grid_log_discount[proj_step]))
+
+    def VerifyDiscountGrid(self, check_mat: np.ndarray | None = None) -> float:
+        """
+        Compare the interpolated discount factors of the grid with the exact Smith & Wilson discount factors
+        for all calibrated projection years.
+
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with a discount grid built by BuildDiscountGrid
+        :type check_mat: np.ndarray
+            Maturities at which the grid is checked. If None, the midpoints between the grid points are used.
+            This is where the linear interpolation error is largest
+
+        Returns
+        -------
+        :rtype float
+            Maximum absolute difference between the interpolated and the exact discount factors
+        """
+        if check_mat is None:
+            check_mat = (self.grid_times[1:] + self.grid_times[:-1]) / 2
+        check_mat = np.asarray(check_mat, dtype=float)
+
+        error = 0.
+        for proj_step in range(self.alpha_array.size):
+            calib_maturities, calib_b, calib_alpha = self._CalibrationSet(proj_step)
+            exact = (1 + self.SWExtrapolate(check_mat, calib_maturities, calib_b, self.ufr, calib_alpha)) ** (-check_mat)
+            error = max(error, float(np.max(np.abs(self.GridDiscount(proj_step, check_mat) - exact))))
+        return error
+
+    def KeyRateSensitivities(self, proj_step: int, target_mat: np.ndarray, cash_flows: np.ndarray, spreads: np.ndarray, bump: float = 0.0001) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Key rate sensitivities of a book of assets to the liquid yields of a projection year. Each liquid yield is bumped
+        separately with alpha kept at its calibrated value. All bumped calibration vectors are obtained in one solve with
+        several right hand sides using the cached Cholesky factor. The heart of the Wilson function is calculated once
+        and shared by all bumps.
+
+        Parameters
+        ----------
+        self: Curves class instance
+            The Curves class instance with populated m_obs_array, r_obs_array, b_array and alpha_array
+        :type proj_step: int
+            The projection year of interest
+        :type target_mat: np.ndarray
+            k x 1 vector of the cash flow times in years
+        :type cash_flows: np.ndarray
+            a x k matrix of cash flows. Row i contains the cash flows of asset i at the times target_mat
+        :type spreads: np.ndarray
+            a x 1 vector of spreads of the assets over the risk free curve
+        :type bump: float
+            Size of the bump of the liquid yields. Ex. 0.0001 (1 basis point)
+
+        Returns
+        -------
+        :rtype tuple
+            Two a x n matrices, where n is the number of liquid maturities of the projection year. The first contains the
+            change of the value of the asset when the key rate is increased by bump (PV01 for a 1 basis point bump). The
+            second contains the key rate durations -dV / (V * bump)
+        """
+        calib_maturities, _, calib_alpha = self._CalibrationSet(proj_step)
+        r_obs = self.r_obs_array[proj_step, :calib_maturities.size]
+        target_mat = np.asarray(target_mat, dtype=float)
+        cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=float))
+        spreads = np.asarray(spreads, dtype=float).reshape(-1)
+
+        # Column 0 is the calibrated curve, column j + 1 the curve with the j-th liquid yield bumped
+        n_liquid = calib_maturities.size
+        r_bumped = np.repeat(r_obs[:, np.newaxis], n_liquid + 1, axis=1)
+        r_bumped[np.arange(n_liquid), np.arange(1, n_liquid + 1)] += bump
+        p = (1+r_bumped) ** (-calib_maturities[:, np.newaxis])                           # Implied market prices of the ZCB bonds
+        d = np.exp(-np.log(1+self.ufr) * calib_maturities)                                 # Vector d described in paragraph 138
+        L_inv = self.SWInverseFactor(calib_maturities, self.ufr, calib_alpha)
+        b = L_inv.transpose() @ (L_inv @ (p - d[:, np.newaxis]))                        # Calibration vectors from paragraph 149, one column per bump
+
+        H = self.SWHeart(target_mat, calib_maturities, calib_alpha)                      # Heart of the Wilson function from paragraph 132
+        d_target = np.exp(-np.log(1+self.ufr) * target_mat)
+        price = d_target[:, np.newaxis] * (1 + H @ (d[:, np.newaxis] * b))               # Discount pricing function from paragraph 147
+        yields = price ** (-1/ target_mat[:, np.newaxis]) -1                             # k x (n + 1) risk free yields
+
+        discount = (1 + yields[np.newaxis, :, :] + spreads[:, np.newaxis, np.newaxis]) ** (-target_mat[np.newaxis, :, np.newaxis])
+        value = np.einsum("ak,akj->aj", cash_flows, discount)
+        pv01 = value[:, 1:] - value[:, :1]
+        krd = -pv01 / (value[:, :1] * bump)
+        return pv01, krd
+
     def SWHeart(self, u: np.ndarray, v: np.ndarray, alpha: float) -> np.ndarray:
         """
         SWHEART Calculate the heart of the Wilson function.
@@ -203,9 +636,11 @@ class Curves:
         For more information see https://www.eiopa.europa.eu/sites/default/files/risk_free_interest_rate/12092019-technical_documentation.pdf
         """
     
-        u_mat = np.tile(u, [v.size, 1]).transpose()
-        v_mat = np.tile(v, [u.size, 1])
-        return 0.5 * (alpha * (u_mat + v_mat) + np.exp(-alpha * (u_mat + v_mat)) - alpha * np.absolute(u_mat-v_mat) - np.exp(-alpha * np.absolute(u_mat-v_mat))); # Heart of the Wilson function from paragraph 132
+        if kernels.enabled and np.ndim(u) == 1 and np.ndim(v) == 1:
+            return kernels.sw_heart(np.asarray(u, dtype=float), np.asarray(v, dtype=float), alpha)
+        uv_sum = np.add.outer(u, v)
+        uv_diff = np.absolute(np.subtract.outer(u, v))
+        return 0.5 * (alpha * uv_sum + np.exp(-alpha * uv_sum) - alpha * uv_diff - np.exp(-alpha * uv_diff)) # Heart of the Wilson function from paragraph 132
 
     def SWCalibrate(self, r: np.ndarray, M: np.ndarray, ufr: float, alpha: float) -> np.ndarray:
         """
@@ -227,15 +662,61 @@ class Curves:
 
         For more information see https://www.eiopa.europa.eu/sites/default/files/risk_free_interest_rate/12092019-technical_documentation.pdf
         """
-        C = np.identity(M.size)
         p = (1+r) **(-M)  # Transform rates to implied market prices of a ZCB bond
-        d = np.exp(-np.log(1+ufr) * M)    # Calculate vector d described in paragraph 138
-        Q = np.diag(d) @ C                  # Matrix Q described in paragraph 139
-        q = C.transpose() @ d                         # Vector q described in paragraph 139
-        H = self.SWHeart(M, M, alpha) # Heart of the Wilson function from paragraph 132
+        q = np.exp(-np.log(1+ufr) * M)    # Vector q = C^T d described in paragraph 139. With ZCB inputs C is the identity matrix
+        L_inv = self.SWInverseFactor(M, ufr, alpha)
+
+        return L_inv.transpose() @ (L_inv @ (p-q))          # Calibration vector b from paragraph 149, (Q^T H Q)^-1 = L^-T L^-1 with the cached inverse Cholesky factor
+
+    def SWFactorize(self, M: np.ndarray, ufr: float, alpha: float) -> np.ndarray:
+        """
+        Calculate the lower triangular Cholesky factor L of the symmetric positive definite matrix Q^T H Q
+        used in the calibration of the Smith & Wilson algorithm (L @ L^T = Q^T H Q). Because Q is diagonal,
+        the matrix is obtained by scaling the rows and columns of H with the vector d elementwise.
+
+        Factors are cached in the factor_cache property per combination of maturities, ufr and alpha, so that
+        repeated calibrations on the same liquid maturities reuse the factorization. The key contains the exact alpha,
+        so every trial alpha of the alpha search is a miss. The hits come from the repeated calibrations at the final
+        alpha, ex. SWCalibrate after the search and KeyRateSensitivities.
+
+        Parameters
+        ----------
+        :type M :     n x 1 ndarray of maturities of bonds, that have rates provided in input. Ex. u=[[1], [3]]
+        :type ufr :   float representing the ultimate forward rate. Ex. ufr = 0.042
+        :type alpha : float representing the convergence speed parameter alpha. Ex. alpha = 0.05
+
+        Returns
+        -------
+        :rtype n x n ndarray lower triangular Cholesky factor of Q^T H Q
+
+        For more information see https://www.eiopa.europa.eu/sites/default/files/risk_free_interest_rate/12092019-technical_documentation.pdf
+        """
+        return self._SWFactors(M, ufr, alpha)[0]
+
+    def SWInverseFactor(self, M: np.ndarray, ufr: float, alpha: float) -> np.ndarray:
+        """
+        Inverse L^-1 of the Cholesky factor of SWFactorize, cached together with the factor. With the inverse, a
+        calibration on cached maturities costs two matrix-vector products, O(n^2), instead of two O(n^3) solves.
+
+        Returns
+        -------
+        :rtype n x n ndarray lower triangular inverse of the Cholesky factor of Q^T H Q
+        """
+        return self._SWFactors(M, ufr, alpha)[1]
+
+    def _SWFactors(self, M: np.ndarray, ufr: float, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+        # Cholesky factor of Q^T H Q and its inverse, computed once per key of factor_cache
+        M = np.asarray(M, dtype=float)
+        key = (M.tobytes(), float(ufr), float(alpha))
+        factors = self.factor_cache.get(key)
+        if factors is None:
+            d = np.exp(-np.log(1+ufr) * M)    # Calculate vector d described in paragraph 138
+            H = self.SWHeart(M, M, alpha) # Heart of the Wilson function from paragraph 132
+            L = np.linalg.cholesky(d[:, np.newaxis] * H * d[np.newaxis, :]) # Q^T H Q with Q = diag(d) from paragraph 139
+            factors = (L, np.linalg.solve(L, np.eye(M.size)))
+            self.factor_cache.put(key, factors)
+        return factors
 
-        return np.linalg.inv(Q.transpose() @ H @ Q) @ (p-q)          # Calibration vector b from paragraph 149
-    
     def SWExtrapolate(self, m_target: np.ndarray, m_obs: np.ndarray, b: np.ndarray, ufr: float, alpha: float) -> np.ndarray:
         """"
         SWEXTRAPOLATE Interpolate or/and extrapolate rates for targeted maturities using a Smith-Wilson algorithm.
@@ -257,13 +738,51 @@ class Curves:
         
         For more information see https://www.eiopa.europa.eu/sites/default/files/risk_free_interest_rate/12092019-technical_documentation.pdf
         """
-        C = np.identity(m_obs.size)
+        if kernels.enabled and np.ndim(m_target) == 1:
+            return kernels.sw_extrapolate(np.asarray(m_target, dtype=float), np.asarray(m_obs, dtype=float), np.asarray(b, dtype=float), ufr, alpha)
         d = np.exp(-np.log(1+ufr) * m_obs)                                                # Calculate vector d described in paragraph 138
-        Q = np.diag(d) @ C                                                             # Matrix Q described in paragraph 139
         H = self.SWHeart(m_target, m_obs, alpha)                                          # Heart of the Wilson function from paragraph 132
-        p = np.exp(-np.log(1+ufr)* m_target) + np.diag(np.exp(-np.log(1+ufr) * m_target)) @ H @ Q @ b # Discount pricing function for targeted maturities from paragraph 147
+        d_target = np.exp(-np.log(1+ufr) * m_target)
+        p = d_target * (1 + H @ (d * b))                                                  # Discount pricing function for targeted maturities from paragraph 147. Q = diag(d) is applied elementwise
         return p ** (-1/ m_target) -1 # Convert obtained prices to rates and return prices
 
+    def SWExtrapolateBatch(self, m_target: np.ndarray, m_obs: np.ndarray, b: np.ndarray, ufr: float, alpha: np.ndarray) -> np.ndarray:
+        """
+        Batched SWExtrapolate. Interpolates or/and extrapolates rates for several calibrated curves at once. The
+        heart of the Wilson function is evaluated for all curves in one broadcast operation instead of one matrix per curve.
+
+        Parameters
+        ----------
+            :type m_target : y x k ndarray. Row i contains the maturities of interest for curve i. Ex. M_Target = [[1, 2, 3, 5]]
+            :type m_obs :    y x n ndarray. Row i contains the observed maturities used to calibrate curve i. Curves with less than n
+                             liquid points are padded with NaN at the end of the row. Ex. M_Obs = [[1, 3], [1, NaN]]
+            :type b :        y x n ndarray of calibration vectors, NaN padded in the same way as m_obs.
+            :type ufr :      float representing the ultimate forward rate. Ex. ufr = 0.042
+            :type alpha :    y x 1 ndarray of the convergence speed parameters of each curve. Ex. alpha = [0.05, 0.1]
+
+        Returns
+        -------
+        :rtype y x k ndarray. Element [i, j] is the rate of curve i for the maturity m_target[i, j].
+
+        For more information see https://www.eiopa.europa.eu/sites/default/files/risk_free_interest_rate/12092019-technical_documentation.pdf
+        """
+        m_target = np.atleast_2d(np.asarray(m_target, dtype=float))
+        m_obs = np.atleast_2d(np.asarray(m_obs, dtype=float))
+        b = np.atleast_2d(np.asarray(b, dtype=float))
+        alpha = np.asarray(alpha, dtype=float).reshape(-1, 1, 1)
+
+        is_liquid = ~np.isnan(m_obs)
+        m_obs = np.where(is_liquid, m_obs, 0.)                                            # Padded points get zero weight in d * b below
+        db = np.where(is_liquid, np.exp(-np.log(1+ufr) * m_obs) * b, 0.)                  # Q @ b from paragraph 139 for every curve
+
+        uv_sum = m_target[:, :, np.newaxis] + m_obs[:, np.newaxis, :]
+        uv_diff = np.absolute(m_target[:, :, np.newaxis] - m_obs[:, np.newaxis, :])
+        H = 0.5 * (alpha * uv_sum + np.exp(-alpha * uv_sum) - alpha * uv_diff - np.exp(-alpha * uv_diff)) # y x k x n stack of Wilson hearts from paragraph 132
+
+        d_target = np.exp(-np.log(1+ufr) * m_target)
+        p = d_target * (1 + np.einsum("ykn,yn->yk", H, db))                                # Discount pricing function from paragraph 147
+        return p ** (-1/ m_target) -1
+
     def Galfa(self, m_obs: np.ndarray, r_obs: np.ndarray, ufr: float, alpha: float, tau: float) -> float:
         """
         Calculates the gap at the convergence point between the allowable tolerance tau and the curve extrapolated using the Smith-Wilson algorithm.
@@ -298,16 +817,8 @@ class Curves:
         
         Implemented by Gregor Fabjan from Qnity Consultants on 17/12/2021.
         """
-        
-        U = max(m_obs)                                # Find maximum liquid maturity from input
-        T = max(U + 40, 60)                             # Define the convergence point as defined in paragraph 120 and again in 157
-        C = np.identity(m_obs.size)                   # Construct cash flow matrix described in paragraph 137 assuming the input is ZCB bonds with notional value of 1
-        d = np.exp(-np.log(1 + ufr) * m_obs)            # Calculate vector d described in paragraph 138
-        Q = np.diag(d) @ C                            # Matrix Q described in paragraph 139
-        b = self.SWCalibrate(r_obs, m_obs, ufr, alpha)     # Calculate the calibration vector b using the equation from paragraph 149
 
-        K = (1+alpha * m_obs @ Q@ b) / (np.sinh(alpha * m_obs.transpose())@ Q@ b) # Calculate kappa as defined in the paragraph 155
-        return( alpha/np.abs(1 - K*np.exp(alpha*T))-tau) # Size of the gap at the convergence point between the allowable tolerance Tau and the actual curve. Defined in paragraph 158
+        return AlphaObjective(m_obs, r_obs, ufr, tau)(alpha)
 
     def BisectionAlpha(self, x_start: float, x_end: float, m_obs: np.ndarray, r_obs: np.ndarray, ufr: float, tau: float, precision: float, max_iter: int) -> float | None:
         """
@@ -348,27 +859,56 @@ class Curves:
         Implemented by Gregor Fabjan from Qnity Consultants on 17/12/2021.
         """   
 
-        y_start = self.Galfa(m_obs, r_obs, ufr, x_start, tau) # Check if the initial point is a solution
-        y_end = self.Galfa(m_obs, r_obs, ufr, x_end, tau) # Check if the final point is a solution
-        if np.abs(y_start) < precision:
-            #self.alpha = xStart # If initial point already satisfies the conditions return start point
-            return x_start
-        if np.abs(y_end) < precision:
-            #self.alpha = xEnd
-            return x_end # If final point already satisfies the conditions return end point
-        i_iter = 0
-        while i_iter <= max_iter:
-            x_mid = (x_end+x_start)/2 # calculate mid-point 
-            y_mid = self.Galfa(m_obs, r_obs, ufr, x_mid, tau) # What is the solution at midpoint
-
-            if (y_mid == 0 or (x_end-x_start)/2 < precision): # Solution found
-                #self.alpha = xMid
-                return x_mid
-            else: # Solution not found
-                i_iter += 1
-                if np.sign(y_mid) == np.sign(y_start): # If the start point and the middle point have the same sign, then the root must be in the second half of the interval   
-                    x_start = x_mid
-                else: # If the start point and the middle point have a different sign than by mean value theorem the interval must contain at least one root
-                    x_end = x_mid
-        #self.alpha = None
-        return None
\ No newline at end of file
+        alpha, _ = bisection_root(AlphaObjective(m_obs, r_obs, ufr, tau), x_start, x_end, precision, max_iter)
+        return alpha
+
+
+class AlphaObjective:
+    def __init__(self, m_obs: np.ndarray, r_obs: np.ndarray, ufr: float, tau: float) -> None:
+        """
+        The Galfa function of one curve as a callable of alpha only. Everything that does not depend on alpha
+        (the convergence point, the vector d, the market prices and the minimum of each pair of maturities) is
+        calculated once when the object is created. Instances can be passed to any root finder in RootFinding.
+
+        Each evaluation builds the heart of the Wilson function from n exponentials instead of n x n, using
+        exp(-alpha * (u + v)) = exp(-alpha * u) * exp(-alpha * v) and alpha * (u + v) - alpha * |u - v| = 2 * alpha * min(u, v),
+        and solves for the calibration vector b with a single linear solve.
+
+        Parameters
+        ----------
+            :type m_obs : n x 1 ndarray of maturities of bonds, that have rates provided in input (r). Ex. u=[[1], [3]]
+            :type r_obs : n x 1 ndarray of rates, for which you wish to calibrate the algorithm. Ex. r = [[0.0024], [0.0034]]
+            :type ufr :   1 x 1 floating number, representing the ultimate forward rate. Ex. ufr = 0.042
+            :type tau :   1 x 1 floating number representing the allowed difference between ufr and actual curve. Ex. tau = 0.00001
+        """
+        self.m_obs = np.asarray(m_obs, dtype=float)
+        self.tau = tau
+        self.T = max(max(self.m_obs) + 40, 60)                  # Convergence point as defined in paragraph 120 and again in 157
+        self.d = np.exp(-np.log(1 + ufr) * self.m_obs)          # Vector d described in paragraph 138. With ZCB inputs Q = diag(d), paragraph 139
+        self.dd = np.outer(self.d, self.d)                      # Scaling of H to Q^T H Q
+        self.price_gap = (1+np.asarray(r_obs, dtype=float)) ** (-self.m_obs) - self.d # Market prices of the ZCB bonds minus q from paragraph 149
+        self.min_uv = np.minimum.outer(self.m_obs, self.m_obs)
+
+    def __call__(self, alpha: float) -> float:
+        """
+        Gap at the convergence point between the allowable tolerance tau and the curve calibrated with alpha. See Curves.Galfa.
+        """
+        if kernels.enabled:
+            H = kernels.sw_heart(self.m_obs, self.m_obs, alpha)
+        else:
+            e = np.exp(-alpha * self.m_obs)
+            e_ratio = np.outer(e, 1 / e)                        # exp(-alpha * (u - v)), equal to exp(-alpha * |u - v|) where it is at most 1
+            H = alpha * self.min_uv + 0.5 * (np.outer(e, e) - np.minimum(e_ratio, e_ratio.transpose())) # Heart of the Wilson function from paragraph 132
+        b = np.linalg.solve(self.dd * H, self.price_gap)        # Calibration vector b from paragraph 149
+
+        K = (1+(alpha * self.m_obs * self.d) @ b) / ((np.sinh(alpha * self.m_obs) * self.d) @ b) # Kappa as defined in the paragraph 155
+        return alpha/np.abs(1 - K*np.exp(alpha*self.T))-self.tau # Defined in paragraph 158
+
+
+def _calibrate_year(ufr: float, precision: float, tau: float, m_obs: np.ndarray, r_obs: np.ndarray, method: str, ini_guess: float, end: float, max_iter: int) -> Tuple[float | None, int, np.ndarray]:
+    """
+    Calibrate a single projection year on a worker of the thread or process pool used by Curves.CalibrateProjected.
+    Every call uses its own Curves instance, so that workers do not share the factorization cache.
+    """
+    curves = Curves(ufr, precision, tau, None, None)
+    return curves.CalibrateYear(m_obs, r_obs, method, ini_guess, end, max_iter)
@@ -0,0 +1,142 @@
+import numpy as np
+from typing import Iterator
+from CurvesClass import Curves
+
+
+class HullWhite:
+    def __init__(self, curves: Curves, mean_reversion: float, volatility: float, proj_step: int = 0) -> None:
+        """
+        Hull-White one factor short rate model fitted to the risk free term structure of a calibrated Curves instance.
+        The short rate is written as r(t) = x(t) + phi(t), where x is an Ornstein-Uhlenbeck process starting at 0
+        and phi(t) is chosen so that the model reproduces the market discount factors P(0, T) exactly. With this
+        representation the zero coupon bond prices P(t, t + m) are known in closed form for every simulated x(t).
+
+        Parameters
+        ----------
+        :type curves: Curves
+            Instance of the Curves class with calibrated term structure
+        :type mean_reversion: float
+            Mean reversion speed a of the short rate. Ex. 0.05
+        :type volatility: float
+            Volatility sigma of the short rate. Ex. 0.01
+        :type proj_step: int
+            Projection year of the Curves instance used as the initial term structure
+
+        For more information see Brigo, Mercurio: Interest Rate Models - Theory and Practice, chapter 3.3
+        """
+        if mean_reversion <= 0:
+            raise ValueError("mean_reversion must be positive")
+        if volatility < 0:
+            raise ValueError("volatility must not be negative")
+        self.curves = curves
+        self.mean_reversion = mean_reversion
+        self.volatility = volatility
+        self.proj_step = proj_step
+
+    def MarketDiscount(self, t: np.ndarray) -> np.ndarray:
+        """
+        Market discount factors P(0, t) of the initial term structure. The discount factor at t = 0 is 1.
+
+        Parameters
+        ----------
+        :type t: np.ndarray
+            Array of times in years
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Discount factors of the same shape as t
+        """
+        t = np.asarray(t, dtype=float)
+        discount = np.ones(t.shape)
+        positive = t > 0
+        discount[positive] = (1 + self.curves.RiskFreeYields(self.proj_step, t[positive])) ** (-t[positive])
+        return discount
+
+    def _B(self, tau: np.ndarray) -> np.ndarray:
+        a = self.mean_reversion
+        return (1 - np.exp(-a * tau)) / a
+
+    def _V(self, tau: np.ndarray) -> np.ndarray:
+        # Variance of the integral of x over an interval of length tau
+        a = self.mean_reversion
+        return self.volatility ** 2 / a ** 2 * (tau + 2 / a * np.exp(-a * tau) - 1 / (2 * a) * np.exp(-2 * a * tau) - 3 / (2 * a))
+
+    def SimulateFactor(self, n_scenarios: int, n_years: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Simulate the Ornstein-Uhlenbeck factor x on a yearly grid with the exact transition density.
+
+        Parameters
+        ----------
+        :type n_scenarios: int
+            Number of scenarios
+        :type n_years: int
+            Number of simulated years. The factor is returned for years 0, 1, ..., n_years
+        :type rng: np.random.Generator
+            Random number generator
+
+        Returns
+        -------
+        :rtype np.ndarray
+            n_scenarios x (n_years + 1) matrix of the factor. The first column is 0
+        """
+        decay = np.exp(-self.mean_reversion)
+        std = self.volatility * np.sqrt((1 - np.exp(-2 * self.mean_reversion)) / (2 * self.mean_reversion))
+        shocks = rng.standard_normal((n_scenarios, n_years))
+        x = np.zeros((n_scenarios, n_years + 1))
+        for year in range(1, n_years + 1):
+            x[:, year] = x[:, year - 1] * decay + std * shocks[:, year - 1]
+        return x
+
+    def DiscountChunks(self, n_scenarios: int, n_years: int, maturities: np.ndarray, seed: int, chunk_size: int = 1000) -> Iterator[np.ndarray]:
+        """
+        Generate the scenario discount factors in chunks of at most chunk_size scenarios, so that the memory use is
+        bounded by chunk_size x (n_years + 1) x len(maturities). The random numbers are drawn sequentially from one
+        generator, so the scenarios do not depend on the chunk size.
+
+        Parameters
+        ----------
+        :type n_scenarios: int
+            Total number of scenarios
+        :type n_years: int
+            Number of projection years. Discount curves are generated for years 0, 1, ..., n_years
+        :type maturities: np.ndarray
+            k x 1 vector of maturities in years, measured from each projection year. Ex. np.arange(1, 51)
+        :type seed: int
+            Seed of the random number generator
+        :type chunk_size: int
+            Maximum number of scenarios per chunk
+
+        Returns
+        -------
+        :rtype generator
+            Generator yielding chunks of the discount tensor of shape scenarios x (n_years + 1) x k.
+            Element [s, y, j] is the price P(y, y + maturities[j]) at year y in scenario s
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        maturities = np.asarray(maturities, dtype=float)
+        years = np.arange(n_years + 1, dtype=float)[:, np.newaxis]
+
+        # Deterministic part of log P(y, y + m) = log P(0, y + m) - log P(0, y) - B(m) x(y) + (V(m) - V(y + m) + V(y)) / 2
+        log_forward = np.log(self.MarketDiscount(years + maturities[np.newaxis, :])) - np.log(self.MarketDiscount(years))
+        convexity = 0.5 * (self._V(maturities)[np.newaxis, :] - self._V(years + maturities[np.newaxis, :]) + self._V(years))
+        deterministic = log_forward + convexity
+        B = self._B(maturities)
+
+        rng = np.random.default_rng(seed)
+        for chunk_start in range(0, n_scenarios, chunk_size):
+            x = self.SimulateFactor(min(chunk_size, n_scenarios - chunk_start), n_years, rng)
+            yield np.exp(deterministic[np.newaxis, :, :] - B[np.newaxis, np.newaxis, :] * x[:, :, np.newaxis])
+
+    def GenerateDiscount(self, n_scenarios: int, n_years: int, maturities: np.ndarray, seed: int, chunk_size: int = 1000) -> np.ndarray:
+        """
+        Generate the full scenarios x (n_years + 1) x k tensor of discount factors. See DiscountChunks.
+        """
+        maturities = np.asarray(maturities, dtype=float)
+        discount = np.empty((n_scenarios, n_years + 1, maturities.size))
+        chunk_start = 0
+        for chunk in self.DiscountChunks(n_scenarios, n_years, maturities, seed, chunk_size):
+            discount[chunk_start:chunk_start + chunk.shape[0]] = chunk
+            chunk_start += chunk.shape[0]
+        return discount
@@ -4,13 +4,14 @@ import csv
 import configparser
 from typing import Any, Iterator, Optional
 from ConfigurationClass import Configuration
-from BondClasses import CorpBond
+from BondClasses import CorpBond, BondBook
 from EquityClasses import EquityShare
 from SettingsClasses import Settings
 from datetime import datetime
 from CashClass import Cash
 from LiabilityClasses import Liability, UnitLinkedPolicy, UnitLinkedFund
 from SocietyClass import Society
+from SectorSpreadClass import SectorSpreadIndex
 
 
 def get_configuration(ini_file: str, op_sys: Any = os, config_parser: Optional[configparser.ConfigParser] = None) -> Configuration:
@@ -101,6 +102,18 @@ def get_configuration(ini_file: str, op_sys: Any = os, config_parser: Optional[c
         inp = config_parser["INPUT"]
         output_path = os.path.join(configuration.base_folder, inp["output_path"])
         configuration.output_path = output_path
+
+    if "CURVE_CACHE" in config_parser:
+        curve_cache = config_parser["CURVE_CACHE"]
+        configuration.curve_cache_enabled = curve_cache.getboolean("enabled")
+        configuration.curve_cache_path = os.path.join(configuration.base_folder, curve_cache["file_path"])
+    else:
+        configuration.curve_cache_enabled = False
+
+    if "PERFORMANCE" in config_parser:
+        configuration.numba_enabled = config_parser["PERFORMANCE"].getboolean("numba_enabled", fallback=False)
+    else:
+        configuration.numba_enabled = False
         
     return configuration
 
@@ -127,13 +140,44 @@ def import_SWEiopa(param_file: str, curves_file: str, country: str) -> tuple[pd.
     """
     
     param_raw = pd.read_csv(param_file, sep=",", index_col=0)
+    curve_raw = pd.read_csv(curves_file, sep=",", index_col=0)
+    return _slice_SWEiopa(param_raw, curve_raw, country)
+
+
+def import_SWEiopa_countries(param_file: str, curves_file: str, countries: list[str]) -> dict[str, list[pd.Series]]:
+    """
+    Load the input files related to the risk free curve once and slice out the liquid maturities, yields and the
+    Smith&Wilson parameters of several countries.
+
+    Parameters
+    ----------
+    :type param_file: string
+        Relative path to the risk-free-curve parameter file input file
+
+    :type curves_file: string
+        Relative path to the risk-free-curve shape input file
+
+    :type countries: list of strings
+        Country names used to filter the curves and parameters from the files
+
+    Returns
+    -------
+    :type dict
+        Dictionary with the country name as key and the same list of 4 Pandas series as returned by import_SWEiopa as value
+    """
+
+    param_raw = pd.read_csv(param_file, sep=",", index_col=0)
+    curve_raw = pd.read_csv(curves_file, sep=",", index_col=0)
+    return {country: _slice_SWEiopa(param_raw, curve_raw, country) for country in countries}
+
+
+def _slice_SWEiopa(param_raw: pd.DataFrame, curve_raw: pd.DataFrame, country: str) -> list[pd.Series]:
     maturities_country_raw = param_raw.loc[:, country + "_Maturities"].iloc[6:]
     param_country_raw = param_raw.loc[:, country + "_Values"].iloc[6:]
     extra_param = param_raw.loc[:, country + "_Values"].iloc[:6]
     relevant_positions = pd.notna(maturities_country_raw.values)
     maturities_country = maturities_country_raw.iloc[relevant_positions]
     Qb = param_country_raw.iloc[relevant_positions]
-    curve_raw = pd.read_csv(curves_file, sep=",", index_col=0)
     curve_country = curve_raw.loc[:, country]
     return [maturities_country, curve_country, extra_param, Qb]
 
@@ -175,6 +219,60 @@ def get_corporate_bonds(filename: str) -> Iterator[CorpBond]:
             yield corp_bond
 
 
+def get_bond_book(filename: str) -> BondBook:
+    """
+    Load the bond input file into a columnar BondBook without creating a CorpBond per row. The file has the
+    same format as for get_corporate_bonds.
+
+    Parameters
+    ----------
+    :type filename: string
+        Relative path to the corporate bond input file
+
+    Returns
+    -------
+    :type BondBook
+        Bond book with one position per CSV row
+    """
+
+    bonds = pd.read_csv(filename, encoding="utf-8-sig", dtype={"NACE": str})
+    columns = {"asset_id": bonds["Asset_ID"],
+               "nace": bonds["NACE"],
+               "issue_date": pd.to_datetime(bonds["Issue_Date"], format="%d/%m/%Y").values.astype("datetime64[D]"),
+               "maturity_date": pd.to_datetime(bonds["Maturity_Date"], format="%d/%m/%Y").values.astype("datetime64[D]"),
+               "coupon_rate": bonds["Coupon_Rate"],
+               "notional_amount": bonds["Notional_Amount"],
+               "spread_country": bonds["Spread_Country"],
+               "spread_sector": bonds["Spread_Sector"],
+               "zspread": bonds["Z_Spread"],
+               "spread_stress": bonds["Spread_Stress"],
+               "frequency": bonds["Frequency"],
+               "recovery_rate": bonds["Recovery_Rate"],
+               "default_probability": bonds["Default_Probability"],
+               "units": bonds["Units"],
+               "market_price": bonds["Market_Price"]}
+    return BondBook.from_columns(columns)
+
+
+def get_sector_spreads(filename: str) -> SectorSpreadIndex:
+    """
+    Load the sector spread input file into a SectorSpreadIndex over its NACE codes.
+
+    Parameters
+    ----------
+    :type filename: string
+        Relative path to the sector spread input file. Columns NACE, NACE code text and sSpread
+
+    Returns
+    -------
+    :type SectorSpreadIndex
+        Index returning the spread of the most specific available NACE code
+    """
+
+    spreads = pd.read_csv(filename, encoding="utf-8-sig", dtype={"NACE": str})
+    return SectorSpreadIndex(codes=spreads["NACE"].to_numpy(dtype=str), spreads=spreads["sSpread"].to_numpy(dtype=float))
+
+
 def get_EquityShare(filename: str) -> Iterator[EquityShare]:
     """
     Load an equity input file into an EquityShare class generator.
@@ -290,7 +388,10 @@ def get_settings(filename: str) -> Settings:
                            compounding=int(read_dict["compounding"]),
                            modelling_date=datetime.strptime(read_dict["Modelling_Date"], '%d/%m/%Y').date(),
                            liability_mode=read_dict.get("liability_mode", "cashflow").strip(),
-                           random_seed=int(read_dict.get("random_seed", "42")))
+                           random_seed=int(read_dict.get("random_seed", "42")),
+                           alpha_solver=read_dict.get("alpha_solver", "bisection").strip(),
+                           discount_grid_step=float(read_dict.get("discount_grid_step", "0")),
+                           discount_grid_tolerance=float(read_dict.get("discount_grid_tolerance", "1E-6")))
 
         return setting
 
@@ -0,0 +1,106 @@
+import math
+import numpy as np
+from typing import Tuple
+
+try:
+    import numba
+except ImportError:  # Numba is optional, without it the NumPy implementations are used
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+
+def _sw_heart(u: np.ndarray, v: np.ndarray, alpha: float) -> np.ndarray:
+    # Heart of the Wilson function from paragraph 132, same as Curves.SWHeart
+    H = np.empty((u.size, v.size))
+    for i in range(u.size):
+        for j in range(v.size):
+            uv_sum = u[i] + v[j]
+            uv_diff = abs(u[i] - v[j])
+            H[i, j] = 0.5 * (alpha * uv_sum + math.exp(-alpha * uv_sum) - alpha * uv_diff - math.exp(-alpha * uv_diff))
+    return H
+
+
+def _sw_extrapolate(m_target: np.ndarray, m_obs: np.ndarray, b: np.ndarray, ufr: float, alpha: float) -> np.ndarray:
+    # Smith & Wilson rates for the target maturities, same as Curves.SWExtrapolate
+    log_ufr = math.log(1 + ufr)
+    db = np.empty(m_obs.size)
+    for j in range(m_obs.size):
+        db[j] = math.exp(-log_ufr * m_obs[j]) * b[j]
+    rates = np.empty(m_target.size)
+    for i in range(m_target.size):
+        total = 0.
+        for j in range(m_obs.size):
+            uv_sum = m_target[i] + m_obs[j]
+            uv_diff = abs(m_target[i] - m_obs[j])
+            total += 0.5 * (alpha * uv_sum + math.exp(-alpha * uv_sum) - alpha * uv_diff - math.exp(-alpha * uv_diff)) * db[j]
+        price = math.exp(-log_ufr * m_target[i]) * (1 + total)
+        rates[i] = price ** (-1 / m_target[i]) - 1
+    return rates
+
+
+def _bisection_spread(cash_flows: np.ndarray, date_frac: np.ndarray, yields: np.ndarray, market_price: float, x_start: float, x_end: float, precision: float, max_iter: int) -> Tuple[float, bool]:
+    # Same algorithm as CorpBond.bisection_spread for a bond price sum(cash_flows * (1 + yields + spread) ** -date_frac)
+    def price_gap(spread: float) -> float:
+        value = 0.
+        for i in range(cash_flows.size):
+            value += cash_flows[i] * (1 + (yields[i] + spread)) ** (-date_frac[i])
+        return value - market_price
+
+    y_start = price_gap(x_start)
+    y_end = price_gap(x_end)
+    if abs(y_start) < precision:
+        return x_start, True
+    if abs(y_end) < precision:
+        return x_end, True
+    i_iter = 0
+    x_mid = (x_end + x_start) / 2
+    while i_iter <= max_iter:
+        x_mid = (x_end + x_start) / 2
+        y_mid = price_gap(x_mid)
+        if y_mid == 0 or (x_end - x_start) / 2 < precision:
+            return x_mid, True
+        i_iter += 1
+        if np.sign(y_mid) == np.sign(y_start):
+            x_start = x_mid
+        else:
+            x_end = x_mid
+    return x_mid, False
+
+
+class KernelBackend:
+    def __init__(self) -> None:
+        """
+        Switch between the NumPy implementations and the Numba compiled kernels of the Smith & Wilson algorithm and
+        of the bond spread bisection. The kernels are only compiled if Numba is installed. Without Numba, enabling
+        the backend has no effect and the NumPy implementations are used.
+        """
+        self.enabled = False
+        if NUMBA_AVAILABLE:
+            self.sw_heart = numba.njit(cache=True)(_sw_heart)
+            self.sw_extrapolate = numba.njit(cache=True)(_sw_extrapolate)
+            self.bisection_spread = numba.njit(cache=True)(_bisection_spread)
+        else:
+            self.sw_heart = _sw_heart
+            self.sw_extrapolate = _sw_extrapolate
+            self.bisection_spread = _bisection_spread
+
+    def enable(self, enabled: bool) -> bool:
+        """
+        Enable or disable the compiled kernels.
+
+        Parameters
+        ----------
+        :type enabled: bool
+            True to use the compiled kernels
+
+        Returns
+        -------
+        :rtype bool
+            True if the compiled kernels are in use. False if they are disabled or Numba is not installed
+        """
+        self.enabled = enabled and NUMBA_AVAILABLE
+        return self.enabled
+
+
+kernels = KernelBackend()
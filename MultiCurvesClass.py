@@ -0,0 +1,132 @@
+import datetime
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, List
+from CurvesClass import Curves
+from ImportData import import_SWEiopa_countries
+
+
+class MultiCurves:
+    def __init__(self, precision: float, tau: float, initial_date: datetime.date) -> None:
+        """
+        Collection of risk free curves of several countries. The EIOPA input files are read once for all
+        countries and the calibrations of the countries are run concurrently. The curve of a country is
+        retrieved with curves[country].
+
+        Parameters
+        ----------
+        :type precision: float
+            Precision of the calibration of alpha, shared by all curves
+        :type tau: float
+            Allowed difference between the ufr and the extrapolated curve, shared by all curves
+        :type initial_date: datetime.date
+            Modelling date of the curves
+        """
+        self.precision = precision
+        self.tau = tau
+        self.initial_date = initial_date
+        self.curves: Dict[str, Curves] = {}
+
+    def __getitem__(self, country: str) -> Curves:
+        return self.curves[country]
+
+    def __contains__(self, country: str) -> bool:
+        return country in self.curves
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.curves)
+
+    def __len__(self) -> int:
+        return len(self.curves)
+
+    @property
+    def countries(self) -> List[str]:
+        return list(self.curves)
+
+    def LoadEiopa(self, param_file: str, curves_file: str, countries: List[str]) -> None:
+        """
+        Read the EIOPA parameter and curve files once, create a Curves instance for each country with its own ufr
+        and calculate the 1-year forward rates of each country.
+
+        Parameters
+        ----------
+        :type param_file: str
+            Relative path to the risk-free-curve parameter file input file
+        :type curves_file: str
+            Relative path to the risk-free-curve shape input file
+        :type countries: list of str
+            Country names as used in the EIOPA files. Ex. ["Slovenia", "Germany"]
+        """
+        eiopa_data = import_SWEiopa_countries(param_file, curves_file, countries)
+        for country, (_, curve_country, extra_param, _) in eiopa_data.items():
+            curves = Curves(extra_param["UFR"]/100, self.precision, self.tau, self.initial_date, country)
+            curves.SetObservedTermStructure(maturity_vec=curve_country.index.to_numpy(dtype=float), yield_vec=curve_country.values)
+            curves.CalcFwdRates()
+            self.curves[country] = curves
+
+    def CalibrateProjected(self, n_years: int, ini_guess: float, end: float, max_iter: int, method: str = "bisection", warm_start: bool = False, executor: str = "serial", n_workers: int | None = None) -> None:
+        """
+        Project the spot curves of all countries for n_years years and calibrate them. The countries are
+        distributed over the workers, within a country the projection years are calibrated serially so that
+        warm_start can be used. The results are identical to calling ProjectForwardRate and CalibrateProjected
+        on each Curves instance.
+
+        Parameters
+        ----------
+        :type n_years: integer
+            The number of required yearly projections
+        :type ini_guess: float
+            Initial guess of the parameter alpha in the calibration
+        :type end: float
+            Upper limit of the parameter alpha in the calibration
+        :type max_iter: integer
+            Maximum number of iteration of the calibration algorithm
+        :type method: str
+            Root finding algorithm used for alpha. One of "bisection", "brent" or "newton"
+        :type warm_start: bool
+            If True, the search for alpha in each projection year starts from the alpha of the previous year
+        :type executor: str
+            One of "serial", "thread" (thread pool) or "process" (process pool)
+        :type n_workers: int
+            Number of workers of the thread or process pool. If None, the default of concurrent.futures is used
+        """
+        if executor not in ("serial", "thread", "process"):
+            raise ValueError("executor must be either serial, thread or process")
+
+        countries = self.countries
+        n_tasks = len(countries)
+        arguments = ([self.curves[country] for country in countries], [n_years] * n_tasks, [ini_guess] * n_tasks, [end] * n_tasks,
+                     [max_iter] * n_tasks, [method] * n_tasks, [warm_start] * n_tasks)
+        if executor == "serial":
+            results = list(map(_calibrate_country, *arguments))
+        else:
+            pool = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+            with pool(max_workers=n_workers) as workers:
+                results = list(workers.map(_calibrate_country, *arguments))
+
+        for country, calibration in zip(countries, results):
+            self.curves[country].ImportCalibration(calibration)
+
+    def ExportCalibration(self) -> Dict[str, np.ndarray]:
+        """
+        Export the projected curves and calibrations of all countries as one dictionary of numeric arrays.
+        The keys are the keys of Curves.ExportCalibration prefixed with the country name. Ex. "Slovenia/alpha"
+        """
+        return {country + "/" + name: values for country, curves in self.curves.items() for name, values in curves.ExportCalibration().items()}
+
+    def ImportCalibration(self, data: Dict[str, np.ndarray]) -> None:
+        """
+        Populate the projected curves and calibrations of the loaded countries from arrays created by ExportCalibration.
+        """
+        for country, curves in self.curves.items():
+            prefix = country + "/"
+            curves.ImportCalibration({name[len(prefix):]: values for name, values in data.items() if name.startswith(prefix)})
+
+
+def _calibrate_country(curves: Curves, n_years: int, ini_guess: float, end: float, max_iter: int, method: str, warm_start: bool) -> Dict[str, np.ndarray]:
+    """
+    Project and calibrate the curves of one country. Defined on module level so that it can be sent to a process pool.
+    """
+    curves.ProjectForwardRate(n_years)
+    curves.CalibrateProjected(n_years, ini_guess, end, max_iter, method=method, warm_start=warm_start)
+    return curves.ExportCalibration()
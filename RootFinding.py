@@ -0,0 +1,227 @@
+import numpy as np
+from typing import Callable, Optional, Tuple
+
+WARM_START_WIDTH = 0.01  # Half width of the bracket tried around a warm start guess
+
+
+def bisection_root(func: Callable[[float], float], x_start: float, x_end: float, precision: float, max_iter: int) -> Tuple[Optional[float], int]:
+    """
+    Bisection root finding algorithm. Same algorithm as Curves.BisectionAlpha, but for an arbitrary function
+    of one variable and also reporting the number of function evaluations.
+
+    Parameters
+    ----------
+    :type func: callable
+        Function of one float variable for which the root is searched
+    :type x_start: float
+        Lower end of the interval containing the root
+    :type x_end: float
+        Upper end of the interval containing the root
+    :type precision: float
+        Precision of the calculation. The algorithm stops when the interval is narrower than 2 * precision
+    :type max_iter: int
+        Maximum number of iterations allowed
+
+    Returns
+    -------
+    :rtype tuple
+        The root (None if the algorithm did not converge) and the number of function evaluations
+    """
+    y_start = func(x_start)
+    y_end = func(x_end)
+    n_eval = 2
+    if np.abs(y_start) < precision:
+        return x_start, n_eval
+    if np.abs(y_end) < precision:
+        return x_end, n_eval
+    i_iter = 0
+    while i_iter <= max_iter:
+        x_mid = (x_end + x_start) / 2
+        y_mid = func(x_mid)
+        n_eval += 1
+        if (y_mid == 0 or (x_end - x_start) / 2 < precision):
+            return x_mid, n_eval
+        else:
+            i_iter += 1
+            if np.sign(y_mid) == np.sign(y_start):
+                x_start = x_mid
+            else:
+                x_end = x_mid
+    return None, n_eval
+
+
+def _initial_bracket(func: Callable[[float], float], x_start: float, x_end: float, x_guess: Optional[float]) -> Tuple[float, float, float, float, int]:
+    """
+    Select the starting bracket of the Brent and Newton algorithms. If a warm start guess is given, a narrow bracket
+    of half width WARM_START_WIDTH around the guess is tried first. If the function does not change sign on the narrow
+    bracket, the full interval [x_start, x_end] is used.
+
+    Returns
+    -------
+    :rtype tuple
+        Lower end, upper end, function values at both ends and the number of function evaluations
+    """
+    n_eval = 0
+    if x_guess is not None and x_start < x_guess < x_end:
+        x_low = max(x_start, x_guess - WARM_START_WIDTH)
+        x_high = min(x_end, x_guess + WARM_START_WIDTH)
+        y_low = func(x_low)
+        y_high = func(x_high)
+        n_eval += 2
+        if np.sign(y_low) != np.sign(y_high):
+            return x_low, x_high, y_low, y_high, n_eval
+    y_start = func(x_start)
+    y_end = func(x_end)
+    n_eval += 2
+    return x_start, x_end, y_start, y_end, n_eval
+
+
+def brent_root(func: Callable[[float], float], x_start: float, x_end: float, precision: float, max_iter: int, x_guess: Optional[float] = None) -> Tuple[Optional[float], int]:
+    """
+    Brent root finding algorithm combining bisection, secant and inverse quadratic interpolation steps.
+    If the function does not change sign on [x_start, x_end], x_end is returned. This is the point the
+    bisection algorithm converges to in that case.
+
+    Parameters
+    ----------
+    :type func: callable
+        Function of one float variable for which the root is searched
+    :type x_start: float
+        Lower end of the interval containing the root
+    :type x_end: float
+        Upper end of the interval containing the root
+    :type precision: float
+        Precision of the calculation. Maximum distance between the returned point and the root
+    :type max_iter: int
+        Maximum number of iterations allowed
+    :type x_guess: float
+        Optional warm start guess of the root. Ex. the root found for the previous projection year
+
+    Returns
+    -------
+    :rtype tuple
+        The root (None if the algorithm did not converge) and the number of function evaluations
+
+    For more information see https://en.wikipedia.org/wiki/Brent%27s_method
+    """
+    a, b, fa, fb, n_eval = _initial_bracket(func, x_start, x_end, x_guess)
+    if np.abs(fa) < precision:
+        return a, n_eval
+    if np.abs(fb) < precision:
+        return b, n_eval
+    if np.sign(fa) == np.sign(fb):  # No sign change, the bisection algorithm would converge to the upper end
+        return x_end, n_eval
+
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if np.sign(fb) == np.sign(fc):  # Keep the root between b and c
+            c, fc = a, fa
+            d = e = b - a
+        if np.abs(fc) < np.abs(fb):  # b is the best estimate so far
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2 * np.finfo(float).eps * np.abs(b) + 0.5 * precision
+        m = 0.5 * (c - b)
+        if np.abs(m) <= tol or fb == 0:
+            return b, n_eval
+        if np.abs(e) >= tol and np.abs(fa) > np.abs(fb):
+            s = fb / fa
+            if a == c:  # Secant step
+                p = 2 * m * s
+                q = 1 - s
+            else:  # Inverse quadratic interpolation
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            else:
+                p = -p
+            if 2 * p < min(3 * m * q - np.abs(tol * q), np.abs(e * q)):  # Accept interpolation
+                e = d
+                d = p / q
+            else:  # Interpolation failed, fall back to bisection
+                d = m
+                e = m
+        else:
+            d = m
+            e = m
+        a, fa = b, fb
+        if np.abs(d) > tol:
+            b = b + d
+        else:
+            b = b + (tol if m > 0 else -tol)
+        fb = func(b)
+        n_eval += 1
+    return None, n_eval
+
+
+def newton_root(func: Callable[[float], float], x_start: float, x_end: float, precision: float, max_iter: int, x_guess: Optional[float] = None) -> Tuple[Optional[float], int]:
+    """
+    Safeguarded Newton root finding algorithm. The derivative is approximated with a forward difference. A bracket
+    around the root is kept during the iterations and a bisection step is taken whenever the Newton step would leave
+    the bracket or does not shrink it fast enough. If the function does not change sign on [x_start, x_end], x_end
+    is returned. This is the point the bisection algorithm converges to in that case.
+
+    Parameters
+    ----------
+    :type func: callable
+        Function of one float variable for which the root is searched
+    :type x_start: float
+        Lower end of the interval containing the root
+    :type x_end: float
+        Upper end of the interval containing the root
+    :type precision: float
+        Precision of the calculation. The algorithm stops when the step is smaller than precision
+    :type max_iter: int
+        Maximum number of iterations allowed
+    :type x_guess: float
+        Optional warm start guess of the root. Ex. the root found for the previous projection year
+
+    Returns
+    -------
+    :rtype tuple
+        The root (None if the algorithm did not converge) and the number of function evaluations
+
+    For more information see https://en.wikipedia.org/wiki/Newton%27s_method
+    """
+    x_low, x_high, y_low, y_high, n_eval = _initial_bracket(func, x_start, x_end, x_guess)
+    if np.abs(y_low) < precision:
+        return x_low, n_eval
+    if np.abs(y_high) < precision:
+        return x_high, n_eval
+    if np.sign(y_low) == np.sign(y_high):  # No sign change, the bisection algorithm would converge to the upper end
+        return x_end, n_eval
+    if y_low > 0:  # Orient the bracket so that func(x_low) < 0 < func(x_high)
+        x_low, x_high = x_high, x_low
+
+    x = x_guess if (x_guess is not None and min(x_low, x_high) < x_guess < max(x_low, x_high)) else (x_low + x_high) / 2
+    dx_old = dx = np.abs(x_high - x_low)
+    y = func(x)
+    n_eval += 1
+    for _ in range(max_iter):
+        if y == 0:
+            return x, n_eval
+        h = np.sqrt(np.finfo(float).eps) * max(np.abs(x), 1.)
+        dy = (func(x + h) - y) / h  # Forward difference approximation of the derivative
+        n_eval += 1
+        if (dy == 0 or ((x - x_high) * dy - y) * ((x - x_low) * dy - y) > 0  # Newton step out of the bracket
+                or np.abs(2 * y) > np.abs(dx_old * dy)):  # or not decreasing fast enough
+            dx_old = dx
+            dx = (x_high - x_low) / 2
+            x = x_low + dx
+        else:
+            dx_old = dx
+            dx = y / dy
+            x = x - dx
+        if np.abs(dx) < precision:
+            return x, n_eval
+        y = func(x)
+        n_eval += 1
+        if y < 0:
+            x_low = x
+        else:
+            x_high = x
+    return None, n_eval
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+
+
+class SectorSpreadIndex:
+    def __init__(self, codes: Sequence[str], spreads: Sequence[float]) -> None:
+        """
+        Sorted index of sector spreads over hierarchical NACE codes. A code has the form section letter, division,
+        then groups and classes separated by dots. Ex. A, A1, A1.4, A1.4.5. If a code has no spread of its own, the
+        spread of its closest parent is used (A1.4.5 -> A1.4 -> A1 -> A).
+
+        Parameters
+        ----------
+        :type codes: list of str
+            NACE codes with a sector spread. Ex. the NACE column of Sector_Spread.csv
+        :type spreads: list of float
+            Sector spread of each code
+        """
+        codes = np.char.upper(np.char.strip(np.asarray(codes, dtype=str)))
+        spreads = np.asarray(spreads, dtype=float)
+        if codes.shape != spreads.shape:
+            raise ValueError("Each NACE code needs exactly one spread")
+        order = np.argsort(codes)
+        self.codes = codes[order]
+        self.spreads = spreads[order]
+        if np.any(self.codes[1:] == self.codes[:-1]):
+            raise ValueError("NACE codes of the sector spreads must be unique")
+
+    def __len__(self) -> int:
+        return self.codes.size
+
+    @staticmethod
+    def parent_codes(codes: np.ndarray) -> np.ndarray:
+        """
+        Parent of each NACE code: the code without its last dot separated level, or the section letter for a division.
+        The parent of a section is the empty string.
+        """
+        codes = np.asarray(codes, dtype=str)
+        if codes.size == 0:
+            return codes
+        head, separator, _ = np.char.rpartition(codes, ".").T
+        section = np.where(np.char.str_len(codes) > 1, codes.astype("U1"), "") # Casting to one character keeps the section letter
+        return np.where(separator == ".", head, section)
+
+    def resolve(self, codes: Sequence[str]) -> np.ndarray:
+        """
+        Position in self.codes of the most specific code with a spread for each of the given codes, found in one
+        bulk pass per level of the hierarchy. The codes are hashed into distinct codes first, so each distinct code is
+        resolved once and the cost for the instruments is linear.
+
+        Parameters
+        ----------
+        :type codes: list of str
+            NACE codes of the instruments. Ex. BondBook.nace
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Integer array of positions, -1 for codes without a spread on any level and for missing codes (NaN or None)
+        """
+        inverse, unique_codes = pd.factorize(np.asarray(codes, dtype=object))
+        unique_codes = np.char.upper(np.char.strip(np.asarray(unique_codes, dtype=str)))
+        positions = np.full(unique_codes.size, -1)
+        candidates = unique_codes
+        pending = np.arange(unique_codes.size)
+        while pending.size > 0 and self.codes.size > 0:
+            found = np.minimum(np.searchsorted(self.codes, candidates), self.codes.size - 1)
+            matched = self.codes[found] == candidates
+            positions[pending[matched]] = found[matched]
+
+            candidates = self.parent_codes(candidates[~matched])
+            pending = pending[~matched]
+            has_parent = candidates != ""
+            candidates = candidates[has_parent]
+            pending = pending[has_parent]
+        return np.where(inverse >= 0, positions[inverse], -1) # pd.factorize marks missing codes with -1
+
+    def lookup(self, codes: Sequence[str], default: Optional[float] = np.nan) -> np.ndarray:
+        """
+        Sector spread of each instrument, taken from the most specific available level of its NACE code.
+
+        Parameters
+        ----------
+        :type codes: list of str
+            NACE codes of the instruments
+        :type default: float
+            Spread of codes without a spread on any level. If None, such codes raise a KeyError
+
+        Returns
+        -------
+        :rtype np.ndarray
+            Sector spread of each instrument
+        """
+        positions = self.resolve(codes)
+        missing = positions < 0
+        if default is None and np.any(missing):
+            raise KeyError("No sector spread for NACE codes " + ", ".join(np.unique(np.asarray(codes, dtype=str)[missing])[:10]))
+        return np.where(missing, np.nan if default is None else default, self.spreads[np.maximum(positions, 0)] if self.codes.size else np.nan)
@@ -17,6 +17,9 @@ class Settings:
     modelling_date: date
     liability_mode: str = "cashflow"
     random_seed: int = 42
+    alpha_solver: str = "bisection"
+    discount_grid_step: float = 0. # Step of the precomputed discount factor grid in years. 0 disables the grid mode
+    discount_grid_tolerance: float = 1E-6 # Maximum interpolation error of the grid. A weekly grid (step 7/365.25) stays below 1E-6 on the EIOPA curves
     # Declared here and populated in __post_init__ so static analyzers know the attribute exists
     end_date: date = field(init=False)
 
@@ -24,3 +27,7 @@ class Settings:
         self.end_date = self.modelling_date + relativedelta(years=self.n_proj_years)
         if self.liability_mode not in ("cashflow", "unit_linked"):
             raise ValueError("liability_mode must be 'cashflow' or 'unit_linked'")
+        if self.alpha_solver not in ("bisection", "brent", "newton"):
+            raise ValueError("alpha_solver must be 'bisection', 'brent' or 'newton'")
+        if self.discount_grid_step < 0:
+            raise ValueError("discount_grid_step must be 0 (disabled) or positive")
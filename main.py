@@ -6,8 +6,9 @@ import pandas as pd
 from typing import Dict, List, Optional
 from ConfigurationClass import Configuration
 from CurvesClass import Curves
+from CurveCacheClass import CurveCache
 from EquityClasses import EquitySharePortfolio
-from BondClasses import CorpBondPortfolio
+from BondClasses import CorpBondPortfolio, IncrementalBondPricer
 from LiabilityClasses import UnitLinkedPortfolio
 from ImportData import (
     get_configuration,
@@ -16,12 +17,14 @@ from ImportData import (
     get_Cash,
     get_EquityShare,
     get_corporate_bonds,
+    get_sector_spreads,
     get_Liability,
     get_unit_linked_policies,
     get_unit_linked_fund,
     get_society,
 )
 from TraceClass import tracer
+from JitKernels import kernels
 from MainLoop import (
     create_cashflow_dataframe,
     create_liabilities_df,
@@ -78,6 +81,8 @@ def main() -> None:
 
     logger.setLevel(logging_level)
     logger.info("Configuration loaded")
+    if conf.numba_enabled and not kernels.enable(True):
+        logger.warning("numba_enabled is set, but Numba is not installed. Using the NumPy implementation")
 
     parameters_file = conf.input_parameters
     cash_portfolio_file = conf.input_cash_portfolio
@@ -108,10 +113,37 @@ def main() -> None:
     )
     logger.info("Calculate 1-year forward rate")
     curves.CalcFwdRates()
-    logger.info("Calculate projected spot rates")
-    curves.ProjectForwardRate(settings.n_proj_years+1)
-    logger.info("Calculate calibration parameter alpha")
-    curves.CalibrateProjected(settings.n_proj_years+1, 0.05, 0.5, 1000)
+
+    alpha_min, alpha_max, alpha_max_iter, warm_start = 0.05, 0.5, 1000, True # Alpha bracket and solver setup of the projected calibration
+    curve_cache: Optional[CurveCache] = None
+    cached_curves = None
+    if conf.curve_cache_enabled:
+        curve_cache = CurveCache(conf.curve_cache_path)
+        curve_cache_key = curve_cache.make_key([settings.EIOPA_param_file, settings.EIOPA_curves_file],
+                                               country=settings.country, ufr=float(curves.ufr), tau=float(settings.tau),
+                                               precision=float(settings.precision), n_proj_years=int(settings.n_proj_years),
+                                               alpha_solver=settings.alpha_solver, alpha_min=alpha_min, alpha_max=alpha_max,
+                                               alpha_max_iter=alpha_max_iter, warm_start=warm_start,
+                                               numba_enabled=kernels.enabled)
+        cached_curves = curve_cache.load(curve_cache_key)
+
+    if cached_curves is not None:
+        logger.info("Load projected spot rates and calibration from the curve cache")
+        curves.ImportCalibration(cached_curves)
+    else:
+        logger.info("Calculate projected spot rates")
+        curves.ProjectForwardRate(settings.n_proj_years+1)
+        logger.info("Calculate calibration parameter alpha")
+        curves.CalibrateProjected(settings.n_proj_years+1, alpha_min, alpha_max, alpha_max_iter, method=settings.alpha_solver,
+                                  warm_start=warm_start)
+        if curve_cache is not None:
+            curve_cache.save(curve_cache_key, curves.ExportCalibration())
+    if curve_cache is not None:
+        logger.info("Curve cache statistics: " + str(curve_cache.stats()))
+    if settings.discount_grid_step > 0:
+        logger.info("Precompute the discount factor grid")
+        grid_error = curves.BuildDiscountGrid(settings.discount_grid_step, settings.n_proj_years, settings.discount_grid_tolerance)
+        logger.info("Maximum discount factor interpolation error: " + str(grid_error))
  
     logger.info("Import cash portfolio")
     cash = get_Cash(cash_portfolio_file)
@@ -124,6 +156,9 @@ def main() -> None:
     bond_input_generator = get_corporate_bonds(bond_portfolio_file)
     bond_input = {corp_bond.asset_id: corp_bond for corp_bond in bond_input_generator}
 
+    logger.info("Import sector spreads")
+    sector_spreads = get_sector_spreads(conf.input_spread)
+
     logger.info("Create equity portfolio")
     eq_ptf = EquitySharePortfolio(eq_input)
 
@@ -204,6 +239,10 @@ def main() -> None:
     # Dataframe with bond notional cash flows
     not_df = create_cashflow_dataframe(cf_dict = not_flows, unique_dates = unique_not_dates)
 
+    # Remaining bond cash flows of one position per instrument, repriced incrementally in the main loop
+    bd_instruments = bd_ptf.instrument_index()
+    bd_pricer = IncrementalBondPricer(bd_ptf.flatten_cash_flows(cpn_df.loc[bd_instruments.instrument_ids], not_df.loc[bd_instruments.instrument_ids], settings.modelling_date))
+
     ### -------- PREPARE OUTPUT DATA FRAMES --------###
     prev_mkt_value = portfolio_market_value(
         eq_price_df, eq_units_df, bd_price_df, bd_units_df, settings.modelling_date
@@ -252,7 +291,7 @@ def main() -> None:
     proj_period = 0
 
     logger.info("Calibrate corporate bond z-spread")
-    bd_zspread_df=bd_ptf.calibrate_bond_portfolio(zspread_df=bd_zspread_df, settings=settings, proj_period=proj_period, curves=curves)
+    bd_zspread_df=bd_ptf.calibrate_bond_portfolio(zspread_df=bd_zspread_df, settings=settings, proj_period=proj_period, curves=curves, sector_spreads=sector_spreads)
 
     # --------- START MAIN LOOP THAT MOVES FORWARD IN TIME --------
     logger.info("Start main loop")
@@ -316,7 +355,9 @@ def main() -> None:
                                                   curves = curves, 
                                                   bond_zspread_df = bd_zspread_df, 
                                                   bond_price_df = bd_price_df, 
-                                                  date_of_interest = current_date)
+                                                  date_of_interest = current_date,
+                                                  pricer = bd_pricer,
+                                                  instruments = bd_instruments)
         total_market_value = portfolio_market_value(
             eq_price_df, eq_units_df, bd_price_df, bd_units_df, current_date
         )
@@ -387,6 +428,7 @@ def main() -> None:
         proj_period+=1
 
     logger.info("Main loop finished, saving results")
+    logger.info("Risk free rate cache statistics: " + str(curves.rate_cache.info()))
     summary_df.to_csv(os.path.join(conf.output_path, "Results.csv"))
     logger.info("Run completed")
 
@@ -0,0 +1,24 @@
+from CurvesClass import Curves
+import datetime
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def make_calibrated_curves():
+    # Example term structure shared by the pricing tests, calibrated for the requested number of projection years
+    def make(n_proj_years: int, initial_date: datetime.date = datetime.date(2023, 12, 1)) -> Curves:
+        curves = Curves(0.0345, 0.0000001, 0.0001, initial_date, "Example country")
+        maturity = np.arange(1, 21, dtype=float)
+        curves.SetObservedTermStructure(maturity_vec=maturity, yield_vec=0.01 + 0.02 * (1 - np.exp(-0.15 * maturity)))
+        curves.CalcFwdRates()
+        curves.ProjectForwardRate(n_proj_years)
+        curves.CalibrateProjected(n_proj_years, 0.05, 0.5, 1000)
+        return curves
+    return make
+
+
+@pytest.fixture
+def calibrated_curves(request, make_calibrated_curves) -> Curves:
+    # A test module sets CURVE_PROJECTION_YEARS to change the projection length
+    return make_calibrated_curves(getattr(request.module, "CURVE_PROJECTION_YEARS", 2))
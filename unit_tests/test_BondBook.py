@@ -0,0 +1,109 @@
+from BondClasses import BondBook, CorpBondPortfolio, coupon_schedule, coupon_schedules
+from FrequencyClass import Frequency
+from ImportData import get_bond_book, get_corporate_bonds
+import datetime
+from dataclasses import fields
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+
+MODELLING_DATE = datetime.date(2023, 4, 29)
+END_DATE = datetime.date(2026, 4, 28)
+
+
+@pytest.fixture
+def bond_book() -> BondBook:
+    return get_bond_book("Input/Bond_Portfolio.csv")
+
+
+@pytest.fixture
+def bond_portfolio() -> CorpBondPortfolio:
+    return CorpBondPortfolio({bond.asset_id: bond for bond in get_corporate_bonds("Input/Bond_Portfolio.csv")})
+
+
+@pytest.fixture
+def columns() -> dict:
+    return {"asset_id": [1, 2], "nace": ["C10", "K64"], "issue_date": ["2020-01-31", "2021-06-15"],
+            "maturity_date": ["2030-01-31", "2026-06-15"], "coupon_rate": [0.03, 0.], "notional_amount": [100., 1000.],
+            "spread_country": [0., 0.], "spread_sector": [0., 0.], "zspread": [0., 0.], "spread_stress": [0., 0.],
+            "frequency": [2, 12], "recovery_rate": [0.4, 0.4], "default_probability": [0.01, 0.02], "units": [5., 1.],
+            "market_price": [95., 990.]}
+
+
+def test_get_bond_book(bond_book, bond_portfolio):
+    assert len(bond_book) == len(bond_portfolio.corporate_bonds)
+    from_portfolio = BondBook.from_portfolio(bond_portfolio)
+    for name in BondBook.__dataclass_fields__:
+        assert np.array_equal(getattr(bond_book, name), getattr(from_portfolio, name))
+    assert bond_book.to_portfolio().corporate_bonds[1234].maturity_date == bond_portfolio.corporate_bonds[1234].maturity_date
+
+
+@pytest.mark.parametrize("name, value", [("asset_id", 0), ("coupon_rate", -0.01), ("coupon_rate", 1.5), ("recovery_rate", 2.),
+                                         ("default_probability", -1.), ("market_price", -1.), ("frequency", 6),
+                                         ("notional_amount", 0.), ("maturity_date", "2019-01-01")])
+def test_validation(columns, name, value):
+    columns[name][1] = value
+    with pytest.raises(ValueError):
+        BondBook.from_columns(columns)
+
+
+def test_validation_lengths_and_ids(columns):
+    with pytest.raises(ValueError):
+        BondBook.from_columns({**columns, "units": [1.]})
+    with pytest.raises(ValueError):
+        BondBook.from_columns({**columns, "asset_id": [3, 3]})
+
+
+def test_coupon_schedules():
+    issue_dates = np.array(["2019-08-31", "2020-01-31", "2021-03-15"], dtype="datetime64[D]")
+    maturity_dates = np.array(["2029-08-31", "2024-01-31", "2031-03-15"], dtype="datetime64[D]")
+    frequencies = np.array([4, 12, 1])
+    dates, counts = coupon_schedules(issue_dates, maturity_dates, frequencies, MODELLING_DATE)
+    expected = [coupon_schedule(issue.item(), maturity.item(), Frequency(int(frequency)), MODELLING_DATE)
+                for issue, maturity, frequency in zip(issue_dates, maturity_dates, frequencies)]
+    assert list(counts) == [schedule.size for schedule in expected]
+    assert np.array_equal(dates, np.concatenate(expected))
+
+
+def test_flatten_cash_flows(bond_book, bond_portfolio):
+    flat = bond_book.flatten_cash_flows(MODELLING_DATE, END_DATE)
+    expected = bond_portfolio.flatten_flow_profiles(bond_portfolio.create_coupon_flows(MODELLING_DATE, END_DATE),
+                                                    bond_portfolio.create_maturity_flows(END_DATE), MODELLING_DATE)
+    for name in ["asset_ids", "offsets", "date_frac", "amounts", "dates"]:
+        assert np.array_equal(getattr(flat, name), getattr(expected, name))
+
+
+def test_instrument_index(bond_book, bond_portfolio):
+    instruments = bond_book.instrument_index()
+    expected = bond_portfolio.instrument_index()
+    assert np.array_equal(instruments.instrument_ids, expected.instrument_ids)
+    assert np.array_equal(instruments.position_instrument, expected.position_instrument)
+
+
+def test_instrument_index_signed_zero(bond_book):
+    columns = {field.name: np.repeat(getattr(bond_book, field.name)[:1], 2) for field in fields(BondBook)}
+    book = BondBook(**{**columns, "asset_id": np.array([1, 2]), "coupon_rate": np.array([0., -0.])})
+    assert list(book.instrument_index().position_instrument) == [0, 0]
+
+
+def test_to_dataframes(bond_book):
+    dataframes = bond_book.to_dataframes(MODELLING_DATE)
+    assert isinstance(dataframes, tuple) and len(dataframes) == 3
+    assert np.array_equal(dataframes[0][MODELLING_DATE].to_numpy(), bond_book.market_price)
+
+
+def test_calibrate_and_price(bond_book, bond_portfolio, make_calibrated_curves):
+    curves = make_calibrated_curves(1, MODELLING_DATE)
+    settings = SimpleNamespace(modelling_date=MODELLING_DATE, end_date=END_DATE)
+
+    spreads, converged = bond_book.calibrate_spreads(settings, 0, curves)
+    zspread_df = bond_portfolio.calibrate_bond_portfolio(bond_book.to_dataframes(MODELLING_DATE)[1], settings, 0, curves)
+    assert np.any(converged)
+    assert np.allclose(spreads, zspread_df[MODELLING_DATE].to_numpy(dtype=float), atol=1e-12)
+    prices = bond_book.price(settings, 0, curves, spreads)
+    assert np.allclose(prices[converged], bond_book.market_price[converged], atol=1e-5)
+
+    credit_spreads, credit_converged = bond_book.calibrate_spreads(settings, 0, curves, credit_adjusted=True)
+    prices = bond_book.price(settings, 0, curves, credit_spreads, credit_adjusted=True)
+    assert np.allclose(prices[credit_converged], bond_book.market_price[credit_converged], atol=1e-5)
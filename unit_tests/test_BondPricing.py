@@ -0,0 +1,425 @@
+from BondClasses import CorpBond, CorpBondPortfolio, FlatCashFlows, IncrementalBondPricer, InstrumentIndex, coupon_schedule, coupon_schedules, schedule_cache, yield_analytics
+from JitKernels import kernels
+from MainLoop import process_expired_cf
+from SectorSpreadClass import SectorSpreadIndex
+from FrequencyClass import Frequency
+from MainLoop import create_cashflow_dataframe
+import datetime
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+from types import SimpleNamespace
+
+
+MODELLING_DATE = datetime.date(2023, 12, 1)
+END_DATE = datetime.date(2033, 12, 1)
+
+
+@pytest.fixture
+def bond_portfolio() -> CorpBondPortfolio:
+    bonds = [CorpBond(asset_id=1, nace="C10", issuer="Issuer A", issue_date=datetime.date(2020, 3, 15),
+                      maturity_date=datetime.date(2031, 3, 15), coupon_rate=0.03, notional_amount=100.,
+                      spread_country=0., spread_sector=0., zspread=0., spread_stress=0., frequency=Frequency.BIANNUAL,
+                      recovery_rate=0.4, default_probability=0.01, units=10., market_price=95.),
+             CorpBond(asset_id=2, nace="K64", issuer="Issuer B", issue_date=datetime.date(2019, 6, 30),
+                      maturity_date=datetime.date(2026, 6, 30), coupon_rate=0.045, notional_amount=1000.,
+                      spread_country=0., spread_sector=0., zspread=0., spread_stress=0., frequency=Frequency.ANNUAL,
+                      recovery_rate=0.4, default_probability=0.02, units=5., market_price=1010.),
+             CorpBond(asset_id=3, nace="H49", issuer="Issuer C", issue_date=datetime.date(2022, 1, 31),
+                      maturity_date=datetime.date(2029, 1, 31), coupon_rate=0.01, notional_amount=50.,
+                      spread_country=0., spread_sector=0., zspread=0., spread_stress=0., frequency=Frequency.QUARTERLY,
+                      recovery_rate=0.4, default_probability=0.03, units=20., market_price=45.)]
+    return CorpBondPortfolio({bond.asset_id: bond for bond in bonds})
+
+
+@pytest.fixture
+def cash_flow_dfs(bond_portfolio):
+    coupon_flows = bond_portfolio.create_coupon_flows(MODELLING_DATE, END_DATE)
+    notional_flows = bond_portfolio.create_maturity_flows(END_DATE)
+    coupon_df = create_cashflow_dataframe(coupon_flows, bond_portfolio.unique_dates_profile(coupon_flows))
+    notional_df = create_cashflow_dataframe(notional_flows, bond_portfolio.unique_dates_profile(notional_flows))
+    return coupon_df, notional_df
+
+
+def test_flatten_cash_flows(bond_portfolio, cash_flow_dfs):
+    coupon_df, notional_df = cash_flow_dfs
+    flat = bond_portfolio.flatten_cash_flows(coupon_df, notional_df, MODELLING_DATE)
+    assert list(flat.asset_ids) == list(coupon_df.index)
+    assert flat.offsets[-1] == flat.amounts.size == flat.date_frac.size
+    for i, asset_id in enumerate(flat.asset_ids):
+        bond_flows = flat.amounts[flat.offsets[i]:flat.offsets[i + 1]]
+        assert bond_flows.sum() == pytest.approx(coupon_df.loc[asset_id].sum() + notional_df.loc[asset_id].sum())
+
+
+def test_price_flat_cash_flows_parity(bond_portfolio, cash_flow_dfs, calibrated_curves):
+    coupon_df, notional_df = cash_flow_dfs
+    spreads = np.array([0.01, -0.005, 0.02])
+    flat = bond_portfolio.flatten_cash_flows(coupon_df, notional_df, MODELLING_DATE)
+    prices = bond_portfolio.price_flat_cash_flows(flat, spreads, 1, calibrated_curves)
+    for asset_id, spread, price in zip(flat.asset_ids, spreads, prices):
+        expected = bond_portfolio.corporate_bonds[asset_id].price_bond(coupon_df.loc[asset_id], notional_df.loc[asset_id], MODELLING_DATE, 1, calibrated_curves, spread)
+        assert price == pytest.approx(expected, rel=1e-12)
+
+
+def test_price_flat_cash_flows_expired_bond(bond_portfolio, cash_flow_dfs, calibrated_curves):
+    coupon_df, notional_df = cash_flow_dfs
+    coupon_df.loc[2] = 0.
+    notional_df.loc[2] = 0.
+    flat = bond_portfolio.flatten_cash_flows(coupon_df, notional_df, MODELLING_DATE)
+    prices = bond_portfolio.price_flat_cash_flows(flat, np.zeros(3), 0, calibrated_curves)
+    assert prices[list(flat.asset_ids).index(2)] == 0.
+    assert np.all(np.delete(prices, list(flat.asset_ids).index(2)) > 0)
+
+
+def test_price_bond_portfolio(bond_portfolio, cash_flow_dfs, calibrated_curves):
+    coupon_df, notional_df = cash_flow_dfs
+    settings = SimpleNamespace(modelling_date=MODELLING_DATE)
+    zspread_df = pd.DataFrame(data=[[0.01], [0.], [0.015]], index=[1, 2, 3], columns=[MODELLING_DATE])
+    price_df = pd.DataFrame(index=[1, 2, 3], columns=[MODELLING_DATE], dtype=float)
+    price_df = bond_portfolio.price_bond_portfolio(coupon_df, notional_df, settings, 0, calibrated_curves, zspread_df, price_df, MODELLING_DATE)
+    for asset_id in [1, 2, 3]:
+        expected = bond_portfolio.corporate_bonds[asset_id].price_bond(coupon_df.loc[asset_id], notional_df.loc[asset_id], MODELLING_DATE, 0, calibrated_curves, zspread_df.loc[asset_id].iloc[0])
+        assert price_df.loc[asset_id, MODELLING_DATE] == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.fixture
+def flat_portfolio(bond_portfolio):
+    coupon_flows = bond_portfolio.create_coupon_flows(MODELLING_DATE, END_DATE)
+    notional_flows = bond_portfolio.create_maturity_flows(END_DATE)
+    return bond_portfolio.flatten_flow_profiles(coupon_flows, notional_flows, MODELLING_DATE)
+
+
+def test_flatten_flow_profiles(bond_portfolio, cash_flow_dfs, flat_portfolio):
+    coupon_df, notional_df = cash_flow_dfs
+    flat = bond_portfolio.flatten_cash_flows(coupon_df, notional_df, MODELLING_DATE)
+    assert np.array_equal(flat.asset_ids, flat_portfolio.asset_ids)
+    assert np.array_equal(flat.offsets, flat_portfolio.offsets)
+    assert np.allclose(flat.amounts, flat_portfolio.amounts)
+
+
+@pytest.mark.parametrize("method", ["bisection", "newton", "halley"])
+def test_solve_spreads(bond_portfolio, flat_portfolio, calibrated_curves, method):
+    market_prices = np.array([bond_portfolio.corporate_bonds[asset_id].market_price for asset_id in flat_portfolio.asset_ids])
+    spreads, converged = bond_portfolio.solve_spreads(flat_portfolio, market_prices, 0, calibrated_curves, method=method, precision=1e-10)
+    assert np.all(converged)
+    for asset_id, spread in zip(flat_portfolio.asset_ids, spreads):
+        expected = bond_portfolio.corporate_bonds[asset_id].bisection_spread(-0.2, 0.2, MODELLING_DATE, END_DATE, 0, calibrated_curves, 1e-10, 1000)
+        assert spread == pytest.approx(expected, abs=1e-9)
+
+
+@pytest.mark.parametrize("method", ["bisection", "newton", "halley"])
+def test_solve_spreads_not_converged(bond_portfolio, flat_portfolio, calibrated_curves, method):
+    market_prices = np.array([95., 1e6, 45.]) # No spread in [-0.2, 0.2] reproduces the second price
+    spreads, converged = bond_portfolio.solve_spreads(flat_portfolio, market_prices, 0, calibrated_curves, method=method, max_iter=50)
+    assert list(converged) == [True, False, True]
+    assert spreads[1] == pytest.approx(0.2, abs=1e-8) # Bisection ends at the upper end point, like CorpBond.bisection_spread
+
+
+def test_solve_spreads_invalid_method(bond_portfolio, flat_portfolio, calibrated_curves):
+    with pytest.raises(ValueError):
+        bond_portfolio.solve_spreads(flat_portfolio, np.ones(3), 0, calibrated_curves, method="secant")
+
+
+@pytest.mark.parametrize("halley", [False, True])
+def test_newton_spread(bond_portfolio, calibrated_curves, halley):
+    bond = bond_portfolio.corporate_bonds[1]
+    solution = bond.newton_spread(MODELLING_DATE, END_DATE, 0, calibrated_curves, precision=1e-10, halley=halley)
+    expected = bond.bisection_spread(-0.2, 0.2, MODELLING_DATE, END_DATE, 0, calibrated_curves, 1e-10, 1000)
+    assert solution.converged
+    assert solution.method == ("halley" if halley else "newton")
+    assert solution.iterations < 10
+    assert solution.spread == pytest.approx(expected, abs=1e-9)
+    assert abs(solution.price_error) < 1e-8
+
+
+def test_newton_spread_fallback(bond_portfolio, calibrated_curves):
+    bond = bond_portfolio.corporate_bonds[2]
+    solution = bond.newton_spread(MODELLING_DATE, END_DATE, 0, calibrated_curves, max_iter=1)
+    assert solution.method == "bisection"
+    assert solution.converged
+    assert abs(solution.price_error) < 1e-4
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_newton_spread_fallback_budget(bond_portfolio, calibrated_curves, enabled):
+    bond = bond_portfolio.corporate_bonds[2]
+    kernels.enable(enabled)
+    try:
+        solution = bond.newton_spread(MODELLING_DATE, END_DATE, 0, calibrated_curves, precision=1e-12, max_iter=1, fallback_max_iter=5)
+    finally:
+        kernels.enable(False)
+    assert solution.method == "bisection"
+    assert not solution.converged and np.isnan(solution.spread)
+
+
+def test_newton_spread_no_root(bond_portfolio, calibrated_curves):
+    bond = bond_portfolio.corporate_bonds[3]
+    solution = bond.newton_spread(MODELLING_DATE, END_DATE, 0, calibrated_curves, x_start=0.1, x_end=0.2)
+    assert solution.method == "bisection"
+    assert solution.converged is False
+    assert solution.spread == pytest.approx(0.2, abs=1e-8) # The model price is below the market price on the whole interval
+
+
+def test_coupon_schedule_day_clipping():
+    # Stepping one month at a time from the 31st clips to the 28th in February and stays on the 28th
+    schedule = coupon_schedule(datetime.date(2023, 1, 31), datetime.date(2023, 6, 30), Frequency.MONTHLY, datetime.date(2023, 1, 1))
+    assert schedule.dtype == np.dtype("datetime64[D]")
+    assert list(schedule) == list(np.array(["2023-01-31", "2023-02-28", "2023-03-28", "2023-04-28", "2023-05-28", "2023-06-28"], dtype="datetime64[D]"))
+
+
+def reference_coupon_dates(issue_date, maturity_date, frequency, modelling_date):
+    # Stepping with relativedelta one coupon at a time, as the original coupon date generator did
+    delta = relativedelta(months=(12 // frequency))
+    this_date = issue_date - delta
+    dates = []
+    while this_date < maturity_date:
+        this_date = this_date + delta
+        if modelling_date <= this_date <= maturity_date:
+            dates.append(this_date)
+    return dates
+
+
+@pytest.mark.parametrize("issue_date", [datetime.date(2020, 1, 31), datetime.date(2019, 8, 31), datetime.date(2020, 2, 29),
+                                        datetime.date(2021, 5, 30), datetime.date(2020, 3, 15)])
+@pytest.mark.parametrize("frequency", [Frequency.MONTHLY, Frequency.QUARTERLY, Frequency.BIANNUAL, Frequency.ANNUAL])
+def test_coupon_schedule_matches_relativedelta(issue_date, frequency):
+    maturity_date = datetime.date(2031, 2, 28)
+    expected = reference_coupon_dates(issue_date, maturity_date, frequency, MODELLING_DATE)
+    assert coupon_schedule(issue_date, maturity_date, frequency, MODELLING_DATE).tolist() == expected
+    dates, counts = coupon_schedules(np.array([issue_date], dtype="datetime64[D]"), np.array([maturity_date], dtype="datetime64[D]"),
+                                     np.array([int(frequency)]), MODELLING_DATE)
+    assert dates.tolist() == expected and counts[0] == len(expected)
+
+
+def test_coupon_schedule_memoized(bond_portfolio):
+    schedule_cache.clear()
+    schedules = bond_portfolio.coupon_schedules(MODELLING_DATE)
+    assert set(schedules) == {1, 2, 3}
+    assert bond_portfolio.corporate_bonds[1].coupon_schedule(MODELLING_DATE) is schedules[1]
+    assert not schedules[1].flags.writeable
+    assert len(schedule_cache) == 3
+
+
+def test_incremental_pricer(bond_portfolio, cash_flow_dfs, calibrated_curves):
+    coupon_df, notional_df = cash_flow_dfs
+    pricer = IncrementalBondPricer(bond_portfolio.flatten_cash_flows(coupon_df, notional_df, MODELLING_DATE))
+    settings = SimpleNamespace(modelling_date=MODELLING_DATE)
+    zspread_df = pd.DataFrame(data=[[0.01], [0.], [0.015]], index=[1, 2, 3], columns=[MODELLING_DATE])
+    units_df = pd.DataFrame(data=[[1.], [1.], [1.]], index=[1, 2, 3], columns=[MODELLING_DATE])
+    coupon_dates = list(coupon_df.columns)
+    notional_dates = list(notional_df.columns)
+    for year, period_end in zip([0, 1, 1], [datetime.date(2024, 12, 1), datetime.date(2026, 12, 1), datetime.date(2029, 12, 1)]):
+        units_df[period_end] = 1.
+        _, coupon_df, coupon_dates = process_expired_cf(coupon_dates, period_end, coupon_df, units_df)
+        _, notional_df, notional_dates = process_expired_cf(notional_dates, period_end, notional_df, units_df)
+        expected = bond_portfolio.price_bond_portfolio(coupon_df, notional_df, settings, year, calibrated_curves, zspread_df,
+                                                       pd.DataFrame(index=[1, 2, 3], columns=[period_end], dtype=float), period_end)
+        incremental = bond_portfolio.price_bond_portfolio(None, None, settings, year, calibrated_curves, zspread_df,
+                                                          pd.DataFrame(index=[1, 2, 3], columns=[period_end], dtype=float), period_end, pricer=pricer)
+        assert np.allclose(incremental[period_end].to_numpy(dtype=float), expected[period_end].to_numpy(dtype=float), rtol=1e-12)
+    # Bonds 2 and 3 have matured by the end of 2029
+    assert list(pricer.active_flows.asset_ids) == [1]
+    assert incremental.loc[2, datetime.date(2029, 12, 1)] == 0.
+
+
+def test_incremental_pricer_expire(bond_portfolio, flat_portfolio):
+    pricer = IncrementalBondPricer(flat_portfolio)
+    assert pricer.expire(MODELLING_DATE - datetime.timedelta(days=1)) == 0
+    assert pricer.expire(datetime.date(2026, 7, 1)) == 1
+    assert list(pricer.active_flows.asset_ids) == [1, 3]
+    assert np.all(pricer.active_flows.dates > np.datetime64("2026-07-01"))
+    assert pricer.active_flows.offsets[-1] == pricer.active_flows.amounts.size
+
+
+@pytest.fixture
+def duplicated_portfolio(bond_portfolio) -> CorpBondPortfolio:
+    # Positions 11 and 12 are copies of position 1 and position 13 of position 3, with other units and spread inputs
+    bonds = dict(bond_portfolio.corporate_bonds)
+    for asset_id, original_id in [(11, 1), (12, 1), (13, 3)]:
+        original = bonds[original_id]
+        bonds[asset_id] = CorpBond(**{**original.__dict__, "asset_id": asset_id, "units": 7., "zspread": 0.05, "issuer": "Other"})
+    return CorpBondPortfolio(bonds)
+
+
+def test_instrument_index(duplicated_portfolio):
+    instruments = duplicated_portfolio.instrument_index()
+    assert isinstance(instruments, InstrumentIndex)
+    assert list(instruments.asset_ids) == [1, 2, 3, 11, 12, 13]
+    assert list(instruments.instrument_ids) == [1, 2, 3]
+    assert list(instruments.broadcast(instruments.instrument_ids)) == [1, 2, 3, 1, 1, 3]
+    assert list(duplicated_portfolio.instrument_index([13, 2]).instrument_ids) == [13, 2]
+
+
+def test_deduplicated_calibration_and_pricing(duplicated_portfolio, calibrated_curves):
+    settings = SimpleNamespace(modelling_date=MODELLING_DATE, end_date=END_DATE)
+    zspread_df = pd.DataFrame(data=0., index=[1, 2, 3, 11, 12, 13], columns=[MODELLING_DATE])
+    zspread_df = duplicated_portfolio.calibrate_bond_portfolio(zspread_df, settings, 0, calibrated_curves)
+    assert zspread_df.loc[11, MODELLING_DATE] == zspread_df.loc[1, MODELLING_DATE]
+    assert zspread_df.loc[13, MODELLING_DATE] == zspread_df.loc[3, MODELLING_DATE]
+
+    coupon_flows = duplicated_portfolio.create_coupon_flows(MODELLING_DATE, END_DATE)
+    notional_flows = duplicated_portfolio.create_maturity_flows(END_DATE)
+    coupon_df = create_cashflow_dataframe(coupon_flows, duplicated_portfolio.unique_dates_profile(coupon_flows))
+    notional_df = create_cashflow_dataframe(notional_flows, duplicated_portfolio.unique_dates_profile(notional_flows))
+    price_df = pd.DataFrame(index=zspread_df.index, columns=[MODELLING_DATE], dtype=float)
+    expected = duplicated_portfolio.price_bond_portfolio(coupon_df, notional_df, settings, 0, calibrated_curves, zspread_df, price_df.copy(), MODELLING_DATE)
+    deduplicated = duplicated_portfolio.price_bond_portfolio(coupon_df, notional_df, settings, 0, calibrated_curves, zspread_df, price_df.copy(), MODELLING_DATE,
+                                                             instruments=duplicated_portfolio.instrument_index())
+    assert np.allclose(deduplicated[MODELLING_DATE].to_numpy(dtype=float), expected[MODELLING_DATE].to_numpy(dtype=float), rtol=1e-12)
+    # The calibrated spreads reproduce the market prices
+    market_prices = [duplicated_portfolio.corporate_bonds[asset_id].market_price for asset_id in zspread_df.index]
+    assert np.allclose(expected[MODELLING_DATE].to_numpy(dtype=float), market_prices, atol=1e-5)
+
+
+def test_credit_pricing_no_default(bond_portfolio, flat_portfolio, calibrated_curves):
+    spreads = np.array([0.01, 0., 0.02])
+    credit = bond_portfolio.price_flat_cash_flows_credit(flat_portfolio, spreads, 0, calibrated_curves, np.zeros(3), np.full(3, 0.4), np.array([100., 1000., 50.]))
+    assert np.allclose(credit, bond_portfolio.price_flat_cash_flows(flat_portfolio, spreads, 0, calibrated_curves), rtol=1e-14)
+
+
+def test_credit_pricing_certain_default(bond_portfolio, flat_portfolio, calibrated_curves):
+    # Every bond defaults before its first cash flow and only the recovery is paid
+    credit = bond_portfolio.price_flat_cash_flows_credit(flat_portfolio, np.zeros(3), 0, calibrated_curves, np.ones(3), np.full(3, 0.4), np.array([100., 1000., 50.]))
+    first_frac = flat_portfolio.date_frac[flat_portfolio.offsets[:-1]]
+    first_discount = (1 + calibrated_curves.RiskFreeYields(0, first_frac)) ** (-first_frac)
+    assert np.allclose(credit, 0.4 * np.array([100., 1000., 50.]) * first_discount, rtol=1e-12)
+
+
+@pytest.mark.parametrize("valuation_frac", [0., 0.5])
+def test_credit_pricing_reference(bond_portfolio, flat_portfolio, calibrated_curves, valuation_frac):
+    default_probability = np.array([0.03, 0.01, 0.2])
+    recovery_rate = np.array([0.4, 0.25, 0.6])
+    notional = np.array([100., 1000., 50.])
+    spreads = np.array([0.01, 0., 0.02])
+    credit = bond_portfolio.price_flat_cash_flows_credit(flat_portfolio, spreads, 0, calibrated_curves, default_probability, recovery_rate, notional, valuation_frac)
+    for i in range(3):
+        hazard = -np.log(1 - default_probability[i])
+        expected = 0.
+        previous = valuation_frac
+        for j in range(flat_portfolio.offsets[i], flat_portfolio.offsets[i + 1]):
+            t = flat_portfolio.date_frac[j]
+            discount = (1 + calibrated_curves.RiskFreeYields(0, np.array([t]))[0] + spreads[i]) ** (-t)
+            survival = np.exp(-hazard * max(t - valuation_frac, 0.)) # Flows before the valuation time are certain
+            expected += discount * (flat_portfolio.amounts[j] * survival + recovery_rate[i] * notional[i] * (np.exp(-hazard * max(previous - valuation_frac, 0.)) - survival))
+            previous = t
+        assert credit[i] == pytest.approx(expected, rel=1e-12)
+        assert credit[i] < bond_portfolio.price_flat_cash_flows(flat_portfolio, spreads, 0, calibrated_curves)[i]
+
+
+def test_credit_pricing_maturity_after_end_date(calibrated_curves):
+    bond = CorpBond(asset_id=1, nace="C10", issuer="Issuer A", issue_date=datetime.date(2020, 3, 15),
+                    maturity_date=datetime.date(2031, 3, 15), coupon_rate=0.03, notional_amount=100.,
+                    spread_country=0., spread_sector=0., zspread=0., spread_stress=0., frequency=Frequency.ANNUAL,
+                    recovery_rate=0.4, default_probability=0.05, units=1., market_price=100.)
+    portfolio = CorpBondPortfolio({1: bond})
+    end_date = datetime.date(2026, 12, 1)
+    flat = portfolio.flatten_flow_profiles(portfolio.create_coupon_flows(MODELLING_DATE, end_date), portfolio.create_maturity_flows(end_date), MODELLING_DATE)
+    assert np.any(np.diff(flat.date_frac) < 0) # The notional on end_date is stored after the later coupons
+
+    order = np.argsort(flat.date_frac, kind="stable")
+    sorted_flat = FlatCashFlows(asset_ids=flat.asset_ids, offsets=flat.offsets, date_frac=flat.date_frac[order], amounts=flat.amounts[order])
+    arguments = (np.zeros(1), 0, calibrated_curves, np.array([0.05]), np.array([0.4]), np.array([100.]))
+    credit = portfolio.price_flat_cash_flows_credit(flat, *arguments)
+    assert credit == pytest.approx(portfolio.price_flat_cash_flows_credit(sorted_flat, *arguments), rel=1e-12)
+    assert credit[0] > portfolio.price_flat_cash_flows_credit(flat, *arguments[:3], np.array([0.05]), np.array([0.]), np.array([100.]))[0]
+
+
+def test_yield_analytics_derivatives():
+    amounts = np.array([5., 5., 5., 105., 3., 103.])
+    times = np.array([0.5, 1.5, 2.5, 3.5, 1., 2.])
+    offsets = np.array([0, 4, 6])
+    prices = np.array([98., 104.])
+    analytics = yield_analytics(amounts, times, offsets, prices)
+
+    for i in range(2):
+        flows, flow_times = amounts[offsets[i]:offsets[i + 1]], times[offsets[i]:offsets[i + 1]]
+        def price(y): return np.sum(flows * (1 + y) ** -flow_times)
+        y, h = analytics["ytm"][i], 1e-4
+        assert price(y) == pytest.approx(prices[i], rel=1e-10)
+        assert analytics["modified_duration"][i] == pytest.approx(-(price(y + h) - price(y - h)) / (2 * h) / prices[i], rel=1e-6)
+        assert analytics["macaulay_duration"][i] == pytest.approx(analytics["modified_duration"][i] * (1 + y), rel=1e-12)
+        assert analytics["convexity"][i] == pytest.approx((price(y + h) - 2 * price(y) + price(y - h)) / h ** 2 / prices[i], rel=1e-5)
+
+
+def test_yield_analytics_without_flows():
+    analytics = yield_analytics(np.array([100.]), np.array([1.]), np.array([0, 0, 1, 1]), np.array([95., 95., 95.]))
+    assert np.isnan(analytics["ytm"][[0, 2]]).all()
+    assert analytics["ytm"][1] == pytest.approx(100 / 95 - 1)
+
+
+def test_gross_redemption_yield(bond_portfolio):
+    bond = bond_portfolio.corporate_bonds[2]
+    ytm = bond.gross_redemption_yield(MODELLING_DATE)
+    flows = bond.create_single_cash_flows(MODELLING_DATE, END_DATE)
+    value = sum(amount * (1 + ytm) ** -((flow_date - MODELLING_DATE).days / 365.25) for flow_date, amount in flows.items())
+    value += bond.notional_amount * (1 + ytm) ** -((bond.maturity_date - MODELLING_DATE).days / 365.25)
+    assert value == pytest.approx(bond.market_price, rel=1e-10)
+    assert bond.gross_redemption_yield(MODELLING_DATE, price=900.) > ytm
+    assert np.isnan(bond.gross_redemption_yield(datetime.date(2026, 6, 30)))
+
+
+def test_gross_redemption_yield_end_date(bond_portfolio):
+    end_date = datetime.date(2027, 12, 1) # Before the maturity of bonds 1 and 3, so their notional is paid on end_date
+    coupon_flows = bond_portfolio.create_coupon_flows(MODELLING_DATE, end_date)
+    notional_flows = bond_portfolio.create_maturity_flows(end_date)
+    coupon_df = create_cashflow_dataframe(coupon_flows, bond_portfolio.unique_dates_profile(coupon_flows))
+    notional_df = create_cashflow_dataframe(notional_flows, bond_portfolio.unique_dates_profile(notional_flows))
+    flat = bond_portfolio.flatten_cash_flows(coupon_df, notional_df, MODELLING_DATE)
+    bond_price_df = pd.DataFrame(data=[[95.], [1010.], [45.]], index=[1, 2, 3], columns=[MODELLING_DATE])
+    ytm = bond_portfolio.bond_analytics(flat, bond_price_df)["ytm"]
+    for asset_id in [1, 2, 3]:
+        bond = bond_portfolio.corporate_bonds[asset_id]
+        assert ytm.loc[asset_id, MODELLING_DATE] == pytest.approx(bond.gross_redemption_yield(MODELLING_DATE, end_date=end_date), abs=1e-9)
+    assert bond_portfolio.corporate_bonds[1].gross_redemption_yield(MODELLING_DATE) != pytest.approx(ytm.loc[1, MODELLING_DATE], abs=1e-6)
+
+
+def test_bond_analytics(bond_portfolio, cash_flow_dfs):
+    coupon_df, notional_df = cash_flow_dfs
+    flat = bond_portfolio.flatten_cash_flows(coupon_df, notional_df, MODELLING_DATE)
+    periods = [MODELLING_DATE, datetime.date(2024, 12, 1), datetime.date(2027, 12, 1)]
+    bond_price_df = pd.DataFrame(data=[[95., 96., 97.], [1010., 1005., 0.], [45., 46., 47.]], index=[1, 2, 3], columns=periods)
+    analytics = bond_portfolio.bond_analytics(flat, bond_price_df)
+
+    assert set(analytics) == {"ytm", "macaulay_duration", "modified_duration", "convexity", "accrued_interest"}
+    for name, values in analytics.items():
+        assert list(values.index) == list(flat.asset_ids) and list(values.columns) == periods
+    for asset_id in flat.asset_ids:
+        bond = bond_portfolio.corporate_bonds[asset_id]
+        for period in periods[:2]:
+            assert analytics["ytm"].loc[asset_id, period] == pytest.approx(bond.gross_redemption_yield(period, bond_price_df.loc[asset_id, period]), abs=1e-9)
+
+    # Bond 2 pays 45 on 30 June. On 1 December 2023, 154 of the 366 days of the coupon period have elapsed
+    assert analytics["accrued_interest"].loc[2, MODELLING_DATE] == pytest.approx(45 * 154 / 366)
+    assert analytics["accrued_interest"].loc[2, periods[2]] == 0.
+    assert np.isnan(analytics["ytm"].loc[2, periods[2]])
+    assert analytics["macaulay_duration"].loc[1, MODELLING_DATE] > analytics["macaulay_duration"].loc[1, periods[2]]
+
+
+def test_credit_calibration_reproduces_market_price(bond_portfolio, cash_flow_dfs, calibrated_curves):
+    coupon_df, notional_df = cash_flow_dfs
+    settings = SimpleNamespace(modelling_date=MODELLING_DATE, end_date=END_DATE)
+    zspread_df = pd.DataFrame(data=0., index=[1, 2, 3], columns=[MODELLING_DATE])
+    credit_df = bond_portfolio.calibrate_bond_portfolio(zspread_df.copy(), settings, 0, calibrated_curves, credit_adjusted=True)
+    risk_free_df = bond_portfolio.calibrate_bond_portfolio(zspread_df.copy(), settings, 0, calibrated_curves)
+    assert (credit_df[MODELLING_DATE] < risk_free_df[MODELLING_DATE]).all() # Part of the spread is explained by the default risk
+
+    price_df = pd.DataFrame(index=[1, 2, 3], columns=[MODELLING_DATE], dtype=float)
+    prices = bond_portfolio.price_bond_portfolio(coupon_df, notional_df, settings, 0, calibrated_curves, credit_df, price_df, MODELLING_DATE, credit_adjusted=True)
+    market_prices = [bond_portfolio.corporate_bonds[asset_id].market_price for asset_id in [1, 2, 3]]
+    assert np.allclose(prices[MODELLING_DATE].to_numpy(dtype=float), market_prices, atol=1e-5)
+    with pytest.raises(ValueError):
+        bond_portfolio.calibrate_bond_portfolio(zspread_df.copy(), settings, 0, calibrated_curves, method="newton", credit_adjusted=True)
+
+
+def test_calibration_sector_spread_fallback(bond_portfolio, calibrated_curves):
+    bond_portfolio.corporate_bonds[2] = replace(bond_portfolio.corporate_bonds[2], market_price=10.) # Far below the price at the largest spread of the search
+    settings = SimpleNamespace(modelling_date=MODELLING_DATE, end_date=END_DATE)
+    zspread_df = pd.DataFrame(data=0., index=[1, 2, 3], columns=[MODELLING_DATE])
+    solver_df = bond_portfolio.calibrate_bond_portfolio(zspread_df.copy(), settings, 0, calibrated_curves)
+    sector_df = bond_portfolio.calibrate_bond_portfolio(zspread_df.copy(), settings, 0, calibrated_curves,
+                                                        sector_spreads=SectorSpreadIndex(["C", "K"], [0.03, 0.045]))
+    assert solver_df.loc[2, MODELLING_DATE] == pytest.approx(0.2, abs=1e-6)
+    assert sector_df.loc[2, MODELLING_DATE] == 0.045 # Bond 2 has NACE K64, resolved to its section K
+    assert sector_df.loc[[1, 3], MODELLING_DATE].equals(solver_df.loc[[1, 3], MODELLING_DATE]) # Converged bonds keep their spread
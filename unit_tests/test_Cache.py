@@ -0,0 +1,38 @@
+from CacheClass import LRUCache
+import pytest
+
+
+def test_get_put():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_eviction_order():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.put("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+
+def test_clear_keeps_counters():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.info() == {"hits": 1, "misses": 0, "evictions": 0, "size": 0, "max_size": 2}
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        LRUCache(max_size=0)
@@ -0,0 +1,55 @@
+from CurveCacheClass import CurveCache
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    file_name = tmp_path / "curves.csv"
+    file_name.write_text("Maturity,Yield\n1,0.01\n2,0.02\n")
+    return str(file_name)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CurveCache(str(tmp_path / "cache"))
+
+
+def test_key_depends_on_inputs(cache, input_file):
+    key = cache.make_key([input_file], country="Slovenia", ufr=0.0345)
+    assert key == cache.make_key([input_file], ufr=0.0345, country="Slovenia")
+    assert key != cache.make_key([input_file], country="Slovenia", ufr=0.036)
+    with open(input_file, "a") as changed_file:
+        changed_file.write("3,0.03\n")
+    assert key != cache.make_key([input_file], country="Slovenia", ufr=0.0345)
+
+
+def test_key_numpy_scalars(cache, input_file):
+    key = cache.make_key([input_file], ufr=0.0345, n_proj_years=3)
+    assert key == cache.make_key([input_file], ufr=np.float64(0.0345), n_proj_years=np.int64(3))
+
+
+def test_save_load(cache, input_file):
+    key = cache.make_key([input_file], country="Slovenia")
+    assert cache.load(key) is None
+    data = {"alpha": np.array([0.1, 0.2]), "b": np.array([[1., np.nan], [2., 3.]])}
+    cache.save(key, data)
+    loaded = cache.load(key)
+    assert np.array_equal(loaded["alpha"], data["alpha"])
+    assert np.array_equal(loaded["b"], data["b"], equal_nan=True)
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["writes"] == 1
+    assert stats["entries"] == 1
+
+
+def test_invalidate(cache, input_file):
+    key_1 = cache.make_key([input_file], country="Slovenia")
+    key_2 = cache.make_key([input_file], country="Austria")
+    cache.save(key_1, {"alpha": np.array([0.1])})
+    cache.save(key_2, {"alpha": np.array([0.2])})
+    assert cache.invalidate(key_1) == 1
+    assert cache.load(key_1) is None
+    assert cache.invalidate() == 1
+    assert cache.stats()["entries"] == 0
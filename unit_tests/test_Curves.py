@@ -1,8 +1,10 @@
-from CurvesClass import Curves
+from CurvesClass import Curves, AlphaObjective
 import pytest
 import datetime
 import numpy as np
 
+CURVE_PROJECTION_YEARS = 3 # Projection length of the shared calibrated_curves fixture in conftest.py
+
 @pytest.fixture
 def curves_1():
     ufr = 0.0345
@@ -83,6 +85,42 @@ def test_SWCalibrate(curves_1):
     expected = [3.25964092, -0.01510795, -1.83196649]
     assert b == pytest.approx(expected)
 
+def test_SWCalibrateSolve(curves_1):
+    r = np.array([0.01, 0.015, 0.02, 0.022, 0.025])
+    m = np.array([1., 2., 3., 5., 10.])
+    ufr = 0.035
+    alpha = 0.12
+    d = np.exp(-np.log(1 + ufr) * m)
+    Q = np.diag(d)
+    H = curves_1.SWHeart(m, m, alpha)
+    expected = np.linalg.inv(Q.transpose() @ H @ Q) @ ((1 + r) ** (-m) - d)
+    b = curves_1.SWCalibrate(r, m, ufr, alpha)
+    assert b == pytest.approx(expected, rel=1e-8)
+
+def test_SWFactorizeCache(curves_1):
+    m = np.array([1., 2., 3., 5., 10.])
+    L_1 = curves_1.SWFactorize(m, 0.035, 0.12)
+    L_2 = curves_1.SWFactorize(m, 0.035, 0.12)
+    curves_1.SWFactorize(m, 0.035, 0.13)
+    assert L_1 is L_2
+    assert curves_1.factor_cache.hits == 1
+    assert curves_1.factor_cache.misses == 2
+    assert np.allclose(np.tril(L_1), L_1)
+
+def test_SWCalibrateCacheHit(curves_1, monkeypatch):
+    r = np.array([0.01, 0.015, 0.02, 0.022, 0.025])
+    m = np.array([1., 2., 3., 5., 10.])
+    b_1 = curves_1.SWCalibrate(r, m, 0.035, 0.12)
+    def fail(*args, **kwargs):
+        raise AssertionError("factorized again on a cache hit")
+    monkeypatch.setattr(np.linalg, "cholesky", fail)
+    monkeypatch.setattr(np.linalg, "solve", fail)
+    b_2 = curves_1.SWCalibrate(r, m, 0.035, 0.12)
+    assert curves_1.factor_cache.hits == 1
+    assert np.array_equal(b_1, b_2)
+    L = curves_1.SWFactorize(m, 0.035, 0.12)
+    assert curves_1.SWInverseFactor(m, 0.035, 0.12) @ L == pytest.approx(np.eye(m.size), abs=1e-10)
+
 def test_ProjectForwardRateMat(curves_1, term_structure_maturity, term_structure_yield):
     n_year = 3
     input_size = len(term_structure_yield)
@@ -107,6 +145,199 @@ def test_ProjectForwardRateObs(curves_1, term_structure_maturity, term_structure
     assert "Yield_year_3" not in curves_1.r_obs
     assert len(curves_1.r_obs["Yield_year_0"].values) == input_size
 
+@pytest.fixture
+def annual_maturity() -> np.ndarray:
+    return np.arange(1, 21, dtype=float)
+
+@pytest.fixture
+def annual_yield(annual_maturity) -> np.ndarray:
+    return 0.01 + 0.02 * (1 - np.exp(-0.15 * annual_maturity))
+
+def test_RetrieveRatesYearZero(calibrated_curves, annual_maturity):
+    # The time 0 curve reprices the projected liquid points it was calibrated on
+    calib_yields = calibrated_curves.r_obs["Yield_year_0"].values
+    out = calibrated_curves.RetrieveRates(0, annual_maturity, "Yield", 0.)
+    assert out["Yield"].values == pytest.approx(calib_yields)
+
+def test_RetrieveRatesBatch(calibrated_curves):
+    target_mat = np.array([0.5, 1., 2.5, 7., 20., 60.])
+    out = calibrated_curves.RetrieveRatesBatch(range(3), target_mat, "Discount", 0.01)
+    assert out.shape == (3, target_mat.size)
+    for proj_step in range(3):
+        expected = calibrated_curves.RetrieveRates(proj_step, target_mat, "Discount", 0.01)["Discount"].values
+        assert out[proj_step] == pytest.approx(expected, rel=1e-12)
+
+def test_RetrieveRatesBatchPerYearMaturities(calibrated_curves):
+    target_mat = np.array([[1., 2.], [1.5, 3.], [0.25, 40.]])
+    out = calibrated_curves.RetrieveRatesBatch([0, 1, 2], target_mat, "Yield", 0.)
+    for proj_step in range(3):
+        expected = calibrated_curves.RetrieveRates(proj_step, target_mat[proj_step], "Yield", 0.)["Yield"].values
+        assert out[proj_step] == pytest.approx(expected, rel=1e-12)
+
+def test_RetrieveRatesBatchInvalidType(calibrated_curves):
+    with pytest.raises(ValueError):
+        calibrated_curves.RetrieveRatesBatch([0], np.array([1.]), "Price", 0.)
+
+@pytest.mark.parametrize("method", ["brent", "newton"])
+def test_CalibrateProjectedMethods(curves_1, annual_maturity, annual_yield, method):
+    n_year = 4
+    curves_1.SetObservedTermStructure(maturity_vec=annual_maturity, yield_vec=annual_yield)
+    curves_1.CalcFwdRates()
+    curves_1.ProjectForwardRate(n_year)
+    curves_1.CalibrateProjected(n_year, 0.05, 0.5, 1000)
+    alpha_bisection = curves_1.alpha.values.copy()
+    iterations_bisection = curves_1.alpha_iterations.values.copy()
+
+    curves_1.CalibrateProjected(n_year, 0.05, 0.5, 1000, method=method, warm_start=True)
+    assert curves_1.alpha.values == pytest.approx(alpha_bisection, abs=1e-6)
+    assert (curves_1.alpha_iterations.values < iterations_bisection).all()
+
+def test_CalibrateProjectedInvalidMethod(curves_1, annual_maturity, annual_yield):
+    curves_1.SetObservedTermStructure(maturity_vec=annual_maturity, yield_vec=annual_yield)
+    curves_1.CalcFwdRates()
+    curves_1.ProjectForwardRate(2)
+    with pytest.raises(ValueError):
+        curves_1.CalibrateProjected(2, 0.05, 0.5, 1000, method="secant")
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_CalibrateProjectedParallel(curves_1, annual_maturity, annual_yield, executor):
+    n_year = 5
+    curves_1.SetObservedTermStructure(maturity_vec=annual_maturity, yield_vec=annual_yield)
+    curves_1.CalcFwdRates()
+    curves_1.ProjectForwardRate(n_year)
+    curves_1.CalibrateProjected(n_year, 0.05, 0.5, 1000, method="brent")
+    alpha_serial = curves_1.alpha.copy()
+    b_serial = curves_1.b.copy()
+
+    curves_1.CalibrateProjected(n_year, 0.05, 0.5, 1000, method="brent", executor=executor, n_workers=2)
+    assert curves_1.alpha.equals(alpha_serial)
+    assert curves_1.b.equals(b_serial)
+
+def test_CalibrateProjectedParallelWarmStart(curves_1, annual_maturity, annual_yield):
+    curves_1.SetObservedTermStructure(maturity_vec=annual_maturity, yield_vec=annual_yield)
+    curves_1.CalcFwdRates()
+    curves_1.ProjectForwardRate(2)
+    with pytest.raises(ValueError):
+        curves_1.CalibrateProjected(2, 0.05, 0.5, 1000, method="brent", warm_start=True, executor="thread")
+
+def test_ProjectedArrayLayout(calibrated_curves, annual_maturity):
+    n_points = annual_maturity.size
+    assert calibrated_curves.m_obs_array.shape == (3, n_points)
+    assert (calibrated_curves.n_liquid == n_points - np.arange(3)).all()
+    for i_year in range(3):
+        assert not np.isnan(calibrated_curves.b_array[i_year, :n_points-i_year]).any()
+        assert np.isnan(calibrated_curves.m_obs_array[i_year, n_points-i_year:]).all()
+        assert np.isnan(calibrated_curves.b_array[i_year, n_points-i_year:]).all()
+    assert np.array_equal(calibrated_curves.m_obs_array[2, :n_points-2], annual_maturity[2:] - 2)
+    assert np.array_equal(calibrated_curves.alpha.values[0], calibrated_curves.alpha_array)
+
+def test_DiscountGrid(calibrated_curves):
+    target_mat = np.array([0.3, 2.7, 11.1, 19.9])
+    beyond_grid = np.array([5., 30.])
+    exact = calibrated_curves.RetrieveRates(2, target_mat, "Discount", 0.01)
+    exact_beyond_grid = calibrated_curves.RetrieveRates(2, beyond_grid, "Yield", 0.)
+    error = calibrated_curves.BuildDiscountGrid(1/52, 20, 1e-6)
+    assert error < 1e-6
+    interpolated = calibrated_curves.RetrieveRates(2, target_mat, "Discount", 0.01)
+    assert interpolated["Discount"].values == pytest.approx(exact["Discount"].values, abs=1e-6)
+    assert not interpolated.equals(exact)
+    assert calibrated_curves.RetrieveRates(2, beyond_grid, "Yield", 0.).equals(exact_beyond_grid)
+
+def test_DiscountGridTolerance(calibrated_curves):
+    with pytest.raises(ValueError):
+        calibrated_curves.BuildDiscountGrid(1., 20, 1e-12)
+    assert calibrated_curves.grid_times is None
+
+def test_RiskFreeYieldsCache(calibrated_curves):
+    target_mat = np.array([0.5, 3., 25.])
+    calibrated_curves.rate_cache.clear()
+    hits = calibrated_curves.rate_cache.hits
+    first = calibrated_curves.RetrieveRates(1, target_mat, "Discount", 0.01)
+    second = calibrated_curves.RetrieveRates(1, target_mat.copy(), "Discount", 0.02)
+    assert calibrated_curves.rate_cache.hits == hits + 1
+    assert len(calibrated_curves.rate_cache) == 1
+    assert (second["Discount"].values < first["Discount"].values).all()
+    with pytest.raises(ValueError):
+        calibrated_curves.RiskFreeYields(1, target_mat)[0] = 0.
+    calibrated_curves.CalibrateProjected(3, 0.05, 0.5, 1000)
+    assert len(calibrated_curves.rate_cache) == 0
+
+@pytest.mark.parametrize("type", ["Yield", "Capitalisation", "Discount"])
+def test_ApplySpreads(calibrated_curves, type):
+    target_mat = np.array([0.5, 3., 12.25, 25.])
+    spreads = np.array([-0.01, 0., 0.015, 0.2])
+    yields = calibrated_curves.RiskFreeYields(2, target_mat)
+    result = calibrated_curves.ApplySpreads(yields, target_mat, spreads, type)
+    assert result.shape == (spreads.size, target_mat.size)
+    for row, spread in enumerate(spreads):
+        assert np.array_equal(result[row], calibrated_curves.RetrieveRates(2, target_mat, type, spread)[type].values)
+
+def test_ApplySpreadsInvalidType(calibrated_curves):
+    target_mat = np.array([1., 2.])
+    with pytest.raises(ValueError):
+        calibrated_curves.ApplySpreads(calibrated_curves.RiskFreeYields(0, target_mat), target_mat, np.array([0.01]), "Price")
+
+def test_KeyRateSensitivities(calibrated_curves):
+    proj_step = 1
+    target_mat = np.array([0.5, 1.5, 2.5, 7., 12.3])
+    cash_flows = np.array([[5., 5., 105., 0., 0.],
+                           [0., 3., 0., 3., 103.]])
+    spreads = np.array([0.01, 0.025])
+    bump = 0.0001
+    pv01, krd = calibrated_curves.KeyRateSensitivities(proj_step, target_mat, cash_flows, spreads, bump)
+    n_liquid = calibrated_curves.n_liquid[proj_step]
+    assert pv01.shape == (2, n_liquid)
+
+    # Bump and recalibrate each key rate with alpha fixed
+    m_obs, _, alpha = calibrated_curves._CalibrationSet(proj_step)
+    r_obs = calibrated_curves.r_obs_array[proj_step, :n_liquid]
+    def value(r):
+        b = calibrated_curves.SWCalibrate(r, m_obs, calibrated_curves.ufr, alpha)
+        yields = calibrated_curves.SWExtrapolate(target_mat, m_obs, b, calibrated_curves.ufr, alpha)
+        return np.sum(cash_flows * (1 + yields + spreads[:, np.newaxis]) ** (-target_mat), axis=1)
+    base = value(r_obs)
+    for key_rate in range(n_liquid):
+        r_bumped = r_obs.copy()
+        r_bumped[key_rate] += bump
+        assert pv01[:, key_rate] == pytest.approx(value(r_bumped) - base, abs=1e-9)
+    assert krd == pytest.approx(-pv01 / (base[:, np.newaxis] * bump))
+    assert (pv01.sum(axis=1) < 0).all()
+
+def test_ProjectForwardRateVectorized(curves_1, annual_maturity, annual_yield):
+    curves_1.SetObservedTermStructure(maturity_vec=annual_maturity, yield_vec=annual_yield)
+    curves_1.CalcFwdRates()
+    n_points = annual_maturity.size
+    curves_1.ProjectForwardRate(n_points + 5)
+    forward = curves_1.fwd_rates["Forward"].values
+    for year in range(n_points):
+        expected = ((1+forward[year:]).cumprod()**(1/(annual_maturity[year:]-year))-1)-1
+        assert curves_1.r_obs_array[year, :n_points-year] == pytest.approx(expected, rel=1e-13)
+    assert (curves_1.n_liquid[n_points:] == 0).all()
+    assert np.isnan(curves_1.r_obs_array[n_points:]).all()
+
+def test_AlphaObjective(curves_1, annual_maturity, annual_yield):
+    ufr, tau = curves_1.ufr, curves_1.tau
+    objective = AlphaObjective(annual_maturity, annual_yield, ufr, tau)
+    for alpha in [0.05, 0.1, 0.2, 0.5]:
+        # Galfa as written in paragraphs 149 to 158 with explicit C and Q matrices
+        T = max(max(annual_maturity) + 40, 60)
+        Q = np.diag(np.exp(-np.log(1 + ufr) * annual_maturity)) @ np.identity(annual_maturity.size)
+        b = np.linalg.solve(Q.T @ curves_1.SWHeart(annual_maturity, annual_maturity, alpha) @ Q,
+                            (1 + annual_yield) ** (-annual_maturity) - np.diag(Q))
+        K = (1 + alpha * annual_maturity @ Q @ b) / (np.sinh(alpha * annual_maturity) @ Q @ b)
+        expected = alpha / np.abs(1 - K * np.exp(alpha * T)) - tau
+        assert objective(alpha) == pytest.approx(expected, rel=1e-9, abs=1e-14)
+        assert curves_1.Galfa(annual_maturity, annual_yield, ufr, alpha, tau) == objective(alpha)
+
+def test_ExportImportCalibration(calibrated_curves):
+    data = calibrated_curves.ExportCalibration()
+    restored = Curves(calibrated_curves.ufr, calibrated_curves.precision, calibrated_curves.tau, calibrated_curves.initial_date, calibrated_curves.country)
+    restored.ImportCalibration(data)
+    target_mat = np.array([0.5, 3., 25.])
+    for proj_step in range(3):
+        expected = calibrated_curves.RetrieveRates(proj_step, target_mat, "Discount", 0.)
+        assert restored.RetrieveRates(proj_step, target_mat, "Discount", 0.).equals(expected)
+
 #def test_CalibrateProjected(curves_1, term_structure_maturity, term_structure_yield):
 #    n_year = 3
 #    curves_1.SetObservedTermStructure(maturity_vec=term_structure_maturity, yield_vec=term_structure_yield)
@@ -0,0 +1,48 @@
+from HullWhiteClass import HullWhite
+import numpy as np
+import pytest
+
+
+CURVE_PROJECTION_YEARS = 1
+
+
+@pytest.fixture
+def hull_white(calibrated_curves) -> HullWhite:
+    return HullWhite(calibrated_curves, mean_reversion=0.05, volatility=0.01)
+
+
+def test_year_zero_matches_market(hull_white):
+    maturities = np.array([0.5, 1., 5., 30.])
+    discount = hull_white.GenerateDiscount(20, 5, maturities, seed=1)
+    assert discount.shape == (20, 6, 4)
+    assert np.allclose(discount[:, 0, :], hull_white.MarketDiscount(maturities), rtol=1e-13)
+
+
+def test_zero_volatility_gives_forward_curve(calibrated_curves):
+    hull_white = HullWhite(calibrated_curves, mean_reversion=0.1, volatility=0.)
+    maturities = np.array([1., 2., 10.])
+    discount = hull_white.GenerateDiscount(3, 4, maturities, seed=1)
+    for year in range(5):
+        forward = hull_white.MarketDiscount(year + maturities) / hull_white.MarketDiscount(np.array([year]))
+        assert np.allclose(discount[:, year, :], forward, rtol=1e-12)
+
+
+def test_seed_and_chunks(hull_white):
+    maturities = np.array([1., 3.])
+    full = hull_white.GenerateDiscount(25, 3, maturities, seed=7, chunk_size=1000)
+    assert np.array_equal(full, hull_white.GenerateDiscount(25, 3, maturities, seed=7, chunk_size=4))
+    assert not np.array_equal(full, hull_white.GenerateDiscount(25, 3, maturities, seed=8))
+    assert [chunk.shape[0] for chunk in hull_white.DiscountChunks(25, 3, maturities, seed=7, chunk_size=10)] == [10, 10, 5]
+
+
+def test_factor_distribution(hull_white):
+    x = hull_white.SimulateFactor(20000, 10, np.random.default_rng(3))
+    a, sigma = hull_white.mean_reversion, hull_white.volatility
+    expected_variance = sigma ** 2 * (1 - np.exp(-2 * a * 10)) / (2 * a)
+    assert abs(x[:, 10].mean()) < 4 * np.sqrt(expected_variance / 20000)
+    assert x[:, 10].var() == pytest.approx(expected_variance, rel=0.05)
+
+
+def test_invalid_parameters(calibrated_curves):
+    with pytest.raises(ValueError):
+        HullWhite(calibrated_curves, mean_reversion=0., volatility=0.01)
@@ -0,0 +1,72 @@
+from BondClasses import CorpBond
+from CurvesClass import AlphaObjective
+from FrequencyClass import Frequency
+from JitKernels import kernels, _sw_heart, _sw_extrapolate, _bisection_spread
+import datetime
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def corp_bond() -> CorpBond:
+    return CorpBond(asset_id=1, nace="C10", issuer="Test Issuer", issue_date=datetime.date(2020, 3, 15),
+                    maturity_date=datetime.date(2031, 3, 15), coupon_rate=0.03, notional_amount=100.,
+                    spread_country=0., spread_sector=0., zspread=0., spread_stress=0., frequency=Frequency.BIANNUAL,
+                    recovery_rate=0.4, default_probability=0.01, units=10., market_price=95.)
+
+
+@pytest.fixture
+def kernels_enabled(monkeypatch):
+    # Routes the calls through the kernels. Without Numba these are the uncompiled Python kernels
+    monkeypatch.setattr(kernels, "enabled", True)
+
+
+def test_sw_heart_parity(calibrated_curves):
+    u = np.array([0.5, 1., 3., 12.5])
+    v = np.array([1., 2., 7.])
+    assert np.allclose(_sw_heart(u, v, 0.13), calibrated_curves.SWHeart(u, v, 0.13), rtol=1e-13, atol=1e-15)
+
+
+def test_sw_extrapolate_parity(calibrated_curves):
+    m_obs, b, alpha = calibrated_curves._CalibrationSet(1)
+    m_target = np.array([0.25, 1., 4.5, 19., 60.])
+    expected = calibrated_curves.SWExtrapolate(m_target, m_obs, b, calibrated_curves.ufr, alpha)
+    assert np.allclose(_sw_extrapolate(m_target, m_obs, b, calibrated_curves.ufr, alpha), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_curves_with_kernels(calibrated_curves, kernels_enabled):
+    target_mat = np.array([0.5, 3., 25.])
+    m_obs = calibrated_curves.m_obs_array[0, :calibrated_curves.n_liquid[0]]
+    r_obs = calibrated_curves.r_obs_array[0, :calibrated_curves.n_liquid[0]]
+    with_kernels = calibrated_curves.SWExtrapolate(target_mat, *calibrated_curves._CalibrationSet(0)[:2], calibrated_curves.ufr, calibrated_curves.alpha_array[0])
+    galfa_kernels = AlphaObjective(m_obs, r_obs, calibrated_curves.ufr, calibrated_curves.tau)(0.2)
+    kernels.enabled = False
+    without_kernels = calibrated_curves.SWExtrapolate(target_mat, *calibrated_curves._CalibrationSet(0)[:2], calibrated_curves.ufr, calibrated_curves.alpha_array[0])
+    assert np.allclose(with_kernels, without_kernels, rtol=1e-12)
+    assert galfa_kernels == pytest.approx(AlphaObjective(m_obs, r_obs, calibrated_curves.ufr, calibrated_curves.tau)(0.2), rel=1e-9)
+
+
+def test_bisection_spread_parity(calibrated_curves, corp_bond, monkeypatch):
+    arguments = dict(x_start=-0.2, x_end=0.2, modelling_date=datetime.date(2023, 12, 1), end_date=datetime.date(2033, 12, 1),
+                     proj_period=0, curves=calibrated_curves, precision=1e-10, max_iter=1000)
+    expected = corp_bond.bisection_spread(**arguments)
+    monkeypatch.setattr(kernels, "enabled", True)
+    assert corp_bond.bisection_spread(**arguments) == pytest.approx(expected, abs=1e-9)
+
+
+def test_bisection_spread_not_converged():
+    spread, converged = _bisection_spread(np.array([100.]), np.array([1.]), np.array([0.01]), 50., 0., 0.001, 1e-12, 5)
+    assert converged is False
+
+
+def test_numba_kernels_parity(calibrated_curves):
+    pytest.importorskip("numba")
+    u = np.array([0.5, 1., 3., 12.5])
+    assert np.allclose(kernels.sw_heart(u, u, 0.13), _sw_heart(u, u, 0.13), rtol=1e-14)
+    m_obs, b, alpha = calibrated_curves._CalibrationSet(1)
+    assert np.allclose(kernels.sw_extrapolate(u, m_obs, b, calibrated_curves.ufr, alpha),
+                       _sw_extrapolate(u, m_obs, b, calibrated_curves.ufr, alpha), rtol=1e-14)
+    arguments = (np.array([3., 3., 103.]), np.array([0.5, 1.5, 2.5]), np.array([0.01, 0.012, 0.015]), 98., -0.2, 0.2, 1e-10, 1000)
+    assert kernels.bisection_spread(*arguments) == _bisection_spread(*arguments)
+    assert kernels.enable(True) is True
+    kernels.enable(False)
@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pytest
+from CurvesClass import Curves
+from ImportData import get_configuration, get_settings, import_SWEiopa
+from MultiCurvesClass import MultiCurves
+
+
+@pytest.fixture
+def settings():
+    conf = get_configuration(os.path.join(os.getcwd(), "ALM.ini"), os)
+    return get_settings(conf.input_parameters)
+
+
+@pytest.fixture
+def multi_curves(settings):
+    multi_curves = MultiCurves(settings.precision, settings.tau, settings.modelling_date)
+    multi_curves.LoadEiopa(settings.EIOPA_param_file, settings.EIOPA_curves_file, ["Slovenia", "Germany"])
+    return multi_curves
+
+
+def test_LoadEiopa(multi_curves):
+    assert len(multi_curves) == 2
+    assert "Slovenia" in multi_curves
+    assert "Italy" not in multi_curves
+    assert multi_curves["Germany"].country == "Germany"
+    with pytest.raises(KeyError):
+        multi_curves["Italy"]
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_CalibrateProjectedMatchesSingleCountry(settings, multi_curves, executor):
+    multi_curves.CalibrateProjected(3, 0.05, 0.5, 1000, method="brent", warm_start=True, executor=executor, n_workers=2)
+
+    _, curve_country, extra_param, _ = import_SWEiopa(settings.EIOPA_param_file, settings.EIOPA_curves_file, "Germany")
+    curves = Curves(extra_param["UFR"]/100, settings.precision, settings.tau, settings.modelling_date, "Germany")
+    curves.SetObservedTermStructure(maturity_vec=curve_country.index.to_numpy(dtype=float), yield_vec=curve_country.values)
+    curves.CalcFwdRates()
+    curves.ProjectForwardRate(3)
+    curves.CalibrateProjected(3, 0.05, 0.5, 1000, method="brent", warm_start=True)
+
+    assert np.array_equal(multi_curves["Germany"].alpha_array, curves.alpha_array)
+    assert np.array_equal(multi_curves["Germany"].b_array, curves.b_array, equal_nan=True)
+    target_mat = np.array([1., 7.5, 40.])
+    assert multi_curves["Germany"].RetrieveRates(2, target_mat, "Yield", 0.).equals(curves.RetrieveRates(2, target_mat, "Yield", 0.))
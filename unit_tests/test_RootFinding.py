@@ -0,0 +1,43 @@
+from RootFinding import bisection_root, brent_root, newton_root
+import pytest
+
+
+def cubic(x: float) -> float:
+    return x ** 3 - 2 * x - 5  # Single root at 2.0945514815423265
+
+
+ROOT = 2.0945514815423265
+
+
+@pytest.mark.parametrize("root_finder", [bisection_root, brent_root, newton_root])
+def test_finds_root(root_finder):
+    root, n_eval = root_finder(cubic, 1., 3., 1e-12, 1000)
+    assert root == pytest.approx(ROOT, abs=1e-10)
+    assert n_eval > 0
+
+
+@pytest.mark.parametrize("root_finder", [brent_root, newton_root])
+def test_fewer_evaluations_than_bisection(root_finder):
+    _, n_bisection = bisection_root(cubic, 1., 3., 1e-12, 1000)
+    _, n_eval = root_finder(cubic, 1., 3., 1e-12, 1000)
+    assert n_eval < n_bisection
+
+
+@pytest.mark.parametrize("root_finder", [brent_root, newton_root])
+def test_warm_start(root_finder):
+    _, n_cold = root_finder(cubic, 1., 3., 1e-12, 1000)
+    root, n_warm = root_finder(cubic, 1., 3., 1e-12, 1000, x_guess=2.09)
+    assert root == pytest.approx(ROOT, abs=1e-10)
+    assert n_warm < n_cold
+
+
+@pytest.mark.parametrize("root_finder", [bisection_root, brent_root, newton_root])
+def test_no_sign_change_returns_upper_end(root_finder):
+    root, _ = root_finder(lambda x: x + 10., 0., 1., 1e-10, 1000)
+    assert root == pytest.approx(1., abs=1e-9)
+
+
+def test_endpoint_is_root():
+    root, n_eval = brent_root(cubic, ROOT, 3., 1e-10, 1000)
+    assert root == ROOT
+    assert n_eval == 2
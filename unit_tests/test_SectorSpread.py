@@ -0,0 +1,54 @@
+from SectorSpreadClass import SectorSpreadIndex
+from ImportData import get_sector_spreads, get_bond_book
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def sector_spreads() -> SectorSpreadIndex:
+    return SectorSpreadIndex(codes=["A", "A1", "A1.4", "C", "C10.1", "K"], spreads=[0.01, 0.02, 0.03, 0.04, 0.05, 0.06])
+
+
+def test_parent_codes():
+    parents = SectorSpreadIndex.parent_codes(np.array(["A1.4.5", "A1.4", "A1", "A", "C10.1"]))
+    assert list(parents) == ["A1.4", "A1", "A", "", "C10"]
+
+
+def test_most_specific_code(sector_spreads):
+    spreads = sector_spreads.lookup(["A1.4", "A1.4.5", "A1.9", "A2", "C10.1.2", "C11", "a1.4"])
+    assert np.allclose(spreads, [0.03, 0.03, 0.02, 0.01, 0.05, 0.04, 0.03])
+
+
+def test_missing_code(sector_spreads):
+    assert np.isnan(sector_spreads.lookup(["Z9.1"])[0])
+    assert sector_spreads.lookup(["Z9.1"], default=0.)[0] == 0.
+    assert list(sector_spreads.resolve(["Z9.1", "K"])) == [-1, 5]
+    with pytest.raises(KeyError):
+        sector_spreads.lookup(["A1", "Z9.1"], default=None)
+
+
+def test_missing_nace_value(sector_spreads):
+    assert list(sector_spreads.resolve(["Z9", np.nan, None, "K"])) == [-1, -1, -1, 5]
+    spreads = sector_spreads.lookup(["Z9", np.nan, "K"])
+    assert np.isnan(spreads[:2]).all() and spreads[2] == 0.06
+    with pytest.raises(KeyError):
+        sector_spreads.lookup([np.nan, "K"], default=None)
+
+
+def test_duplicate_codes():
+    with pytest.raises(ValueError):
+        SectorSpreadIndex(codes=["A", "A1", "A"], spreads=[0.01, 0.02, 0.03])
+
+
+def test_bulk_lookup_matches_scalar(sector_spreads):
+    codes = np.random.default_rng(1).choice(["A1.4.5", "A1", "C10.1.1", "C2", "K6", "Z1", "A"], size=1000)
+    expected = [sector_spreads.lookup([code])[0] for code in codes]
+    assert np.allclose(sector_spreads.lookup(codes), expected, equal_nan=True)
+
+
+def test_get_sector_spreads():
+    sector_spreads = get_sector_spreads("Input/Sector_Spread.csv")
+    assert len(sector_spreads) == 996
+    assert sector_spreads.lookup(["A1.4.5"])[0] == pytest.approx(0.01)
+    book = get_bond_book("Input/Bond_Portfolio.csv").with_sector_spreads(sector_spreads)
+    assert np.allclose(book.spread_sector, 0.01)